@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Build the shared translation dictionaries and language detector once per process,
+        # before the first request
+        from .translation_data.language_detection import get_language_detector
+        get_language_detector()
@@ -1,4 +1,5 @@
 import os
+import threading
 import joblib
 import tensorflow as tf
 from django.conf import settings
@@ -9,12 +10,40 @@ class ModelLoader:
     This class provides methods to load various types of ML models.
     """
     
+    # Loaded scikit-learn models keyed by name, stored with the file's mtime
+    # so a retrained model on disk is picked up on the next request
+    _sklearn_models = {}
+    _sklearn_lock = threading.Lock()
+    
     @staticmethod
     def load_sklearn_model(model_name):
-        """Load scikit-learn models using joblib"""
+        """Load scikit-learn models using joblib (cached per process)"""
         model_path = os.path.join(settings.MODELS_DIR, f"{model_name}.joblib")
-        if os.path.exists(model_path):
-            return joblib.load(model_path)
+        try:
+            mtime = os.stat(model_path).st_mtime_ns
+        except OSError:
+            return None
+        
+        cached = ModelLoader._sklearn_models.get(model_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        with ModelLoader._sklearn_lock:
+            cached = ModelLoader._sklearn_models.get(model_name)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            model = joblib.load(model_path)
+            ModelLoader._sklearn_models[model_name] = (mtime, model)
+            return model
+    
+    @staticmethod
+    def model_version(model_name):
+        """Version of a saved model (its file mtime), or None if it is not on disk"""
+        for extension in ('joblib', 'keras', 'h5'):
+            try:
+                return os.stat(os.path.join(settings.MODELS_DIR, f"{model_name}.{extension}")).st_mtime_ns
+            except OSError:
+                continue
         return None
     
     @staticmethod
@@ -61,4 +90,4 @@ class ModelLoader:
             print(f"Warning: Failed to save with .keras extension: {e}")
             model_path = os.path.join(settings.MODELS_DIR, f"{model_name}.h5")
             model.save(model_path)
-            return model_path 
\ No newline at end of file
+            return model_path
@@ -0,0 +1,108 @@
+"""
+Binary request parsers for numeric batch scoring.
+
+Batch clients can send the feature matrix as a raw ``.npy`` file or as
+msgpack with typed arrays instead of JSON lists of floats. Arrays are
+mapped straight onto the request body with ``np.frombuffer``, so no
+per-value parsing or copying happens before schema validation.
+
+Typed arrays in msgpack payloads are maps of the form
+``{"dtype": "<f8", "shape": [rows, cols], "data": <bin>}``.
+"""
+import io
+
+import numpy as np
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+try:
+    import msgpack
+except ImportError:  # msgpack support is optional
+    msgpack = None
+
+NPY_MEDIA_TYPE = 'application/x-npy'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+
+def decode_npy(buffer):
+    """Map an .npy payload onto an ndarray without copying the data"""
+    stream = io.BytesIO(buffer)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+        else:
+            # Version 3.0 headers are UTF-8 (non-ASCII field names); numpy has no public reader for them
+            shape, fortran_order, dtype = np.lib.format._read_array_header(stream, version)
+    except ValueError as e:
+        raise ParseError(f"Invalid .npy payload: {e}")
+
+    if dtype.hasobject:
+        raise ParseError("Object arrays are not accepted")
+
+    count = int(np.prod(shape)) if shape else 1
+    try:
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=stream.tell())
+    except ValueError as e:
+        raise ParseError(f"Invalid .npy payload: {e}")
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+
+def decode_typed_array(obj):
+    """msgpack object hook turning typed-array maps into ndarrays"""
+    if 'dtype' in obj and 'data' in obj:
+        try:
+            dtype = np.dtype(obj['dtype'])
+        except TypeError as e:
+            raise ParseError(f"Invalid typed array dtype: {e}")
+        if dtype.hasobject:
+            raise ParseError("Object arrays are not accepted")
+        try:
+            array = np.frombuffer(obj['data'], dtype=dtype)
+            if 'shape' in obj:
+                array = array.reshape(obj['shape'])
+        except (TypeError, ValueError) as e:
+            raise ParseError(f"Invalid typed array: {e}")
+        return array
+    return obj
+
+
+def feature_payload(array):
+    """Wrap a decoded array as a rows or columns batch for BaseModelView"""
+    if array.dtype.names:
+        # Structured arrays carry their column names, each field is a view
+        return {"columns": {name: array[name] for name in array.dtype.names}}
+    if array.ndim != 2:
+        raise ParseError("Expected a 2-D array of shape (rows, features)")
+    return {"rows": array}
+
+
+class NumpyParser(BaseParser):
+    """Parse a raw .npy body into a rows (or structured columns) batch"""
+    media_type = NPY_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return feature_payload(decode_npy(stream.read()))
+
+
+class MsgpackParser(BaseParser):
+    """Parse msgpack bodies, decoding typed arrays with zero copies"""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if msgpack is None:
+            raise ParseError("msgpack is not installed on this server")
+        try:
+            data = msgpack.unpackb(stream.read(), raw=False, object_hook=decode_typed_array)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+            raise ParseError(f"Invalid msgpack payload: {e}")
+        if isinstance(data, np.ndarray):
+            return feature_payload(data)
+        if not isinstance(data, dict):
+            raise ParseError("Expected a msgpack map or typed array")
+        return data
+
+
+BINARY_PARSERS = [NumpyParser] + ([MsgpackParser] if msgpack is not None else [])
@@ -1,4 +1,4 @@
-from django.urls import path
+from api.serving import prediction_path
 from api.views import (
     # Regression models
     LinearRegressionView,
@@ -21,30 +21,38 @@ from api.views import (
     NeuralNetworkView,
     RNNView,
     LSTMView,
+    LSTMStreamView,
     TranslationView,
+    LanguageDetectionView,
+    DocumentTranslationView,
+    BatchTranslationView,
 )
 
 urlpatterns = [
     # Regression models
-    path('linear-regression/', LinearRegressionView.as_view(), name='linear_regression'),
-    path('multiple-linear-regression/', MultipleLinearRegressionView.as_view(), name='multiple_linear_regression'),
-    path('general-regression/', GeneralRegressionView.as_view(), name='general_regression'),
+    prediction_path('linear-regression/', LinearRegressionView, 'linear_regression'),
+    prediction_path('multiple-linear-regression/', MultipleLinearRegressionView, 'multiple_linear_regression'),
+    prediction_path('general-regression/', GeneralRegressionView, 'general_regression'),
     
     # Classification models
-    path('classification/', ClassificationView.as_view(), name='classification'),
-    path('knn/', KNNView.as_view(), name='knn'),
-    path('logistic-regression/', LogisticRegressionView.as_view(), name='logistic_regression'),
-    path('naive-bayes/', NaiveBayesView.as_view(), name='naive_bayes'),
-    path('decision-tree/', DecisionTreeView.as_view(), name='decision_tree'),
+    prediction_path('classification/', ClassificationView, 'classification'),
+    prediction_path('knn/', KNNView, 'knn'),
+    prediction_path('logistic-regression/', LogisticRegressionView, 'logistic_regression'),
+    prediction_path('naive-bayes/', NaiveBayesView, 'naive_bayes'),
+    prediction_path('decision-tree/', DecisionTreeView, 'decision_tree'),
     
     # Ensemble models
-    path('random-forest/', RandomForestView.as_view(), name='random_forest'),
-    path('adaboost/', AdaBoostView.as_view(), name='adaboost'),
-    path('xgboost/', XGBoostView.as_view(), name='xgboost'),
+    prediction_path('random-forest/', RandomForestView, 'random_forest'),
+    prediction_path('adaboost/', AdaBoostView, 'adaboost'),
+    prediction_path('xgboost/', XGBoostView, 'xgboost'),
     
     # Neural networks
-    path('neural-network/', NeuralNetworkView.as_view(), name='neural_network'),
-    path('rnn/', RNNView.as_view(), name='rnn'),
-    path('lstm/', LSTMView.as_view(), name='lstm'),
-    path('translation/', TranslationView.as_view(), name='translation'),
+    prediction_path('neural-network/', NeuralNetworkView, 'neural_network'),
+    prediction_path('rnn/', RNNView, 'rnn'),
+    prediction_path('lstm/', LSTMView, 'lstm'),
+    prediction_path('lstm/stream/', LSTMStreamView, 'lstm_stream'),
+    prediction_path('translation/', TranslationView, 'translation'),
+    prediction_path('translation/detect/', LanguageDetectionView, 'language_detection'),
+    prediction_path('translation/document/', DocumentTranslationView, 'translation_document'),
+    prediction_path('translation/batch/', BatchTranslationView, 'translation_batch'),
 ] 
\ No newline at end of file
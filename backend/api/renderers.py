@@ -0,0 +1,101 @@
+"""
+Binary response renderers matching api.parsers, plus the Prometheus text
+renderer used by the metrics endpoint.
+
+Clients that send ``Accept: application/x-npy`` or
+``Accept: application/msgpack`` get the raw prediction array back in the
+same encoding. Non-array payloads such as errors fall back to JSON.
+"""
+import io
+
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .parsers import NPY_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, msgpack
+
+
+def encode_typed_array(obj):
+    """msgpack default hook encoding ndarrays as typed-array maps"""
+    if isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        return {"dtype": array.dtype.str, "shape": list(array.shape), "data": array.tobytes()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to msgpack")
+
+
+class BinaryRenderer(BaseRenderer):
+    """Base for binary renderers with a JSON fallback for non-array data"""
+    charset = None
+    render_style = 'binary'
+
+    def render_json(self, data, renderer_context):
+        """Render data as JSON and fix up the response content type"""
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = JSONRenderer.media_type
+        return JSONRenderer().render(data)
+
+
+class NumpyRenderer(BinaryRenderer):
+    """Render the prediction array as a .npy file"""
+    media_type = NPY_MEDIA_TYPE
+    format = 'npy'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        array = data.get('predictions') if isinstance(data, dict) else data
+        if not isinstance(array, np.ndarray):
+            return self.render_json(data, renderer_context)
+        buffer = io.BytesIO()
+        np.lib.format.write_array(buffer, array, allow_pickle=False)
+        return buffer.getvalue()
+
+
+class MsgpackRenderer(BinaryRenderer):
+    """Render responses as msgpack, with ndarrays as typed arrays"""
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_typed_array, use_bin_type=True)
+
+
+BINARY_RENDERERS = [NumpyRenderer] + ([MsgpackRenderer] if msgpack is not None else [])
+BINARY_FORMATS = frozenset(renderer.format for renderer in BINARY_RENDERERS)
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Render an api.serving.metrics snapshot in the Prometheus text format"""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict) or 'metrics' not in data:
+            return self.render_plain(data)
+        lines = []
+        for metric in data['metrics']:
+            if metric['help']:
+                lines.append(f"# HELP {metric['name']} {metric['help']}")
+            lines.append(f"# TYPE {metric['name']} {metric['type']}")
+            for sample in metric['samples']:
+                lines.append(f"{metric['name']}{self.format_labels(sample['labels'])} {sample['value']}")
+        return ("\n".join(lines) + "\n").encode(self.charset)
+
+    def render_plain(self, data):
+        """Errors and other non-metric payloads are rendered as plain text"""
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return f"{data}\n".encode(self.charset)
+
+    @staticmethod
+    def format_labels(labels):
+        if not labels:
+            return ""
+        pairs = ",".join(
+            '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for name, value in sorted(labels.items())
+        )
+        return "{" + pairs + "}"
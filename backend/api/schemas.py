@@ -0,0 +1,199 @@
+"""
+Declarative input schemas for the tabular prediction views.
+
+A FeatureSchema lists the model's features in model order. On creation it
+compiles its bounds, integer flags and defaults into numpy arrays, so a
+single dict, a list of rows or a dict of columns is validated with a few
+vectorized comparisons and comes out as the float64 matrix the model
+expects. The same schema feeds the GET docs of each view.
+"""
+import numpy as np
+
+DTYPE_NAMES = {float: "number", int: "integer"}
+
+
+class SchemaValidationError(ValueError):
+    """Raised when input does not match a FeatureSchema"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{e['field']}: {e['error']}" for e in errors))
+
+
+class Feature:
+    """A single numeric model input"""
+
+    def __init__(self, name, dtype=float, min_value=None, max_value=None,
+                 default=0, example=None, description=""):
+        if dtype not in DTYPE_NAMES:
+            raise ValueError(f"Unsupported feature dtype: {dtype}")
+        self.name = name
+        self.dtype = dtype
+        self.min_value = min_value
+        self.max_value = max_value
+        self.default = default
+        self.example = default if example is None else example
+        self.description = description
+
+    def describe(self):
+        """Describe this feature for the GET docs"""
+        info = {"name": self.name, "type": DTYPE_NAMES[self.dtype]}
+        if self.min_value is not None:
+            info["min"] = self.min_value
+        if self.max_value is not None:
+            info["max"] = self.max_value
+        if self.default is None:
+            info["required"] = True
+        else:
+            info["default"] = self.default
+        if self.description:
+            info["description"] = self.description
+        return info
+
+
+class FeatureSchema:
+    """Ordered collection of features, compiled for vectorized validation"""
+
+    def __init__(self, *features):
+        self.features = tuple(features)
+        self.names = tuple(feature.name for feature in self.features)
+
+        # Compiled form: one array slot per feature, in model order
+        self._minimums = np.array(
+            [-np.inf if f.min_value is None else f.min_value for f in self.features], dtype=np.float64
+        )
+        self._maximums = np.array(
+            [np.inf if f.max_value is None else f.max_value for f in self.features], dtype=np.float64
+        )
+        self._integer_mask = np.array([f.dtype is int for f in self.features], dtype=bool)
+        self._has_integers = bool(self._integer_mask.any())
+
+    def __len__(self):
+        return len(self.features)
+
+    def example(self):
+        """Example input dict for the GET docs"""
+        return {feature.name: feature.example for feature in self.features}
+
+    def describe(self):
+        """Per-feature documentation for the GET docs"""
+        return [feature.describe() for feature in self.features]
+
+    def validate(self, data):
+        """Validate a single input dict and return a (1, n_features) matrix"""
+        row = np.empty(len(self.features), dtype=np.float64)
+        errors = []
+        for i, feature in enumerate(self.features):
+            value = data.get(feature.name, feature.default)
+            if value is None:
+                errors.append({"field": feature.name, "error": "This field is required."})
+                continue
+            try:
+                row[i] = float(value)
+            except (TypeError, ValueError):
+                errors.append({"field": feature.name, "error": f"A {DTYPE_NAMES[feature.dtype]} is required."})
+        if errors:
+            raise SchemaValidationError(errors)
+        return self.validate_matrix(row.reshape(1, -1))
+
+    def validate_rows(self, rows, headers=None):
+        """
+        Validate a list of rows (or a 2-D array) and return the feature matrix.
+        When headers name every feature, columns are picked by name;
+        otherwise the first n_features columns are used in schema order.
+        """
+        try:
+            matrix = np.asarray(rows, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise SchemaValidationError([{
+                "field": "rows",
+                "error": f"Rows must be numeric with {len(self.features)} values each ({', '.join(self.names)})."
+            }])
+        if matrix.ndim != 2 or matrix.shape[0] == 0:
+            raise SchemaValidationError([{"field": "rows", "error": "Expected a non-empty list of rows."}])
+
+        if headers and all(name in headers for name in self.names):
+            matrix = matrix[:, [list(headers).index(name) for name in self.names]]
+        elif matrix.shape[1] < len(self.features):
+            raise SchemaValidationError([{
+                "field": "rows",
+                "error": f"Each row must have at least {len(self.features)} values ({', '.join(self.names)})."
+            }])
+        elif matrix.shape[1] > len(self.features):
+            matrix = matrix[:, :len(self.features)]
+        return self.validate_matrix(matrix)
+
+    def validate_columns(self, columns):
+        """Validate a dict of feature name -> column values and return the feature matrix"""
+        n_rows = None
+        arrays = []
+        errors = []
+        for feature in self.features:
+            if feature.name not in columns:
+                arrays.append(feature.default)
+                continue
+            try:
+                array = np.asarray(columns[feature.name], dtype=np.float64)
+            except (TypeError, ValueError):
+                errors.append({"field": feature.name, "error": f"Column must contain only {DTYPE_NAMES[feature.dtype]}s."})
+                arrays.append(None)
+                continue
+            if array.ndim != 1:
+                errors.append({"field": feature.name, "error": "Column must be one-dimensional."})
+            elif n_rows is None:
+                n_rows = len(array)
+            elif len(array) != n_rows:
+                errors.append({"field": feature.name, "error": f"Column has {len(array)} values, expected {n_rows}."})
+            arrays.append(array)
+        if n_rows is None and not errors:
+            errors.append({"field": "columns", "error": "Expected at least one feature column."})
+        if errors:
+            raise SchemaValidationError(errors)
+
+        matrix = np.empty((n_rows, len(self.features)), dtype=np.float64)
+        for i, (feature, array) in enumerate(zip(self.features, arrays)):
+            if isinstance(array, np.ndarray):
+                matrix[:, i] = array
+            elif array is None:
+                raise SchemaValidationError([{"field": feature.name, "error": "This field is required."}])
+            else:
+                matrix[:, i] = array
+        return self.validate_matrix(matrix)
+
+    def validate_matrix(self, matrix):
+        """Check bounds and integer features for a whole matrix at once"""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.features):
+            raise SchemaValidationError([{
+                "field": "features",
+                "error": f"Expected a matrix with {len(self.features)} columns ({', '.join(self.names)})."
+            }])
+
+        invalid = ~np.isfinite(matrix) | (matrix < self._minimums) | (matrix > self._maximums)
+        if self._has_integers:
+            invalid |= self._integer_mask & (matrix != np.floor(matrix))
+        if not invalid.any():
+            return matrix
+
+        errors = []
+        for i in np.flatnonzero(invalid.any(axis=0)):
+            feature = self.features[i]
+            bad_rows = np.flatnonzero(invalid[:, i])
+            errors.append({
+                "field": feature.name,
+                "error": self._describe_bounds(feature),
+                "rows": bad_rows[:10].tolist(),
+                "invalid_count": int(len(bad_rows)),
+            })
+        raise SchemaValidationError(errors)
+
+    def _describe_bounds(self, feature):
+        """Human readable constraint for error messages"""
+        kind = "an integer" if feature.dtype is int else "a finite number"
+        if feature.min_value is not None and feature.max_value is not None:
+            return f"Must be {kind} between {feature.min_value} and {feature.max_value}."
+        if feature.min_value is not None:
+            return f"Must be {kind} >= {feature.min_value}."
+        if feature.max_value is not None:
+            return f"Must be {kind} <= {feature.max_value}."
+        return f"Must be {kind}."
@@ -0,0 +1,4 @@
+# Serving Module
+# Request-path infrastructure shared by the prediction endpoints
+from .fast_path import FastPathApplication
+from .pipeline import PredictionPipeline, ServedResponse, get_pipeline, prediction_path
@@ -0,0 +1,173 @@
+"""
+Admission control for prediction endpoints.
+
+Each endpoint may run at most ``max_concurrency`` requests at once per
+worker process. Further requests wait in a short queue of at most
+``max_queue`` entries for up to ``queue_timeout`` seconds. When the queue
+is full the request is rejected immediately with 429, and when it waits
+too long it gets a 503. Both carry a Retry-After estimated from the
+endpoint's recent service time, so overload is shed in microseconds
+instead of piling up behind slow models.
+
+Waiting requests are served by priority class (api.serving.priority),
+FIFO within a class. Batch and background work may always hold their
+share of the slots and queue. Beyond that share they only borrow idle
+slots, and always leave one slot free for interactive work. Waiting never
+outlasts the request deadline (api.serving.deadlines).
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .deadlines import DeadlineExceeded, check_deadline, current_deadline
+from .metrics import registry
+from .priority import INTERACTIVE, PRIORITY_CLASSES, class_shares
+
+QUEUE_DEPTH = registry.gauge(
+    'prediction_queue_depth', "Requests waiting for an execution slot, by model or family and priority")
+IN_FLIGHT = registry.gauge(
+    'prediction_in_flight', "Requests currently executing, by model or family")
+REJECTED = registry.counter(
+    'prediction_rejected_total', "Requests shed by admission control, by model or family, priority and reason")
+
+DEFAULT_LIMITS = {'max_concurrency': 8, 'max_queue': 16, 'queue_timeout': 2.0}
+
+
+class Overloaded(Exception):
+    """Raised when admission control sheds a request"""
+
+    def __init__(self, status_code, reason, retry_after):
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(reason)
+
+
+class AdmissionController:
+    """Concurrency limit with bounded per-priority wait queues"""
+
+    def __init__(self, name, max_concurrency, max_queue, queue_timeout, labels=None, shares=None):
+        self.name = name
+        self.labels = labels or {'model': name}
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.shares = class_shares() if shares is None else shares
+        self.active = 0
+        self._active = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._waiters = {priority: deque() for priority in PRIORITY_CLASSES}
+        self._lock = threading.Lock()
+        # Exponentially weighted service time in seconds, for Retry-After
+        self._service_time = 0.0
+
+    @classmethod
+    def from_settings(cls, name):
+        """Build the controller for an endpoint from settings.PREDICT_ADMISSION"""
+        limits = dict(DEFAULT_LIMITS)
+        configured = getattr(settings, 'PREDICT_ADMISSION', {})
+        limits.update(configured.get('default', {}))
+        limits.update(configured.get(name, {}))
+        return cls(name, **limits)
+
+    @property
+    def service_time(self):
+        """Recent average seconds a request holds a slot"""
+        return self._service_time
+
+    @property
+    def queue_depth(self):
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def retry_after(self):
+        """Seconds a rejected client should wait before retrying"""
+        backlog = (self.queue_depth + 1) / self.max_concurrency
+        return max(1, math.ceil(self._service_time * backlog))
+
+    def _share(self, limit, priority):
+        """How much of a limit a priority class may always use"""
+        if priority == INTERACTIVE or not limit:
+            return limit
+        return max(1, math.ceil(limit * self.shares.get(priority, 1.0)))
+
+    def _can_start(self, priority):
+        if self.active >= self.max_concurrency:
+            return False
+        higher = PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority)]
+        if any(self._waiters[p] for p in higher):
+            return False
+        if priority == INTERACTIVE or self._active[priority] < self._share(self.max_concurrency, priority):
+            return True
+        # Borrow idle capacity, keeping a slot free for interactive work
+        return self.active + 1 < self.max_concurrency
+
+    def _start(self, priority):
+        self.active += 1
+        self._active[priority] += 1
+        IN_FLIGHT.set(self.active, **self.labels)
+
+    def _dispatch(self):
+        """Hand free slots to waiters, highest priority first"""
+        for priority in PRIORITY_CLASSES:
+            waiters = self._waiters[priority]
+            while waiters and self._can_start(priority):
+                self._start(priority)
+                waiters.popleft().set()
+            QUEUE_DEPTH.set(len(waiters), **self.labels, priority=priority)
+
+    def _reject(self, status_code, reason, priority):
+        REJECTED.inc(**self.labels, priority=priority, reason=reason)
+        raise Overloaded(status_code, reason, self.retry_after())
+
+    def acquire(self, priority=INTERACTIVE):
+        """Take an execution slot, waiting in the queue if necessary"""
+        check_deadline('queue')
+        with self._lock:
+            waiters = self._waiters[priority]
+            if not waiters and self._can_start(priority):
+                self._start(priority)
+                return
+            if len(waiters) >= self._share(self.max_queue, priority):
+                self._reject(429, 'queue_full', priority)
+            waiter = threading.Event()
+            waiters.append(waiter)
+            QUEUE_DEPTH.set(len(waiters), **self.labels, priority=priority)
+
+        deadline = current_deadline()
+        timeout = self.queue_timeout if deadline is None else min(self.queue_timeout, deadline.remaining())
+        if waiter.wait(timeout):
+            return
+
+        with self._lock:
+            if waiter.is_set():
+                # The slot was handed over just as the wait timed out
+                return
+            waiters.remove(waiter)
+            # Lower classes may have been held back only by this waiter
+            self._dispatch()
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded('queue')
+            self._reject(503, 'queue_timeout', priority)
+
+    def release(self, priority=INTERACTIVE, service_time=None):
+        """Return a slot and hand free slots to the next waiters"""
+        with self._lock:
+            if service_time is not None:
+                self._service_time = 0.8 * self._service_time + 0.2 * service_time
+            self.active -= 1
+            self._active[priority] -= 1
+            IN_FLIGHT.set(self.active, **self.labels)
+            self._dispatch()
+
+    @contextmanager
+    def admit(self, priority=INTERACTIVE):
+        """Hold an execution slot for the duration of the block"""
+        self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(priority, time.monotonic() - started)
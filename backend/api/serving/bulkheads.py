@@ -0,0 +1,95 @@
+"""
+Bulkhead executors per model family.
+
+Prediction views belong to a family (``serving_family`` on the view:
+tabular, image, audio or text). Each family has its own bounded thread
+pool and wait queue, so a burst of MediaPipe runs or Google Translate
+calls can only exhaust the image or text pool. Their excess requests are
+shed quickly instead of holding every gunicorn thread, and the
+sub-millisecond sklearn endpoints keep their own capacity.
+
+Families configured without ``dedicated_threads`` still get the
+concurrency and queue limits but run on the request thread, which avoids
+a thread hop for the fast tabular models.
+
+The request deadline travels into the pool with the context variables.
+A request whose deadline passes is answered as soon as its work reaches
+a checkpoint, or shortly after if it does not. Its slot is only
+released once the pool thread reaches a deadline checkpoint and stops,
+so abandoned work still counts against the family's limits.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+
+from .admission import AdmissionController
+from .deadlines import DeadlineExceeded, current_deadline
+from .priority import INTERACTIVE
+
+DEFAULT_FAMILY = 'tabular'
+DEFAULT_BULKHEAD = {'max_workers': 8, 'max_queue': 32, 'queue_timeout': 2.0, 'dedicated_threads': True}
+
+# Seconds to wait for expired work to stop at its own checkpoint, which
+# reports the stage and progress it was cancelled at
+CANCEL_GRACE = 0.05
+
+
+class Bulkhead:
+    """An isolated, bounded execution pool for one model family"""
+
+    def __init__(self, family, max_workers, max_queue, queue_timeout, dedicated_threads=True):
+        self.family = family
+        self.admission = AdmissionController(
+            family, max_workers, max_queue, queue_timeout, labels={'family': family}
+        )
+        self.executor = None
+        if dedicated_threads:
+            self.executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f'bulkhead-{family}'
+            )
+
+    def run(self, fn, priority=INTERACTIVE):
+        """Run fn within this family's limits and return its result"""
+        if self.executor is None:
+            with self.admission.admit(priority):
+                return fn()
+
+        self.admission.acquire(priority)
+        started = time.monotonic()
+        # Admission already bounds the work, so the executor never queues
+        future = self.executor.submit(contextvars.copy_context().run, fn)
+        future.add_done_callback(
+            lambda _: self.admission.release(priority, time.monotonic() - started)
+        )
+        deadline = current_deadline()
+        try:
+            return future.result(timeout=None if deadline is None else deadline.remaining())
+        except FutureTimeout:
+            pass
+        try:
+            return future.result(timeout=CANCEL_GRACE)
+        except FutureTimeout:
+            raise DeadlineExceeded(f'{self.family} executor')
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+
+_bulkheads = {}
+_bulkheads_lock = threading.Lock()
+
+
+def get_bulkhead(family):
+    """Return the bulkhead for a model family, creating it from settings.PREDICT_BULKHEADS"""
+    family = family or DEFAULT_FAMILY
+    with _bulkheads_lock:
+        bulkhead = _bulkheads.get(family)
+        if bulkhead is None:
+            config = dict(DEFAULT_BULKHEAD)
+            config.update(getattr(settings, 'PREDICT_BULKHEADS', {}).get(family, {}))
+            bulkhead = _bulkheads[family] = Bulkhead(family, **config)
+        return bulkhead
@@ -0,0 +1,85 @@
+"""
+Circuit breakers for remote dependencies.
+
+A breaker counts consecutive failed calls to an upstream service. After
+failure_threshold of them it opens, and callers skip the upstream
+entirely (for Google Translate, straight to the dictionary fallback)
+instead of each waiting for their own timeout. After reset_timeout
+seconds it lets a single trial call through (half-open): success closes
+the breaker again, failure re-opens it for another reset_timeout.
+"""
+import logging
+import threading
+import time
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+BREAKER_STATE = registry.gauge(
+    'circuit_breaker_state', "Circuit breaker state by breaker: 0 closed, 1 open, 2 half-open")
+BREAKER_REJECTED = registry.counter(
+    'circuit_breaker_rejected_total', "Calls skipped because their circuit breaker was open, by breaker")
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker, shared by the threads of a process"""
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        BREAKER_STATE.set(_STATE_VALUES[CLOSED], breaker=name)
+
+    @property
+    def state(self):
+        return self._state
+
+    def _set_state(self, state):
+        self._state = state
+        BREAKER_STATE.set(_STATE_VALUES[state], breaker=self.name)
+
+    def allow(self):
+        """Whether a call may go upstream now; callers must then record its outcome"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+        BREAKER_REJECTED.inc(breaker=self.name)
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            if self._state != CLOSED:
+                logger.info(f"Circuit breaker {self.name} closed")
+                self._set_state(CLOSED)
+
+    def record_cancelled(self):
+        """An allowed call stopped without an outcome, e.g. at the request deadline"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self._state != OPEN:
+                    logger.warning(f"Circuit breaker {self.name} opened after {self._failures} failures, "
+                                   f"retrying in {self.reset_timeout}s")
+                    self._set_state(OPEN)
@@ -0,0 +1,110 @@
+"""
+End-to-end request deadlines.
+
+Every prediction request gets a deadline: the endpoint's default from
+settings.PREDICT_DEADLINES, shortened by an ``X-Request-Timeout`` header
+(seconds) when the client gives up sooner. The deadline is stored in a
+context variable, so it follows the request into the bulkhead executors,
+and long-running code calls ``check_deadline()`` at safe points: CSV row
+loops, translation sentence loops, before remote Google Translate calls and
+around MediaPipe runs. Expired work is abandoned there and the pipeline
+answers 504.
+
+DeadlineExceeded derives from BaseException, like asyncio.CancelledError,
+so the views' broad ``except Exception`` handlers do not turn a
+cancellation into an error response of their own.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEADLINE_HEADER = 'HTTP_X_REQUEST_TIMEOUT'
+DEFAULT_TIMEOUT = 30.0
+
+_current = contextvars.ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(BaseException):
+    """Raised at a checkpoint once the request deadline has passed"""
+
+    def __init__(self, stage, saved=None):
+        self.stage = stage
+        # Estimated seconds of work skipped, when the checkpoint knows its progress
+        self.saved = saved
+        super().__init__(f"Deadline exceeded during {stage}")
+
+
+class Deadline:
+    """A point in time (monotonic clock) by which a request must finish"""
+
+    def __init__(self, timeout):
+        self.started = time.monotonic()
+        self.timeout = timeout
+        self.expires_at = self.started + timeout
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage, done=None, total=None):
+        """
+        Raise DeadlineExceeded if the deadline has passed. Loops pass their
+        progress so the time saved by stopping early can be estimated.
+        """
+        now = time.monotonic()
+        if now < self.expires_at:
+            return
+        saved = None
+        if done and total:
+            saved = (now - self.started) * (total - done) / done
+        raise DeadlineExceeded(stage, saved)
+
+
+def current_deadline():
+    """Deadline of the request being served, or None outside the pipeline"""
+    return _current.get()
+
+
+def check_deadline(stage, done=None, total=None):
+    """Checkpoint for long-running work; a no-op without a request deadline"""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage, done, total)
+
+
+def remaining_time(default=None):
+    """Seconds left for the current request, e.g. for remote call timeouts"""
+    deadline = _current.get()
+    return default if deadline is None else deadline.remaining()
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """Make deadline the current request deadline within the block"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def endpoint_timeout(name):
+    """Default timeout in seconds for the named endpoint"""
+    configured = getattr(settings, 'PREDICT_DEADLINES', {})
+    return configured.get(name, configured.get('default', DEFAULT_TIMEOUT))
+
+
+def request_deadline(name, meta):
+    """Deadline for a request from its WSGI environ or META"""
+    timeout = endpoint_timeout(name)
+    try:
+        requested = float(meta.get(DEADLINE_HEADER, ''))
+    except ValueError:
+        requested = None
+    if requested is not None and 0 < requested < timeout:
+        timeout = requested
+    return Deadline(timeout)
@@ -0,0 +1,171 @@
+"""
+Lean WSGI dispatch for JSON prediction requests.
+
+Small tabular models answer in well under a millisecond, so for them the
+DRF request wrapper, content negotiation, parser selection and the full
+middleware stack (sessions, auth, messages, CSRF) dominate request time.
+FastPathApplication sits in front of the Django WSGI handler and serves
+JSON POSTs to opted-in prediction views directly, reusing the view's
+``predict_payload`` and DRF's JSON renderer so responses are identical.
+Requests still run through the endpoint's PredictionPipeline. Everything
+else is handed to Django unchanged.
+"""
+import io
+import json
+import logging
+import threading
+from http import HTTPStatus
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.http.request import MediaType
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from .pipeline import ServedResponse, fingerprint, get_pipeline
+
+logger = logging.getLogger(__name__)
+
+JSON_CONTENT_TYPE = 'application/json'
+
+
+def _range_specificity(media_type):
+    """0 for */*, 1 for type/*, 2 for a full media type"""
+    return (media_type.main_type != '*') + (media_type.sub_type != '*')
+
+
+def prefers_json(accept):
+    """
+    True when an Accept header prefers JSON, so DRF would render JSON too.
+    JSON's quality is that of the most specific range covering it. Another
+    range wins with a higher quality, or with the same quality and a more
+    specific type, as application/x-npy does over */*
+    """
+    accepted = [MediaType(token) for token in accept.split(',') if token.strip()]
+    json_ranges = [media_type for media_type in accepted if media_type.match(JSON_CONTENT_TYPE)]
+    if not json_ranges:
+        return False
+    json_range = max(json_ranges, key=_range_specificity)
+    if json_range.quality == 0:
+        return False
+    return not any(
+        (media_type.quality, _range_specificity(media_type)) > (json_range.quality, _range_specificity(json_range))
+        for media_type in accepted
+        if not media_type.match(JSON_CONTENT_TYPE)
+    )
+
+
+class FastPathApplication:
+    """WSGI wrapper that short-circuits JSON POSTs to fast-path prediction views"""
+
+    def __init__(self, app):
+        self.app = app
+        self.renderer = JSONRenderer()
+        self._routes = None
+        self._routes_lock = threading.Lock()
+
+    @property
+    def routes(self):
+        """Map request paths to pipelines, built on first use"""
+        if self._routes is None:
+            with self._routes_lock:
+                if self._routes is None:
+                    self._routes = self._build_routes()
+        return self._routes
+
+    def _build_routes(self):
+        """Collect prediction views that opted into the fast path"""
+        from api import predict_urls
+        from api.views.base_view import BaseModelView
+
+        routes = {}
+        for pattern in predict_urls.urlpatterns:
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is None or not issubclass(view_class, BaseModelView):
+                continue
+            if not getattr(view_class, 'fast_path', False) or not pattern.name:
+                continue
+            routes[reverse(pattern.name)] = get_pipeline(pattern.name, view_class)
+        logger.info(f"Fast path enabled for {len(routes)} prediction endpoints")
+        return routes
+
+    def __call__(self, environ, start_response):
+        pipeline = self._match(environ)
+        if pipeline is None:
+            return self.app(environ, start_response)
+
+        body = self._read_body(environ)
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            data = None
+
+        if not isinstance(data, dict):
+            # Let DRF produce its usual parse error response
+            environ['wsgi.input'] = io.BytesIO(body)
+            environ['CONTENT_LENGTH'] = str(len(body))
+            return self.app(environ, start_response)
+
+        key = pipeline.request_key(fingerprint(
+            (environ.get('PATH_INFO', ''), environ.get('CONTENT_TYPE', ''), environ.get('HTTP_ACCEPT', '')),
+            [body],
+        ))
+        served = pipeline.execute(
+            key, lambda: self._predict(pipeline.view_class, data),
+            pipeline.priority(environ), pipeline.deadline(environ)
+        )
+
+        headers = served.headers + [('Content-Length', str(len(served.content)))]
+        if environ.get('HTTP_ORIGIN') and getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False):
+            headers.append(('Access-Control-Allow-Origin', '*'))
+
+        start_response(f'{served.status_code} {HTTPStatus(served.status_code).phrase}', headers)
+        return [served.content]
+
+    def _predict(self, view_class, data):
+        """Run the view's prediction and render it as JSON"""
+        try:
+            payload, status_code = view_class().predict_payload(data)
+        except Exception as e:
+            logger.exception(f"Fast path prediction failed: {e}")
+            payload, status_code = {"error": "Internal server error"}, 500
+
+        headers = [
+            ('Content-Type', JSON_CONTENT_TYPE),
+            ('X-Content-Type-Options', 'nosniff'),
+        ]
+        return ServedResponse(status_code, self.renderer.render(payload), headers)
+
+    def _match(self, environ):
+        """Return the pipeline for this request if the fast path can serve it"""
+        if environ.get('REQUEST_METHOD') != 'POST':
+            return None
+        content_type = environ.get('CONTENT_TYPE', '')
+        if not content_type.startswith(JSON_CONTENT_TYPE):
+            return None
+        accept = environ.get('HTTP_ACCEPT')
+        if accept and not prefers_json(accept):
+            return None
+        # ?format= picks the renderer in DRF
+        if 'format' in parse_qs(environ.get('QUERY_STRING', '')):
+            return None
+        pipeline = self.routes.get(environ.get('PATH_INFO', ''))
+        if pipeline is None:
+            return None
+
+        # Oversized bodies go through Django so its upload limits still apply
+        try:
+            content_length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return None
+        max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if max_size is not None and content_length > max_size:
+            return None
+        return pipeline
+
+    def _read_body(self, environ):
+        """Read the request body according to CONTENT_LENGTH"""
+        content_length = int(environ.get('CONTENT_LENGTH') or 0)
+        if content_length <= 0:
+            return b''
+        return environ['wsgi.input'].read(content_length)
@@ -0,0 +1,104 @@
+"""
+In-process metrics for the serving layer.
+
+Counters and gauges are kept per worker process and exposed through
+/api/metrics/ as JSON or in the Prometheus text format. With several
+gunicorn workers each scrape sees the worker that answered it, which is
+what a per-pod autoscaler needs.
+"""
+import threading
+
+
+class Metric:
+    """A named metric with labelled samples"""
+    type = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted(labels.items()))
+
+    def value(self, **labels):
+        """Current value for the given labels"""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        """All (labels, value) pairs"""
+        with self._lock:
+            items = list(self._values.items())
+        return [(dict(key), value) for key, value in items]
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class MetricsRegistry:
+    """Collection of metrics, created on first use by name"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, help_text=""):
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name, help_text=""):
+        return self._get_or_create(Gauge, name, help_text)
+
+    def snapshot(self):
+        """Serializable view of every metric"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {
+            "metrics": [
+                {
+                    "name": metric.name,
+                    "type": metric.type,
+                    "help": metric.help,
+                    "samples": [{"labels": labels, "value": value} for labels, value in metric.samples()],
+                }
+                for metric in metrics
+            ]
+        }
+
+
+# Process-wide registry used by the serving layer
+registry = MetricsRegistry()
@@ -0,0 +1,328 @@
+"""
+Request pipeline shared by every prediction endpoint.
+
+Each URL in api.predict_urls is registered with ``prediction_path``, which
+wraps the view so POSTs run through the endpoint's PredictionPipeline. The
+fast path (api.serving.fast_path) uses the same pipelines, so both entry
+points share admission control, coalescing and metrics.
+
+Admission: see api.serving.admission. Only the request that actually
+computes a result takes an execution slot; coalesced requests wait on it.
+The work then runs in the bulkhead of the view's model family
+(api.serving.bulkheads), so slow families cannot starve fast ones. Both
+queues serve interactive requests before batch and background work
+(api.serving.priority).
+
+Deadlines: each request runs under a deadline (api.serving.deadlines).
+Work that outlives it is cancelled at the next checkpoint and answered
+with 504.
+
+Coalescing: identical requests that arrive while one is already being
+computed wait for it and receive a copy of its rendered response. Requests
+are identical when the endpoint, the model version (the model file's
+mtime) and a digest of the request body, content type and Accept header
+all match. Views that stream their response (``serving_streams``) are
+never coalesced, since a stream can only be read once.
+
+Streaming: the body of a streaming response is produced after the view
+returns, as the server iterates it. Streaming views therefore run on the
+request thread and keep both their endpoint slot and their family's
+bulkhead slot until the server closes the response, so the streams in
+progress count against the limits for as long as they do work.
+"""
+import hashlib
+import json
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse, RawPostDataException
+from django.urls import path
+
+from .admission import AdmissionController, Overloaded
+from .bulkheads import DEFAULT_FAMILY, get_bulkhead
+from .deadlines import Deadline, DeadlineExceeded, deadline_scope, endpoint_timeout, request_deadline
+from .metrics import registry
+from .priority import INTERACTIVE, request_priority
+from .single_flight import SingleFlight, WaitTimeout
+
+REQUESTS = registry.counter(
+    'prediction_requests_total', "Prediction requests received, by model and priority")
+COALESCED = registry.counter(
+    'prediction_coalesced_total', "Prediction requests answered with another request's in-flight result")
+DEADLINE_EXCEEDED = registry.counter(
+    'prediction_deadline_exceeded_total', "Requests cancelled at their deadline, by model and stage")
+TIME_SAVED = registry.counter(
+    'prediction_deadline_time_saved_seconds_total', "Estimated seconds of work skipped by cancelling expired requests, by model")
+
+# Stages at which a cancelled request had not started any work yet
+NOT_STARTED_STAGES = ('queue', 'coalesced')
+
+
+def fingerprint(parts, body_chunks):
+    """Digest of the request attributes and body that determine a response"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode('utf-8', 'surrogateescape'))
+        digest.update(b'\0')
+    for chunk in body_chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def request_fingerprint(request):
+    """Fingerprint a Django request, or None if it should not be coalesced"""
+    parts = (
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        request.META.get('CONTENT_TYPE', ''),
+        request.META.get('HTTP_ACCEPT', ''),
+    )
+    if request.content_type == 'multipart/form-data':
+        return fingerprint(parts, _multipart_chunks(request))
+
+    # Large bodies are streamed straight into the parsers, keep it that way
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return None
+    max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+    if max_size is not None and content_length > max_size:
+        return None
+    try:
+        return fingerprint(parts, [request.body])
+    except RawPostDataException:
+        return None
+
+
+def _multipart_chunks(request):
+    """Form fields and uploaded file contents, in a stable order"""
+    for key, values in sorted(request.POST.lists()):
+        for value in values:
+            yield f"{key}={value}\0".encode('utf-8', 'surrogateescape')
+    for key, files in sorted(request.FILES.lists()):
+        for uploaded in files:
+            yield f"{key}:{uploaded.name}:{uploaded.size}\0".encode('utf-8', 'surrogateescape')
+            yield from uploaded.chunks()
+            uploaded.seek(0)
+
+
+class ServedResponse:
+    """A fully rendered response that can be handed to several requests"""
+
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @classmethod
+    def from_response(cls, response):
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return cls(response.status_code, response.content, list(response.items()))
+
+    def to_response(self):
+        response = HttpResponse(self.content, status=self.status_code)
+        for header, value in self.headers:
+            response[header] = value
+        return response
+
+
+def overloaded_response(error):
+    """JSON response for a request shed by admission control"""
+    messages = {
+        'queue_full': "This model is at capacity, please retry later.",
+        'queue_timeout': "Timed out waiting for this model, please retry later.",
+    }
+    content = json.dumps({"error": messages[error.reason], "retry_after": error.retry_after}).encode()
+    return ServedResponse(error.status_code, content, [
+        ('Content-Type', 'application/json'),
+        ('Retry-After', str(error.retry_after)),
+    ])
+
+
+def deadline_response(error, deadline):
+    """JSON response for a request cancelled at its deadline"""
+    content = json.dumps({
+        "error": "The request deadline was exceeded.",
+        "stage": error.stage,
+        "timeout": deadline.timeout,
+    }).encode()
+    return ServedResponse(504, content, [('Content-Type', 'application/json')])
+
+
+class HeldStream:
+    """Streaming content that holds execution slots until the response is closed"""
+
+    def __init__(self, content, release):
+        self._content = iter(content)
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._content)
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+class PredictionPipeline:
+    """Per-endpoint request path: metrics, admission and coalescing around the view"""
+
+    def __init__(self, name, view_class=None):
+        self.name = name
+        self.view_class = view_class
+        self.flights = SingleFlight()
+        self.admission = AdmissionController.from_settings(name)
+        self.family = getattr(view_class, 'serving_family', DEFAULT_FAMILY)
+        self.streams = getattr(view_class, 'serving_streams', False)
+        self.bulkhead = get_bulkhead(self.family)
+
+    def model_version(self):
+        """Current model version, for views that expose one"""
+        serving_version = getattr(self.view_class, 'serving_version', None)
+        return serving_version() if serving_version is not None else None
+
+    def request_key(self, digest):
+        """Coalescing key for a request fingerprint"""
+        if digest is None or not settings.PREDICT_COALESCING:
+            return None
+        return (self.name, self.model_version(), digest)
+
+    def priority(self, meta):
+        """Priority class for a request, from its WSGI environ or META"""
+        return request_priority(self.name, self.family, meta)
+
+    def deadline(self, meta):
+        """Deadline for a request, from its WSGI environ or META"""
+        return request_deadline(self.name, meta)
+
+    def execute(self, key, compute, priority=INTERACTIVE, deadline=None):
+        """
+        Run compute() for a request. With a key, concurrent requests sharing
+        it are coalesced and compute must return a ServedResponse. Shed and
+        expired requests get an error ServedResponse.
+        """
+        REQUESTS.inc(model=self.name, priority=priority)
+        if deadline is None:
+            deadline = Deadline(endpoint_timeout(self.name))
+        with deadline_scope(deadline):
+            try:
+                if key is None:
+                    if self.streams:
+                        return self._admitted_stream(compute, priority)
+                    return self._admitted(compute, priority)
+                served, shared = self._coalesced(key, compute, priority, deadline)
+            except Overloaded as e:
+                return overloaded_response(e)
+            except DeadlineExceeded as e:
+                self._record_deadline(e, deadline)
+                return deadline_response(e, deadline)
+        if shared:
+            COALESCED.inc(model=self.name)
+        return served
+
+    def _coalesced(self, key, compute, priority, deadline):
+        led = []
+
+        def lead():
+            led.append(True)
+            return self._admitted(compute, priority)
+
+        try:
+            return self.flights.do(key, lead, timeout=deadline.remaining())
+        except WaitTimeout:
+            raise DeadlineExceeded('coalesced')
+        except DeadlineExceeded:
+            if led or deadline.expired():
+                raise
+            # The request we waited on ran out of time, but this one has not
+            return self._admitted(compute, priority), False
+
+    def _record_deadline(self, error, deadline):
+        """Count a cancelled request and the work it did not do"""
+        saved = error.saved
+        if saved is None:
+            saved = self.admission.service_time
+            if error.stage not in NOT_STARTED_STAGES:
+                saved = max(0.0, saved - (time.monotonic() - deadline.started))
+        DEADLINE_EXCEEDED.inc(model=self.name, stage=error.stage)
+        TIME_SAVED.inc(saved, model=self.name)
+
+    def _admitted(self, compute, priority):
+        with self.admission.admit(priority):
+            return self.bulkhead.run(compute, priority)
+
+    def _admitted_stream(self, compute, priority):
+        """Run a streaming view, holding its slots until its response is closed"""
+        self.admission.acquire(priority)
+        try:
+            self.bulkhead.admission.acquire(priority)
+        except BaseException:
+            self.admission.release(priority)
+            raise
+        started = time.monotonic()
+
+        def release():
+            service_time = time.monotonic() - started
+            self.bulkhead.admission.release(priority, service_time)
+            self.admission.release(priority, service_time)
+
+        try:
+            response = compute()
+        except BaseException:
+            release()
+            raise
+        if not getattr(response, 'streaming', False):
+            release()
+            return response
+        # Django closes the stream when the server closes the response
+        response.streaming_content = HeldStream(response.streaming_content, release)
+        return response
+
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_pipeline(name, view_class=None):
+    """Return the pipeline for an endpoint, creating it on first use"""
+    with _pipelines_lock:
+        pipeline = _pipelines.get(name)
+        if pipeline is None:
+            pipeline = _pipelines[name] = PredictionPipeline(name, view_class)
+        return pipeline
+
+
+def serve(view_func, name):
+    """Wrap a view function so its POSTs run through the named pipeline"""
+    pipeline = get_pipeline(name, getattr(view_func, 'view_class', None))
+
+    @wraps(view_func)
+    def view(request, *args, **kwargs):
+        if request.method != 'POST':
+            return view_func(request, *args, **kwargs)
+
+        key = None if pipeline.streams else pipeline.request_key(request_fingerprint(request))
+        priority = pipeline.priority(request.META)
+        deadline = pipeline.deadline(request.META)
+        if key is None:
+            result = pipeline.execute(None, lambda: view_func(request, *args, **kwargs), priority, deadline)
+        else:
+            result = pipeline.execute(
+                key, lambda: ServedResponse.from_response(view_func(request, *args, **kwargs)),
+                priority, deadline
+            )
+        return result.to_response() if isinstance(result, ServedResponse) else result
+
+    return view
+
+
+def prediction_path(route, view_class, name):
+    """URL pattern for a prediction view served through its pipeline"""
+    return path(route, serve(view_class.as_view(), name), name=name)
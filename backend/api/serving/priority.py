@@ -0,0 +1,61 @@
+"""
+Priority classes for prediction requests.
+
+Every request is tagged as interactive (the dashboard's single
+predictions), batch (bulk CSV or row uploads) or background (offline jobs):
+
+- by route, through settings.PREDICT_PRIORITY['routes']
+- by payload size, for model families listed in 'batch_min_bytes'
+- by the X-Priority request header
+
+The header can only lower a request's class, so bulk clients cannot jump
+the queue. Admission control (api.serving.admission) serves waiting
+interactive work first and caps the share of slots lower classes may hold.
+"""
+from django.conf import settings
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+BACKGROUND = 'background'
+
+# Highest priority first
+PRIORITY_CLASSES = (INTERACTIVE, BATCH, BACKGROUND)
+
+PRIORITY_HEADER = 'HTTP_X_PRIORITY'
+
+DEFAULT_SHARES = {BATCH: 0.5, BACKGROUND: 0.25}
+
+
+def lowest(*priorities):
+    """The lowest of the given priority classes"""
+    return max(priorities, key=PRIORITY_CLASSES.index)
+
+
+def class_shares():
+    """Share of slots and queue each lower class may always use"""
+    shares = dict(DEFAULT_SHARES)
+    shares.update(getattr(settings, 'PREDICT_PRIORITY', {}).get('shares', {}))
+    return shares
+
+
+def request_priority(name, family, meta):
+    """
+    Priority class of a request to the named endpoint. meta is a WSGI
+    environ or request.META, so the fast path and Django views agree.
+    """
+    config = getattr(settings, 'PREDICT_PRIORITY', {})
+    priority = config.get('routes', {}).get(name, INTERACTIVE)
+
+    threshold = config.get('batch_min_bytes', {}).get(family)
+    if threshold is not None:
+        try:
+            content_length = int(meta.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > threshold:
+            priority = lowest(priority, BATCH)
+
+    requested = meta.get(PRIORITY_HEADER, '').strip().lower()
+    if requested in PRIORITY_CLASSES:
+        priority = lowest(priority, requested)
+    return priority
@@ -0,0 +1,65 @@
+"""
+Single-flight execution: concurrent calls with the same key share one
+computation. The first caller (the leader) runs the function, later
+callers block until it finishes and receive the same result or error.
+"""
+import threading
+
+
+class WaitTimeout(Exception):
+    """Raised when a coalesced caller stops waiting for the leader"""
+
+
+class _Call:
+    """An in-progress computation and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls by key"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout=None):
+        """
+        Run fn once per key among concurrent callers.
+        Returns (result, shared) where shared is True for coalesced callers.
+        Coalesced callers wait at most timeout seconds, then raise WaitTimeout.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise WaitTimeout(key)
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        """Number of keys currently being computed"""
+        with self._lock:
+            return len(self._calls)
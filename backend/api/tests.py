@@ -1,3 +1,427 @@
-from django.test import TestCase
+import io
+import os
+import sys
+import tempfile
+import time
+import warnings
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+
+from api.parsers import decode_npy
+from api.schemas import Feature, FeatureSchema, SchemaValidationError
+from api.serving.circuit_breaker import CLOSED, HALF_OPEN, OPEN
+from api.serving.fast_path import prefers_json
+from api.translation_data.compact_lexicon import CompactLexiconStore
+from api.translation_data.dictionary_store import DictionaryStore
+from api.translation_data.dictionary_utils import (
+    build_direct_translations, copy_dictionaries, generate_complete_dictionaries
+)
+from api.translation_data.documents import DocumentTranslator
+from api.translation_data.language_data import LANGUAGE_DICTIONARIES
+from api.translation_data.lexicon_artifact import LexiconArtifact, write_lexicon_artifact
+from api.translation_data.lexicon_store import SQLiteLexiconStore
+from api.translation_data.segmentation import PhraseTrie, tokenize
+from api.translation_data.google_translate import GoogleTranslator
+from api.translation_data.translate_client import TranslateClient, TranslateError, TranslateUnavailable
+
+# The stand-in Google Translate server lives with the benchmarks
+sys.path.insert(0, str(settings.BASE_DIR / 'benchmarks'))
+from translate_stand_in import start_stand_in  # noqa: E402
+
+
+class TranslateClientTests(SimpleTestCase):
+    """TranslateClient against the local stand-in for the Google Translate endpoint"""
+
+    def setUp(self):
+        self.server = start_stand_in()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def translate_client(self, **options):
+        options = {'timeout': 1.0, 'retries': 2, 'backoff': 0.001, 'failure_threshold': 3,
+                   'reset_timeout': 0.2, **options}
+        return TranslateClient(self.server.url, **options)
+
+    def test_translates(self):
+        self.assertEqual(self.translate_client().translate("hello", 'en', 'es'), "[es] hello")
+        self.assertEqual(self.server.requests, 1)
+
+    def test_times_out(self):
+        self.server.latency = 0.5
+        client = self.translate_client(timeout=0.1, retries=0)
+        start = time.monotonic()
+        with self.assertRaises(TranslateError):
+            client.translate("hello", 'en', 'es')
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_retries_503(self):
+        self.server.failures = 2
+        self.assertEqual(self.translate_client().translate("hello", 'en', 'es'), "[es] hello")
+        self.assertEqual(self.server.requests, 3)
+
+    def test_gives_up_after_the_retries(self):
+        self.server.failure_rate = 1.0
+        with self.assertRaises(TranslateError):
+            self.translate_client(retries=2).translate("hello", 'en', 'es')
+        self.assertEqual(self.server.requests, 3)
+
+    def test_does_not_retry_other_client_errors(self):
+        self.server.failures = 1
+        self.server.failure_status = 400
+        with self.assertRaises(TranslateError):
+            self.translate_client().translate("hello", 'en', 'es')
+        self.assertEqual(self.server.requests, 1)
+
+    def test_breaker_opens_half_opens_and_closes(self):
+        self.server.failure_rate = 1.0
+        client = self.translate_client(retries=0)
+        for _ in range(3):
+            with self.assertRaises(TranslateError):
+                client.translate("hello", 'en', 'es')
+        self.assertEqual(client.breaker.state, OPEN)
+
+        # While open, calls fail at once without reaching the upstream
+        with self.assertRaises(TranslateUnavailable):
+            client.translate("hello", 'en', 'es')
+        self.assertEqual(self.server.requests, 3)
+
+        # After reset_timeout one trial call goes through; failing it re-opens the breaker
+        time.sleep(0.25)
+        with self.assertRaises(TranslateError):
+            client.translate("hello", 'en', 'es')
+        self.assertEqual(self.server.requests, 4)
+        self.assertEqual(client.breaker.state, OPEN)
+
+        # A successful trial closes it
+        time.sleep(0.25)
+        self.server.failure_rate = 0.0
+        self.assertEqual(client.translate("hello", 'en', 'es'), "[es] hello")
+        self.assertEqual(client.breaker.state, CLOSED)
+
+    def test_half_open_breaker_allows_a_single_trial(self):
+        client = self.translate_client(retries=0, failure_threshold=1)
+        self.server.failures = 1
+        with self.assertRaises(TranslateError):
+            client.translate("hello", 'en', 'es')
+        time.sleep(0.25)
+        self.assertTrue(client.breaker.allow())
+        self.assertEqual(client.breaker.state, HALF_OPEN)
+        self.assertFalse(client.breaker.allow())
+        client.breaker.record_success()
+        self.assertEqual(client.breaker.state, CLOSED)
+
+    def test_batches_segments_in_one_call(self):
+        texts = ["one", "two\nlines", "three"]
+        self.assertEqual(self.translate_client().translate_batch(texts, 'en', 'es'),
+                         ["[es] one", "[es] two\n[es] lines", "[es] three"])
+        self.assertEqual(self.server.requests, 1)
+
+    def test_batch_splits_back_when_the_line_count_differs(self):
+        self.server.merge_lines = True
+        texts = ["one", "two", "three"]
+        self.assertEqual(self.translate_client().translate_batch(texts, 'en', 'es'),
+                         ["[es] one", "[es] two", "[es] three"])
+        # The merged batch, then each segment on its own
+        self.assertEqual(self.server.requests, 1 + len(texts))
+
+    def test_batch_is_cut_at_max_batch_chars(self):
+        texts = ["a" * 10] * 4
+        self.translate_client(max_batch_chars=25).translate_batch(texts, 'en', 'es')
+        self.assertEqual(self.server.requests, 2)
+
+
+class GoogleTranslatorFallbackTests(SimpleTestCase):
+    """GoogleTranslator falls back to the dictionaries whenever the client fails"""
+
+    def setUp(self):
+        self.server = start_stand_in()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.translator = GoogleTranslator(TranslateClient(self.server.url, timeout=1.0, retries=0,
+                                                           failure_threshold=1, reset_timeout=60.0))
+
+    @staticmethod
+    def fallback(text, source_language, target_language):
+        return f"dictionary: {text}"
+
+    def test_batch_falls_back_per_text(self):
+        self.server.failure_rate = 1.0
+        translations = self.translator.translate_batch(["one", " ", "two"], "English", "Spanish", self.fallback)
+        self.assertEqual(translations, ["dictionary: one", " ", "dictionary: two"])
+
+    def test_open_breaker_falls_back_without_calling_the_upstream(self):
+        self.server.failure_rate = 1.0
+        self.translator.translate_text("one", "English", "Spanish", self.fallback)
+        requests = self.server.requests
+        self.assertEqual(self.translator.translate_batch(["two"], "English", "Spanish", self.fallback),
+                         ["dictionary: two"])
+        self.assertEqual(self.server.requests, requests)
+
+    def test_batch_after_split_back(self):
+        self.server.merge_lines = True
+        self.assertEqual(self.translator.translate_batch(["one", "two"], "English", "Spanish", self.fallback),
+                         ["[es] one", "[es] two"])
+
+
+class SQLiteLexiconStoreTests(SimpleTestCase):
+    """The disk lexicon store over a TSV lexicon"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with open(os.path.join(directory.name, 'English-German.tsv'), 'w', encoding='utf-8') as f:
+            f.write("House\tHaus\nhome\tHaus\ncar\tAuto\ncar\tWagen\n")
+        self.directory = directory.name
+        self.store = SQLiteLexiconStore(os.path.join(directory.name, 'lexicons.sqlite3'), directory.name)
+
+    def test_looks_words_up_lowercased(self):
+        english = self.store.dictionary('English', 'German')
+        self.assertEqual(english.get('house'), 'Haus')
+        # The first translation listed for a word wins
+        self.assertEqual(english.get('car'), 'Auto')
+
+    def test_reverse_looks_up_capitalized_translations_lowercased(self):
+        german = self.store.dictionary('German', 'English')
+        # The last word listed with a translation wins, as in invert_dictionary
+        self.assertEqual(german.get('haus'), 'home')
+        self.assertEqual(german.get('auto'), 'car')
+        self.assertIsNone(german.get('wagen'))
+        self.assertEqual(sorted(german), ['auto', 'haus'])
+
+    def test_version_changes_with_the_lexicons(self):
+        with open(os.path.join(self.directory, 'English-German.tsv'), 'a', encoding='utf-8') as f:
+            f.write("tree\tBaum\n")
+        store = SQLiteLexiconStore(os.path.join(self.directory, 'lexicons.sqlite3'), self.directory)
+        self.assertNotEqual(store.version(), self.store.version())
+        self.assertEqual(store.dictionary('German', 'English').get('baum'), 'tree')
+
+
+class DocumentTranslatorTests(SimpleTestCase):
+    """Google Translate segments of a document keep one translation per line"""
+
+    def setUp(self):
+        self.calls = []
+
+    def merging_remote(self, texts, source_language, target_language):
+        # Like an upstream that joins the lines of a multi-line text
+        self.calls.append(texts)
+        return [f"[{target_language}] " + text.replace('\n', ' ') for text in texts]
+
+    @staticmethod
+    def local(text, source_language, target_language):
+        return f"dictionary: {text}"
+
+    def test_translates_the_lines_one_by_one_when_the_line_count_differs(self):
+        translator = DocumentTranslator(self.merging_remote, self.local, use_remote=True)
+        translations, method = translator._remote_segment(["one", "two", "three"], 'English', 'Spanish')
+        self.assertEqual(translations, ["[Spanish] one", "[Spanish] two", "[Spanish] three"])
+        self.assertEqual(method, 'google_translate')
+        self.assertEqual(self.calls, [["one\ntwo\nthree"], ["one", "two", "three"]])
+
+
+# Sentences with multi-word phrases, punctuation and CJK runs, per language pair
+SEGMENTATION_SENTENCES = {
+    ('English', 'Spanish'): [
+        "Thank you very much, e.g. good morning and see you later.",
+        "thank you, thank you very much... Good Morning!",
+        "Hello, my name is Claude. Welcome to our machine learning demo.",
+    ],
+    ('Spanish', 'English'): ["Muchas gracias, buenos días y hasta luego."],
+    ('Chinese', 'English'): [
+        "你好世界，谢谢你！中华人民共和国人工智能abc你好",
+        "你好，我的名字是克劳德。欢迎来到我们的机器学习演示。",
+    ],
+    ('English', 'Chinese'): ["hello world, thank you very much"],
+    ('Japanese', 'English'): ["こんにちは、私の名前はクロードです。"],
+}
+
+
+def segments(segmenter, pairs=SEGMENTATION_SENTENCES):
+    return {
+        pair: [segmenter(*pair).segment(tokenize(sentence)) for sentence in sentences]
+        for pair, sentences in pairs.items()
+    }
+
+
+class LexiconSegmenterTests(SimpleTestCase):
+    """Disk lexicons segment sentences the same way as a PhraseTrie over the same entries"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        lexicons = {
+            'English-Spanish.tsv': "thank you very much\tmuchas gracias\nthank you\tgracias\ne.g.\tp. ej.\n"
+                                   "good morning\tBuenos Días\nsee you\tnos vemos\nsee you later\thasta luego\n",
+            'Chinese-English.tsv': "你好\thi there\n世界\tworld\n你好世界\thello world\n谢谢你\tthank you\n"
+                                   "人工智能\tAI\n中华人民共和国\tPRC\n",
+        }
+        for name, entries in lexicons.items():
+            with open(os.path.join(directory.name, name), 'w', encoding='utf-8') as f:
+                f.write(entries)
+        # The disk lexicons are layered over a small bundled store with its own phrases
+        fallback = DictionaryStore({
+            'English': {'Spanish': {'thank': 'agradecer', 'very much': 'mucho', 'morning': 'mañana'}},
+            'Chinese': {'English': {'你': 'you', '好': 'good', '中华': 'China', '人工': 'manual'}},
+        })
+        self.store = SQLiteLexiconStore(
+            os.path.join(directory.name, 'lexicons.sqlite3'), directory.name, fallback=fallback
+        )
+
+    def test_segments_like_a_phrase_trie(self):
+        self.assertEqual(
+            segments(self.store.phrase_trie),
+            segments(lambda source, target: PhraseTrie(self.store.dictionary(source, target))),
+        )
+
+    def test_longest_entries_of_either_layer_win(self):
+        english = self.store.phrase_trie('English', 'Spanish')
+        self.assertEqual(english.segment(tokenize("Thank you very much, see you later")), [
+            ("Thank you very much", "muchas gracias", True),
+            (",", None, False),
+            ("see you later", "hasta luego", True),
+        ])
+        chinese = self.store.phrase_trie('Chinese', 'English')
+        self.assertEqual(chinese.segment(tokenize("中华人民共和国人工智能你")), [
+            ("中华人民共和国", "PRC", True),
+            ("人工智能", "AI", True),
+            ("你", "you", True),
+        ])
+
+
+class BundledStoreTests(SimpleTestCase):
+    """The compact and artifact layouts serve the same dictionaries as plain dicts"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        dictionaries = copy_dictionaries(LANGUAGE_DICTIONARIES)
+        generate_complete_dictionaries(dictionaries)
+        build_direct_translations(dictionaries)
+        cls.reference = DictionaryStore(dictionaries)
+        cls.compact = CompactLexiconStore(dictionaries)
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'lexicon.bin')
+        write_lexicon_artifact(dictionaries, path)
+        cls.artifact = LexiconArtifact(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def test_same_dictionaries(self):
+        for store in (self.compact, self.artifact):
+            self.assertEqual(sorted(store.language_pairs()), sorted(self.reference.language_pairs()))
+            for source, target in SEGMENTATION_SENTENCES:
+                self.assertEqual(dict(store.dictionary(source, target)),
+                                 dict(self.reference.dictionary(source, target)))
+
+    def test_same_segments(self):
+        expected = segments(self.reference.phrase_trie)
+        self.assertEqual(segments(self.compact.phrase_trie), expected)
+        self.assertEqual(segments(self.artifact.phrase_trie), expected)
+
+
+class FeatureSchemaTests(SimpleTestCase):
+    """Malformed prediction inputs raise SchemaValidationError naming the field"""
+
+    schema = FeatureSchema(
+        Feature("age", int, min_value=0, max_value=120, default=None),
+        Feature("income", min_value=0),
+        Feature("score"),
+    )
+
+    def assertInvalid(self, field, validate, *args):
+        with self.assertRaises(SchemaValidationError) as raised:
+            validate(*args)
+        self.assertIn(field, [error['field'] for error in raised.exception.errors])
+        return raised.exception.errors
+
+    def test_valid_inputs(self):
+        expected = [[30.0, 1000.0, 0.0]]
+        self.assertEqual(self.schema.validate({"age": 30, "income": "1000"}).tolist(), expected)
+        self.assertEqual(self.schema.validate_rows([[30, 1000, 0, 99]]).tolist(), expected)
+        self.assertEqual(self.schema.validate_rows([[0, 1000, 30]], headers=["score", "income", "age"]).tolist(),
+                         expected)
+        self.assertEqual(self.schema.validate_columns({"age": [30], "income": [1000]}).tolist(), expected)
+
+    def test_wrong_feature_counts(self):
+        self.assertInvalid("rows", self.schema.validate_rows, [[30, 1000]])
+        self.assertInvalid("rows", self.schema.validate_rows, [])
+        self.assertInvalid("rows", self.schema.validate_rows, [[30, 1000, 0], [30, 1000]])
+        self.assertInvalid("features", self.schema.validate_matrix, np.zeros((2, 4)))
+        self.assertInvalid("income", self.schema.validate_columns, {"age": [30, 40], "income": [1000]})
+
+    def test_non_numeric_cells(self):
+        self.assertInvalid("income", self.schema.validate, {"age": 30, "income": "lots"})
+        self.assertInvalid("age", self.schema.validate, {"income": 1000})
+        self.assertInvalid("rows", self.schema.validate_rows, [[30, "lots", 0]])
+        self.assertInvalid("income", self.schema.validate_columns, {"age": [30], "income": ["lots"]})
+        self.assertInvalid("age", self.schema.validate_columns, {"income": [1000]})
+
+    def test_nan_and_out_of_range_values(self):
+        errors = self.assertInvalid("score", self.schema.validate_rows, [[30, 1000, 0], [30, 1000, float("nan")]])
+        self.assertEqual(errors[0]["rows"], [1])
+        self.assertInvalid("income", self.schema.validate, {"age": 30, "income": float("inf")})
+        self.assertInvalid("age", self.schema.validate_rows, [[30.5, 1000, 0]])
+        errors = self.assertInvalid("age", self.schema.validate_columns, {"age": [30, -1, 121], "income": [1, 1, 1]})
+        self.assertEqual(errors[0]["invalid_count"], 2)
+
+
+def npy(array, version=None):
+    """An array as .npy bytes in the given format version"""
+    stream = io.BytesIO()
+    with warnings.catch_warnings():
+        # numpy warns that version 3.0 files need a recent numpy to read
+        warnings.simplefilter("ignore", UserWarning)
+        np.lib.format.write_array(stream, array, version=version, allow_pickle=True)
+    return stream.getvalue()
+
+
+class DecodeNpyTests(SimpleTestCase):
+    """Raw .npy request bodies"""
+
+    matrix = np.arange(6, dtype='<f8').reshape(2, 3)
+
+    def test_decodes_every_header_version(self):
+        for version in ((1, 0), (2, 0), (3, 0)):
+            with self.subTest(version=version):
+                self.assertEqual(decode_npy(npy(self.matrix, version)).tolist(), self.matrix.tolist())
+        fortran = np.asfortranarray(self.matrix)
+        self.assertEqual(decode_npy(npy(fortran)).tolist(), self.matrix.tolist())
+
+    def test_decodes_utf8_field_names(self):
+        array = np.zeros(2, dtype=[('größe', '<f8'), ('名前', '<f8')])
+        self.assertEqual(decode_npy(npy(array, (3, 0))).dtype.names, ('größe', '名前'))
+
+    def test_rejects_truncated_payloads(self):
+        payload = npy(self.matrix)
+        for length in (4, 20, len(payload) - 5):
+            with self.subTest(length=length), self.assertRaises(ParseError):
+                decode_npy(payload[:length])
+        with self.assertRaises(ParseError):
+            decode_npy(b"not an npy payload")
+
+    def test_rejects_object_arrays(self):
+        with self.assertRaises(ParseError):
+            decode_npy(npy(np.array([1, "a"], dtype=object)))
+
+
+class PrefersJsonTests(SimpleTestCase):
+    """The fast path only answers requests whose Accept header prefers JSON"""
+
+    def test_json_preferred(self):
+        for accept in ("application/json", "*/*", "application/*", "application/json, text/plain, */*",
+                       "application/x-npy;q=0.5, application/json", "application/json;q=0.9, */*;q=0.1"):
+            with self.subTest(accept=accept):
+                self.assertTrue(prefers_json(accept))
+
+    def test_other_types_preferred(self):
+        for accept in ("application/x-npy", "application/x-npy, */*;q=0.1", "application/x-npy, */*",
+                       "application/msgpack;q=1.0, application/json;q=0.5", "application/json;q=0, */*",
+                       "text/html, */*;q=0.8", "text/csv"):
+            with self.subTest(accept=accept):
+                self.assertFalse(prefers_json(accept))
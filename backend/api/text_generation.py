@@ -0,0 +1,161 @@
+"""
+Token-by-token text generation with the saved LSTM model.
+
+Generating with model.predict over the whole prefix re-runs every earlier
+step for each new token. LSTMStepper instead runs the model's LSTM cell
+one step at a time in numpy and carries its (h, c) state between steps, so
+each token costs one step and the first token arrives one step after the
+prompt has been read.
+
+The model maps a sequence of tokens to a softmax over the next token, so
+it also needs its vocabulary: a JSON list of tokens, one per output unit,
+saved next to the model as <model name>.vocab.json. Tokens go in one-hot
+when the LSTM takes one feature per vocabulary token, and as their index
+when it takes a single feature. Without a vocabulary, or for a model of
+another shape, get_text_generator returns None and LSTMStreamView streams
+the demo text instead.
+"""
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from api.model_loader import ModelLoader
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'lstm_text_generation'
+
+ACTIVATIONS = {
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': lambda x: 0.5 * (1.0 + np.tanh(0.5 * x)),
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0.0, 1.0),
+    'linear': lambda x: x,
+}
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+class LSTMStepper:
+    """One-step-at-a-time forward pass of an LSTM followed by Dense layers"""
+
+    def __init__(self, model):
+        layers = [layer for layer in model.layers if type(layer).__name__ != 'InputLayer']
+        if not layers or type(layers[0]).__name__ != 'LSTM' or \
+                any(type(layer).__name__ != 'Dense' for layer in layers[1:]):
+            raise ValueError("expected an LSTM layer followed by Dense layers")
+
+        config = layers[0].get_config()
+        self.kernel, self.recurrent_kernel, self.bias = (
+            weights.astype(np.float32) for weights in layers[0].get_weights()
+        )
+        self.activation = ACTIVATIONS[config.get('activation', 'tanh')]
+        self.recurrent_activation = ACTIVATIONS[config.get('recurrent_activation', 'sigmoid')]
+        self.units = self.recurrent_kernel.shape[0]
+        self.input_size = self.kernel.shape[0]
+        self.dense = []
+        for layer in layers[1:]:
+            weights, bias = layer.get_weights()
+            self.dense.append((weights.astype(np.float32), bias.astype(np.float32),
+                               layer.get_config().get('activation', 'linear')))
+        self.output_size = self.dense[-1][0].shape[1] if self.dense else self.units
+
+    def initial_state(self):
+        return np.zeros(self.units, np.float32), np.zeros(self.units, np.float32)
+
+    def step(self, x, state):
+        """(output, new state) of one time step; the gates are in Keras order i, f, c, o"""
+        h, c = state
+        z = x @ self.kernel + h @ self.recurrent_kernel + self.bias
+        i, f, candidate, o = np.split(z, 4)
+        c = self.recurrent_activation(f) * c + self.recurrent_activation(i) * self.activation(candidate)
+        h = self.recurrent_activation(o) * self.activation(c)
+        output = h
+        for weights, bias, activation in self.dense:
+            output = output @ weights + bias
+            output = softmax(output) if activation == 'softmax' else ACTIVATIONS[activation](output)
+        return output, (h, c)
+
+
+class TextGenerator:
+    """Samples tokens from an LSTMStepper over a vocabulary"""
+
+    def __init__(self, stepper, vocabulary):
+        if len(vocabulary) != stepper.output_size:
+            raise ValueError(f"the vocabulary has {len(vocabulary)} tokens for {stepper.output_size} outputs")
+        if stepper.input_size not in (1, len(vocabulary)):
+            raise ValueError(f"cannot encode tokens as {stepper.input_size} input features")
+        self.stepper = stepper
+        self.vocabulary = list(vocabulary)
+        self.index = {token: i for i, token in enumerate(self.vocabulary)}
+
+    def encode(self, token_id):
+        if self.stepper.input_size == 1:
+            return np.array([token_id], np.float32)
+        x = np.zeros(self.stepper.input_size, np.float32)
+        x[token_id] = 1.0
+        return x
+
+    def generate(self, prompt, max_tokens, temperature, rng=None):
+        """
+        Yield up to max_tokens tokens continuing prompt, one step each.
+        Prompt words outside the vocabulary are skipped
+        """
+        rng = rng or np.random.default_rng()
+        state = self.stepper.initial_state()
+        output = None
+        for word in prompt.lower().split():
+            token_id = self.index.get(word)
+            if token_id is not None:
+                output, state = self.stepper.step(self.encode(token_id), state)
+        if output is None:
+            output, state = self.stepper.step(np.zeros(self.stepper.input_size, np.float32), state)
+
+        for _ in range(max_tokens):
+            # Temperature rescales the log-probabilities before sampling
+            probabilities = softmax(np.log(np.maximum(output, 1e-9)) / temperature)
+            token_id = int(rng.choice(len(probabilities), p=probabilities))
+            yield self.vocabulary[token_id]
+            output, state = self.stepper.step(self.encode(token_id), state)
+
+
+def load_text_generator(model_name=MODEL_NAME):
+    """TextGenerator for a saved model and its vocabulary, or None if either is missing or unusable"""
+    vocabulary_path = os.path.join(settings.MODELS_DIR, f"{model_name}.vocab.json")
+    if not os.path.exists(vocabulary_path):
+        logger.info(f"No vocabulary at {vocabulary_path}, LSTM generation streams the demo text")
+        return None
+    try:
+        with open(vocabulary_path, encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        model = ModelLoader.load_tensorflow_model(model_name)
+        if model is None:
+            return None
+        return TextGenerator(LSTMStepper(model), vocabulary)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Could not load LSTM text generator {model_name}: {e}")
+        return None
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_text_generator():
+    """The process-wide TextGenerator, reloaded when the model file changes"""
+    global _generator
+    version = ModelLoader.model_version(MODEL_NAME)
+    cached = _generator
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _generator_lock:
+        if _generator is None or _generator[0] != version:
+            _generator = (version, load_text_generator())
+        return _generator[1]
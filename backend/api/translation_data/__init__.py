@@ -1,4 +1,5 @@
 # Translation Data Module
 # Contains language dictionaries and utilities for the translation feature
 from .language_data import LANGUAGE_DICTIONARIES, LANGUAGE_CHARACTERISTICS
+from .dictionary_store import get_dictionary_store
 from .google_translate import google_translator
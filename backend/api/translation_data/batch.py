@@ -0,0 +1,139 @@
+"""
+Batch translation of many texts into many target languages.
+
+Localization jobs need the same strings in several languages. Sending one
+request per text and language repeats detection and tokenization, and
+costs a Google Translate round trip each. A batch instead:
+
+- detects the source language of each distinct text once (the view
+  does this before translating)
+- groups the texts by source language, and translates each group into
+  each target language in one call: one upstream batch per group for
+  Google Translate (through the translation memory), one pass over the
+  distinct sentences for the dictionaries
+- shares the dictionary engine's tokenized sentences across the target
+  languages of a group
+
+Google Translate groups run concurrently on a shared thread pool, while
+dictionary groups run in the request thread. A group whose remote call
+fails is translated with the dictionaries instead.
+"""
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+
+from api.serving.deadlines import DeadlineExceeded, deadline_scope
+from api.serving.metrics import registry
+
+from .dictionary_utils import transform_text_for_language
+
+logger = logging.getLogger(__name__)
+
+BATCH_GROUPS = registry.counter(
+    'translation_batch_groups_total',
+    "Batch translation groups (texts sharing a source and target language), by translation_method")
+
+
+class BatchTranslator:
+    """
+    Translates texts into several target languages and returns a
+    [text][target language] matrix of (translated text, translation_method).
+
+    translate_remote(texts, source, target) is TranslationView's Google
+    path and raises on failure; translate_local(texts, source, target,
+    tokens) is its dictionary path, used as the fallback.
+    """
+
+    def __init__(self, translate_remote, translate_local, use_remote, deadline=None, executor=None):
+        self.translate_remote = translate_remote
+        self.translate_local = translate_local
+        self.use_remote = use_remote
+        self.deadline = deadline
+        self.executor = executor
+
+    def _in_scope(self, fn, *args):
+        if self.deadline is None:
+            return fn(*args)
+        with deadline_scope(self.deadline):
+            return fn(*args)
+
+    def _remote_group(self, texts, source_language, target_language, tokens):
+        try:
+            return self._in_scope(self.translate_remote, texts, source_language, target_language), 'google_translate'
+        except Exception as e:
+            logger.warning(f"Google Translate failed for a batch into {target_language}, using the dictionaries: {str(e)}")
+            translations = self._in_scope(self.translate_local, texts, source_language, target_language, tokens)
+            return translations, 'dictionary_fallback'
+
+    def translate(self, texts, source_languages, target_languages):
+        """
+        Matrix of (translated text, translation_method) per text and target
+        language. Texts whose source language is None (blank texts) are
+        returned as they are.
+        """
+        groups = {}
+        for i, source_language in enumerate(source_languages):
+            groups.setdefault(source_language, []).append(i)
+
+        results = [[None] * len(target_languages) for _ in texts]
+        pending = []
+        local = []
+        for source_language, indices in groups.items():
+            group = [texts[i] for i in indices]
+            # Tokenized sentences of the group, shared by its target languages
+            tokens = {}
+            for j, target_language in enumerate(target_languages):
+                if source_language is None or source_language == target_language:
+                    for i in indices:
+                        results[i][j] = (texts[i], 'none_needed')
+                elif self.use_remote:
+                    future = (self.executor or get_batch_executor()).submit(
+                        contextvars.copy_context().run,
+                        self._remote_group, group, source_language, target_language, tokens
+                    )
+                    pending.append((indices, j, target_language, future))
+                else:
+                    local.append((indices, j, source_language, target_language, group, tokens))
+
+        try:
+            # The dictionaries are pure Python, so they run here while the remote calls wait upstream
+            for indices, j, source_language, target_language, group, tokens in local:
+                translations = self.translate_local(group, source_language, target_language, tokens)
+                self._fill(results, indices, j, target_language, translations, 'dictionary')
+            for indices, j, target_language, future in pending:
+                timeout = None if self.deadline is None else self.deadline.remaining()
+                try:
+                    translations, method = future.result(timeout=timeout)
+                except FutureTimeout:
+                    raise DeadlineExceeded('batch_translation')
+                self._fill(results, indices, j, target_language, translations, method)
+        finally:
+            for *_, future in pending:
+                future.cancel()
+        return results
+
+    @staticmethod
+    def _fill(results, indices, column, target_language, translations, method):
+        BATCH_GROUPS.inc(translation_method=method)
+        for i, translated in zip(indices, translations):
+            results[i][column] = (transform_text_for_language(translated, target_language), method)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_batch_executor():
+    """Thread pool shared by the Google Translate groups of batches in this process"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.TRANSLATION_BATCH['remote_workers'],
+                    thread_name_prefix='translation-batch',
+                )
+    return _executor
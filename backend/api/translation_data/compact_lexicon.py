@@ -0,0 +1,123 @@
+"""
+Compact in-memory lexicon of interned word IDs.
+
+Expanding the bundled word lists for every pair (reversed and pivoted)
+gives 90 directed dictionaries, and a dict entry costs far more than the
+two words it maps. CompactLexiconStore keeps instead:
+
+- one Vocabulary per language: its words, each stored once however many
+  pairs use it, and a word -> ID index
+- per pair, integer arrays of word IDs: a dense array indexed by source
+  word ID when the pair covers most of its source vocabulary, otherwise
+  sorted (source ID, target ID) tables searched by bisection
+
+Lookups are O(1) for dense pairs and O(log n) for sparse ones.
+benchmarks/compact_lexicon.py compares its memory with the dict store.
+"""
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from .dictionary_store import DictionaryStore
+
+# ID arrays are unsigned 32-bit; a dense array marks missing words with this
+_MISSING = 0xFFFFFFFF
+_ID_TYPE = 'I'
+
+
+class Vocabulary:
+    """Interned words of one language, by ID"""
+
+    __slots__ = ('words', 'ids')
+
+    def __init__(self, words):
+        self.words = tuple(sorted(words))
+        self.ids = {word: word_id for word_id, word in enumerate(self.words)}
+
+    def __len__(self):
+        return len(self.words)
+
+
+class CompactDictionary(Mapping):
+    """Read-only word dictionary for one language pair over two vocabularies"""
+
+    __slots__ = ('_source', '_target', '_dense', '_keys', '_values', '_count')
+
+    def __init__(self, source, target, words):
+        self._source = source
+        self._target = target
+        pairs = sorted((source.ids[word], target.ids[translation]) for word, translation in words.items())
+        self._count = len(pairs)
+        # A dense array costs 4 bytes per source word, the tables 8 per entry
+        if 2 * len(pairs) >= len(source):
+            self._dense = array(_ID_TYPE, [_MISSING]) * len(source)
+            for source_id, target_id in pairs:
+                self._dense[source_id] = target_id
+            self._keys = self._values = None
+        else:
+            self._dense = None
+            self._keys = array(_ID_TYPE, [source_id for source_id, _ in pairs])
+            self._values = array(_ID_TYPE, [target_id for _, target_id in pairs])
+
+    def _target_id(self, source_id):
+        if self._dense is not None:
+            target_id = self._dense[source_id]
+            return None if target_id == _MISSING else target_id
+        position = bisect_left(self._keys, source_id)
+        if position < self._count and self._keys[position] == source_id:
+            return self._values[position]
+        return None
+
+    def get(self, word, default=None):
+        # Segmentation calls this once per word, so it avoids raising KeyError
+        source_id = self._source.ids.get(word)
+        if source_id is None:
+            return default
+        if self._dense is not None:
+            target_id = self._dense[source_id]
+            return default if target_id == _MISSING else self._target.words[target_id]
+        target_id = self._target_id(source_id)
+        return default if target_id is None else self._target.words[target_id]
+
+    def __getitem__(self, word):
+        translation = self.get(word)
+        if translation is None:
+            raise KeyError(word)
+        return translation
+
+    def __contains__(self, word):
+        source_id = self._source.ids.get(word)
+        return source_id is not None and self._target_id(source_id) is not None
+
+    def __iter__(self):
+        words = self._source.words
+        if self._dense is not None:
+            for source_id, target_id in enumerate(self._dense):
+                if target_id != _MISSING:
+                    yield words[source_id]
+        else:
+            for source_id in self._keys:
+                yield words[source_id]
+
+    def __len__(self):
+        return self._count
+
+
+class CompactLexiconStore(DictionaryStore):
+    """DictionaryStore of CompactDictionary pairs instead of Python dicts"""
+
+    def __init__(self, dictionaries):
+        words = {}
+        for source, targets in dictionaries.items():
+            for target, pair in targets.items():
+                words.setdefault(source, set()).update(pair.keys())
+                words.setdefault(target, set()).update(pair.values())
+        self.vocabularies = {language: Vocabulary(language_words) for language, language_words in words.items()}
+        self._dictionaries = {
+            source: MappingProxyType({
+                target: CompactDictionary(self.vocabularies[source], self.vocabularies[target], pair)
+                for target, pair in targets.items()
+            })
+            for source, targets in dictionaries.items()
+        }
@@ -0,0 +1,358 @@
+"""
+Dictionary translation engine.
+
+Translates text with the prebuilt dictionaries of a DictionaryStore
+(api.translation_data.dictionary_store): the pair's PhraseTrie matches the
+longest dictionary entry at each word, and words the dictionaries do not
+cover get the target language's common words or a rule-based
+transformation.
+
+TranslationView translates with it, and so do the worker processes of
+document translation (api.translation_data.documents), which therefore
+need neither the views nor TensorFlow.
+"""
+import hashlib
+import logging
+import random
+import re
+
+from api.serving.deadlines import check_deadline
+
+from .dictionary_utils import get_language_suffix
+from .language_data import LANGUAGE_CHARACTERISTICS
+from .segmentation import PHRASE_SPACE, tokenize
+from .translation_memory import DICTIONARY_ENGINE
+
+logger = logging.getLogger(__name__)
+
+
+def translate_texts(dictionaries, texts, source_language, target_language, translation_memory=None, tokens=None):
+    """
+    Translate several texts into one language with the dictionaries.
+    Each distinct sentence is translated once, and tokens, a
+    {sentence: words} dict, keeps tokenized sentences for the next
+    target language of a batch
+    """
+    # In a real-world scenario, this would call a machine translation API
+    # For this demo, we'll implement a more sophisticated rule-based translation
+
+    # Direct and pivot dictionaries for every pair are prebuilt in the shared store,
+    # and compiled into a phrase trie on first use
+    trie = dictionaries.phrase_trie(source_language, target_language)
+
+    # Get source and target language characteristics
+    source_chars = LANGUAGE_CHARACTERISTICS.get(source_language, {})
+    target_chars = LANGUAGE_CHARACTERISTICS.get(target_language, {})
+
+    # Split the texts into paragraphs and sentences
+    documents = [[split_sentences(paragraph) for paragraph in text.split('\n')] for text in texts]
+    sentences = [sentence for paragraphs in documents for paragraph in paragraphs for sentence, _ in paragraph]
+    if tokens is None:
+        tokens = {}
+
+    def translate_sentences(sentences):
+        translated = {}
+        for sentence in sentences:
+            if sentence in translated:
+                continue
+            check_deadline('translation', len(translated), len(sentences))
+            words = tokens.get(sentence)
+            if words is None:
+                words = tokens[sentence] = tokenize(sentence)
+            translated[sentence] = translate_sentence(
+                sentence,
+                trie,
+                source_language,
+                target_language,
+                source_chars,
+                target_chars,
+                words
+            )
+        return [translated[sentence] for sentence in sentences]
+
+    # Blank sentences translate to nothing
+    if translation_memory is not None:
+        translations = translation_memory.translate(
+            sentences, source_language, target_language, DICTIONARY_ENGINE, translate_sentences
+        )
+        translations = [translation if sentence.strip() else '' for sentence, translation in zip(sentences, translations)]
+    else:
+        translations = translate_sentences(sentences)
+
+    # Add punctuation (language-specific handling is done in transform_text_for_language)
+    translated = iter(translations)
+    return [
+        '\n'.join(
+            ' '.join(next(translated) + punctuation for _, punctuation in paragraph)
+            for paragraph in paragraphs
+        )
+        for paragraphs in documents
+    ]
+
+
+def split_sentences(paragraph):
+    """(sentence, punctuation) pairs of a paragraph; none for a blank paragraph"""
+    if paragraph.strip() == '':
+        return []
+    parts = re.split(r'([.!?])', paragraph)
+    return [(parts[i], parts[i + 1] if i + 1 < len(parts) else '') for i in range(0, len(parts), 2)]
+
+
+def translate_sentence(sentence, trie, source_language, target_language, source_chars, target_chars, words=None):
+    """
+    Translate a single sentence, given its words when it was tokenized
+    before. The pair's PhraseTrie matches the longest dictionary entry at
+    each word, including phrases and words inside Chinese and Japanese text
+    """
+    # Tokenize the sentence
+    if words is None:
+        words = tokenize(sentence)
+    translated_words = []
+
+    for word, translation, is_word in trie.segment(words):
+        # Skip punctuation and other non-word characters
+        if not is_word:
+            translated_words.append(word)
+            continue
+
+        # Direct translation from dictionary
+        if translation is not None:
+            # Dictionary phrases are already in target word order
+            translated_word = translation.replace(' ', PHRASE_SPACE)
+
+            # Preserve capitalization
+            if word[0].isupper():
+                translated_word = translated_word[0].upper() + translated_word[1:]
+
+            translated_words.append(translated_word)
+        else:
+            # Check for common words in target language characteristics
+            word_lower = word.lower()
+            common_words = target_chars.get("common_words", {})
+            if word_lower in common_words:
+                translated_word = common_words[word_lower]
+
+                # Preserve capitalization
+                if word[0].isupper():
+                    translated_word = translated_word[0].upper() + translated_word[1:]
+
+                translated_words.append(translated_word)
+            else:
+                # Apply rule-based translation for unknown words
+                translated_word = transform_word(
+                    word,
+                    source_language,
+                    target_language,
+                    source_chars,
+                    target_chars
+                )
+                translated_words.append(translated_word)
+
+    # Apply language-specific post-processing
+    result = ' '.join(translated_words)
+
+    # Apply rule-based transformations for grammatical correctness
+    if target_language == "Spanish" or target_language == "French" or target_language == "Italian" or target_language == "Portuguese":
+        # Reverse adjective-noun order if specified in language characteristics
+        if target_chars.get("word_order", {}).get("adjective_after_noun", False):
+            # Simple heuristic: look for adjective-noun pairs and reverse them
+            # This is a simplified approach; a real implementation would use POS tagging
+            result = re.sub(r'\b(\w+)\s+(\w+)(?=\s|$)',
+                           lambda m: f"{m.group(2)} {m.group(1)}"
+                           if (m.group(1).lower().endswith(tuple(target_chars.get("adjective_endings", [])))
+                              and not m.group(2).lower().endswith(tuple(target_chars.get("adjective_endings", []))))
+                           else m.group(0),
+                           result)
+    result = result.replace(PHRASE_SPACE, ' ')
+
+    # Return the result, with language-specific final transformations to be applied later
+    return result
+
+
+def transform_word(word, source_language, target_language, source_chars, target_chars):
+    """Transform a word using language-specific rules when no dictionary match is found"""
+    word_lower = word.lower()
+
+    # Check for common words first (articles, prepositions, etc.)
+    common_words = target_chars.get("common_words", {})
+    if word_lower in common_words:
+        result = common_words[word_lower]
+        return result[0].upper() + result[1:] if word[0].isupper() else result
+
+    # Generate a hash for this word to ensure consistent translations
+    word_hash = int(hashlib.md5(word_lower.encode()).hexdigest(), 16)
+    # A generator of its own, so concurrent requests cannot reseed each other's
+    rng = random.Random(word_hash)
+
+    # Apply language-specific transformations
+    if target_language == "Spanish":
+        # Spanish rules: common endings, gender patterns, etc.
+        if word_lower.endswith(('tion', 'sion')):
+            new_word = word_lower[:-4] + 'ción'
+        elif word_lower.endswith('ly'):
+            new_word = word_lower[:-2] + 'mente'
+        elif word_lower.endswith('ing'):
+            new_word = word_lower[:-3] + 'ando'
+        else:
+            # Add common Spanish suffixes
+            stem_length = min(len(word) - 1, 5)  # Keep at most 5 chars
+            suffix = get_language_suffix("Spanish", word_lower)
+            new_word = word_lower[:stem_length] + suffix
+
+    elif target_language == "French":
+        # French rules: common endings, silent letters, etc.
+        if word_lower.endswith(('tion', 'sion')):
+            new_word = word_lower  # Same in French
+        elif word_lower.endswith('ly'):
+            new_word = word_lower[:-2] + 'ment'
+        elif word_lower.endswith('ing'):
+            new_word = word_lower[:-3] + 'ant'
+        else:
+            # Add common French suffixes
+            stem_length = min(len(word) - 1, 5)
+            suffix = get_language_suffix("French", word_lower)
+            new_word = word_lower[:stem_length] + suffix
+
+    elif target_language == "German":
+        # German rules: compound words, capitalization, etc.
+        if word_lower.endswith(('tion', 'sion')):
+            new_word = word_lower  # Similar in German
+        elif word_lower.endswith('ly'):
+            new_word = word_lower[:-2] + 'lich'
+        elif word_lower.endswith('ing'):
+            new_word = word_lower[:-3] + 'ung'
+        else:
+            # Add common German suffixes
+            stem_length = min(len(word) - 1, 5)
+            suffix = get_language_suffix("German", word_lower)
+            new_word = word_lower[:stem_length] + suffix
+
+    elif target_language == "Italian":
+        # Italian rules
+        if word_lower.endswith(('tion', 'sion')):
+            new_word = word_lower[:-4] + 'zione'
+        elif word_lower.endswith('ly'):
+            new_word = word_lower[:-2] + 'mente'
+        elif word_lower.endswith('ing'):
+            new_word = word_lower[:-3] + 'ando'
+        else:
+            # Add common Italian suffixes
+            stem_length = min(len(word) - 1, 5)
+            suffix = get_language_suffix("Italian", word_lower)
+            new_word = word_lower[:stem_length] + suffix
+
+    elif target_language == "Portuguese":
+        # Portuguese rules
+        if word_lower.endswith(('tion', 'sion')):
+            new_word = word_lower[:-4] + 'ção'
+        elif word_lower.endswith('ly'):
+            new_word = word_lower[:-2] + 'mente'
+        elif word_lower.endswith('ing'):
+            new_word = word_lower[:-3] + 'ando'
+        else:
+            # Add common Portuguese suffixes
+            stem_length = min(len(word) - 1, 5)
+            suffix = get_language_suffix("Portuguese", word_lower)
+            new_word = word_lower[:stem_length] + suffix
+
+    elif target_language == "Russian":
+        # Russian rules
+        if word_lower.endswith(('tion', 'sion')):
+            new_word = word_lower[:-4] + 'ция'
+        elif word_lower.endswith('ly'):
+            new_word = word_lower[:-2] + 'но'
+        elif word_lower.endswith('ing'):
+            new_word = word_lower[:-3] + 'ение'
+        else:
+            # Add common Russian suffixes
+            stem_length = min(len(word) - 1, 5)
+            suffix = get_language_suffix("Russian", word_lower)
+            new_word = word_lower[:stem_length] + suffix
+
+    elif target_language == "Chinese":
+        # For Chinese, we'll use a very simplified approach (real translation would use characters)
+        # Return a placeholder for demonstration purposes
+        chars = "的一是不了人我在有他这为之大来以个中上们"
+        new_word = ''.join(rng.choice(chars) for _ in range(min(len(word), 4)))
+        return new_word  # Early return as we don't need capitalization
+
+    elif target_language == "Japanese":
+        # For Japanese, simplified approach with Katakana for foreign words
+        katakana_map = {
+            'a': 'ア', 'i': 'イ', 'u': 'ウ', 'e': 'エ', 'o': 'オ',
+            'ka': 'カ', 'ki': 'キ', 'ku': 'ク', 'ke': 'ケ', 'ko': 'コ',
+            'sa': 'サ', 'shi': 'シ', 'su': 'ス', 'se': 'セ', 'so': 'ソ',
+            'ta': 'タ', 'chi': 'チ', 'tsu': 'ツ', 'te': 'テ', 'to': 'ト',
+            'na': 'ナ', 'ni': 'ニ', 'nu': 'ヌ', 'ne': 'ネ', 'no': 'ノ',
+            'ha': 'ハ', 'hi': 'ヒ', 'fu': 'フ', 'he': 'ヘ', 'ho': 'ホ',
+            'ma': 'マ', 'mi': 'ミ', 'mu': 'ム', 'me': 'メ', 'mo': 'モ',
+            'ya': 'ヤ', 'yu': 'ユ', 'yo': 'ヨ',
+            'ra': 'ラ', 'ri': 'リ', 'ru': 'ル', 're': 'レ', 'ro': 'ロ',
+            'wa': 'ワ', 'wo': 'ヲ', 'n': 'ン'
+        }
+
+        # Convert word to katakana-like representation
+        new_word = ""
+        i = 0
+        while i < len(word_lower):
+            if i < len(word_lower) - 1:
+                pair = word_lower[i:i+2]
+                if pair in katakana_map:
+                    new_word += katakana_map[pair]
+                    i += 2
+                    continue
+
+            if word_lower[i] in 'aiueo':
+                new_word += katakana_map[word_lower[i]]
+            else:
+                if i < len(word_lower) - 1 and word_lower[i+1] in 'aiueo':
+                    syllable = word_lower[i] + word_lower[i+1]
+                    if syllable in katakana_map:
+                        new_word += katakana_map[syllable]
+                        i += 2
+                        continue
+
+                # If no match, just use a random katakana
+                new_word += rng.choice(list(katakana_map.values()))
+
+            i += 1
+
+        return new_word  # Early return as we don't need capitalization
+
+    elif target_language == "Arabic":
+        # Arabic rules (simplified approach)
+        arabic_chars = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+        if len(word) <= 3:
+            # For short words, use a direct transliteration
+            char_map = {
+                'a': 'ا', 'b': 'ب', 'c': 'ك', 'd': 'د', 'e': 'ي', 'f': 'ف',
+                'g': 'غ', 'h': 'ه', 'i': 'ي', 'j': 'ج', 'k': 'ك', 'l': 'ل',
+                'm': 'م', 'n': 'ن', 'o': 'و', 'p': 'ب', 'q': 'ق', 'r': 'ر',
+                's': 'س', 't': 'ت', 'u': 'و', 'v': 'ف', 'w': 'و', 'x': 'كس',
+                'y': 'ي', 'z': 'ز'
+            }
+            new_word = ""
+            for char in word_lower:
+                new_word += char_map.get(char, rng.choice(arabic_chars))
+        else:
+            # For longer words, use random Arabic characters
+            stem_length = min(len(word), 4)
+            new_word = ""
+            for _ in range(stem_length):
+                new_word += rng.choice(arabic_chars)
+
+            # Add a common Arabic suffix based on word hash
+            suffixes = ["", "ة", "ات", "ون", "ين", "ان", "ي", "ية"]
+            new_word += rng.choice(suffixes)
+
+        return new_word  # Early return as we don't need capitalization
+
+    else:
+        # Default fallback for other languages
+        new_word = word_lower
+
+    # Preserve original capitalization
+    if word[0].isupper():
+        new_word = new_word[0].upper() + new_word[1:]
+
+    return new_word
@@ -0,0 +1,127 @@
+"""
+Shared, read-only translation dictionaries.
+
+The bundled word lists in language_data are expanded into dictionaries for
+every language pair (reversed and pivoted through English and other
+languages) once per process. The result is frozen into a DictionaryStore
+that every TranslationView instance reads, together with the phrase tries
+compiled from it. Nothing writes to either while requests are served, so
+threads can share them without locks, and workers forked from a preloaded
+master (gunicorn.conf.py) share their pages.
+
+When build_lexicon.py has compiled the dictionaries into the artifact at
+settings.TRANSLATION_LEXICON_ARTIFACT, workers memory-map that instead
+(api.translation_data.lexicon_artifact). An artifact built from other word
+lists than the bundled ones is ignored. With settings.TRANSLATION_LEXICONS
+set to the 'sqlite' store, large TSV lexicons are served from disk on top
+of either (api.translation_data.lexicon_store).
+
+Built dictionaries are kept in the layout settings.TRANSLATION_LEXICONS
+names: 'compact' interns each language's words once and maps pairs through
+integer ID arrays (api.translation_data.compact_lexicon), 'dict' keeps a
+Python dict per pair.
+"""
+import logging
+import os
+import struct
+import threading
+from types import MappingProxyType
+
+from django.conf import settings
+
+from .dictionary_utils import copy_dictionaries, generate_complete_dictionaries, build_direct_translations
+from .language_data import LANGUAGE_DICTIONARIES
+from .lexicon_store import EMPTY_DICTIONARY, LexiconStore, SQLiteLexiconStore
+
+logger = logging.getLogger(__name__)
+
+
+class DictionaryStore(LexiconStore):
+    """In-memory LexiconStore of read-only dicts"""
+
+    def __init__(self, dictionaries):
+        self._dictionaries = {
+            source: MappingProxyType({
+                target: MappingProxyType(dict(words)) for target, words in targets.items()
+            })
+            for source, targets in dictionaries.items()
+        }
+
+    def __getitem__(self, source):
+        return self._dictionaries[source]
+
+    def __iter__(self):
+        return iter(self._dictionaries)
+
+    def __len__(self):
+        return len(self._dictionaries)
+
+    def dictionary(self, source_language, target_language):
+        return self._dictionaries.get(source_language, {}).get(target_language, EMPTY_DICTIONARY)
+
+    def language_pairs(self):
+        return [
+            (source, target)
+            for source, targets in self._dictionaries.items()
+            for target in targets
+            if source != target
+        ]
+
+
+def build_dictionary_store():
+    """Expand the bundled word lists into dictionaries for every pair and freeze them"""
+    dictionaries = copy_dictionaries(LANGUAGE_DICTIONARIES)
+    generate_complete_dictionaries(dictionaries)
+    build_direct_translations(dictionaries)
+    if getattr(settings, 'TRANSLATION_LEXICONS', {}).get('layout', 'compact') == 'compact':
+        from .compact_lexicon import CompactLexiconStore
+        store = CompactLexiconStore(dictionaries)
+    else:
+        store = DictionaryStore(dictionaries)
+    logger.info(f"Built translation dictionaries for {len(store.language_pairs())} language pairs")
+    return store
+
+
+def load_bundled_store():
+    """Memory-map the compiled lexicon artifact if it is current, else build the dictionaries"""
+    from .lexicon_artifact import LexiconArtifact, source_digest
+
+    path = getattr(settings, 'TRANSLATION_LEXICON_ARTIFACT', None)
+    if path and os.path.exists(path):
+        try:
+            artifact = LexiconArtifact(path)
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logger.warning(f"Could not load translation lexicon artifact {path}: {e}")
+        else:
+            if artifact.source_digest == source_digest():
+                logger.info(f"Loaded translation lexicon artifact {path}")
+                return artifact
+            logger.warning(f"Translation lexicon artifact {path} is out of date, run build_lexicon.py")
+    return build_dictionary_store()
+
+
+def load_dictionary_store():
+    """The store configured by settings.TRANSLATION_LEXICONS, over the bundled dictionaries"""
+    store = load_bundled_store()
+    config = getattr(settings, 'TRANSLATION_LEXICONS', {})
+    if config.get('store', 'memory') == 'sqlite':
+        store = SQLiteLexiconStore(
+            config['database'], config.get('tsv_dir'), fallback=store, cache_size=config.get('cache_size', 50000)
+        )
+        logger.info(f"Serving translation lexicons from {store.database}")
+    store.compile_phrase_tries()
+    return store
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_dictionary_store():
+    """The process-wide dictionary store, loaded on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_dictionary_store()
+    return _store
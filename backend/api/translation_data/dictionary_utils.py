@@ -1,47 +1,71 @@
 """
 Translation utilities for enhancing dictionary coverage and translation quality
+
+The bundled LANGUAGE_DICTIONARIES are read-only. The dictionary builders
+expand them in place when given source language -> target language ->
+word dictionaries, and a copy of the bundled ones otherwise, and return
+the result. create_pivot_dictionary and enrich_dictionary only read
+dictionaries, so they also accept a LexiconStore or the bundled ones.
 """
 import random
 import hashlib
 import re
 import itertools
+import zlib
 from .language_data import LANGUAGE_DICTIONARIES, LANGUAGE_CHARACTERISTICS
 
-def create_pivot_dictionary(source_language, target_language):
+def copy_dictionaries(dictionaries):
+    """Mutable copy of source language -> target language -> word dictionaries"""
+    return {
+        source: {target: dict(words) for target, words in targets.items()}
+        for source, targets in dictionaries.items()
+    }
+
+def invert_dictionary(dictionary):
+    """Reverse a word dictionary; the last word wins when translations repeat"""
+    return {target_word: source_word for source_word, target_word in dictionary.items()}
+
+def join_dictionaries(first, second):
+    """
+    Join two word dictionaries through their shared language (a -> b and
+    b -> c give a -> c) by hash lookups, in linear time and in first's order
+    """
+    return {word: second[pivot_word] for word, pivot_word in first.items() if pivot_word in second}
+
+def create_pivot_dictionary(source_language, target_language, dictionaries=None):
     """
     Create a translation dictionary using English as a pivot language
     when direct translation between source and target isn't available
     """
+    if dictionaries is None:
+        dictionaries = LANGUAGE_DICTIONARIES
+
     pivot_dict = {}
     
     # Use English as pivot if possible
-    if "English" in LANGUAGE_DICTIONARIES and target_language in LANGUAGE_DICTIONARIES["English"]:
-        english_to_target = LANGUAGE_DICTIONARIES["English"][target_language]
+    if "English" in dictionaries and target_language in dictionaries["English"]:
+        english_to_target = dictionaries["English"][target_language]
         
         # Then try Source->English
-        if source_language in LANGUAGE_DICTIONARIES and "English" in LANGUAGE_DICTIONARIES[source_language]:
-            source_to_english = LANGUAGE_DICTIONARIES[source_language]["English"]
+        if source_language in dictionaries and "English" in dictionaries[source_language]:
+            source_to_english = dictionaries[source_language]["English"]
             
             # Create a pivot dictionary
-            for source_word, english_word in source_to_english.items():
-                if english_word in english_to_target:
-                    pivot_dict[source_word] = english_to_target[english_word]
+            pivot_dict = join_dictionaries(source_to_english, english_to_target)
     
     # If still empty, try to use any available shared language as pivot
     if not pivot_dict:
-        for potential_pivot in LANGUAGE_DICTIONARIES.keys():
+        for potential_pivot in dictionaries.keys():
             if potential_pivot != source_language and potential_pivot != target_language:
-                if (source_language in LANGUAGE_DICTIONARIES and 
-                    potential_pivot in LANGUAGE_DICTIONARIES[source_language] and
-                    target_language in LANGUAGE_DICTIONARIES and
-                    potential_pivot in LANGUAGE_DICTIONARIES[target_language]):
+                if (source_language in dictionaries and 
+                    potential_pivot in dictionaries[source_language] and
+                    target_language in dictionaries and
+                    potential_pivot in dictionaries[target_language]):
                     
-                    source_to_pivot = LANGUAGE_DICTIONARIES[source_language][potential_pivot]
-                    pivot_to_target = LANGUAGE_DICTIONARIES[potential_pivot][target_language]
+                    source_to_pivot = dictionaries[source_language][potential_pivot]
+                    pivot_to_target = dictionaries[potential_pivot][target_language]
                     
-                    for source_word, pivot_word in source_to_pivot.items():
-                        if pivot_word in pivot_to_target:
-                            pivot_dict[source_word] = pivot_to_target[pivot_word]
+                    pivot_dict.update(join_dictionaries(source_to_pivot, pivot_to_target))
                     
                     # If we found enough translations, break
                     if len(pivot_dict) > 10:
@@ -51,8 +75,9 @@ def create_pivot_dictionary(source_language, target_language):
 
 def get_language_suffix(language, word):
     """Get a suitable suffix for a word in the target language"""
-    word_hash = int(hashlib.md5(word.lower().encode()).hexdigest(), 16)
-    random.seed(word_hash)
+    # Seeded per word, so a word always gets the same suffix, without
+    # touching the global random state other code relies on
+    rng = random.Random(int(hashlib.md5(word.lower().encode()).hexdigest(), 16))
     
     if language == "Spanish":
         if word.endswith(('e', 'i', 'u')):
@@ -86,7 +111,7 @@ def get_language_suffix(language, word):
     else:
         suffixes = ['', 's', 'ed', 'ing', 'ly', 'ment', 'tion', 'ness', 'ity', 'er']
     
-    return random.choice(suffixes)
+    return rng.choice(suffixes)
 
 def transform_text_for_language(text, target_language):
     """Apply language-specific text transformations"""
@@ -107,9 +132,13 @@ def transform_text_for_language(text, target_language):
         text = ' '.join(words)
     
     if target_language == "Japanese":
-        # Add Japanese sentence-ending particles
+        # Add Japanese sentence-ending particles, picked by the sentence they
+        # end so the same text always gets the same ones
         particles = ["。", "ね", "よ", "な", ""]
-        text = re.sub(r'\.', lambda x: random.choice(particles), text)
+        def particle(match):
+            sentence = match.string[match.string.rfind('.', 0, match.start()) + 1:match.start()]
+            return particles[zlib.crc32(sentence.encode()) % len(particles)]
+        text = re.sub(r'\.', particle, text)
     
     if target_language == "Chinese":
         # Replace periods with Chinese full stops
@@ -117,11 +146,14 @@ def transform_text_for_language(text, target_language):
     
     return text
 
-def generate_complete_dictionaries():
+def generate_complete_dictionaries(dictionaries=None):
     """
     Generate comprehensive translation dictionaries for all language pairs
     This function ensures that we have dictionaries for every possible language pair
     """
+    if dictionaries is None:
+        dictionaries = copy_dictionaries(LANGUAGE_DICTIONARIES)
+
     # List of all supported languages
     languages = [
         "English", "Spanish", "French", "German", "Chinese", 
@@ -129,19 +161,17 @@ def generate_complete_dictionaries():
     ]
     
     # Create reverse dictionaries for all existing language pairs
-    for source_lang in list(LANGUAGE_DICTIONARIES.keys()):
-        for target_lang in list(LANGUAGE_DICTIONARIES[source_lang].keys()):
+    for source_lang in list(dictionaries.keys()):
+        for target_lang in list(dictionaries[source_lang].keys()):
             # Skip if reverse dictionary already exists
-            if target_lang in LANGUAGE_DICTIONARIES and source_lang in LANGUAGE_DICTIONARIES[target_lang]:
+            if target_lang in dictionaries and source_lang in dictionaries[target_lang]:
                 continue
             
             # Create the reverse dictionary
-            if target_lang not in LANGUAGE_DICTIONARIES:
-                LANGUAGE_DICTIONARIES[target_lang] = {}
+            if target_lang not in dictionaries:
+                dictionaries[target_lang] = {}
                 
-            LANGUAGE_DICTIONARIES[target_lang][source_lang] = {
-                target_word: source_word for source_word, target_word in LANGUAGE_DICTIONARIES[source_lang][target_lang].items()
-            }
+            dictionaries[target_lang][source_lang] = invert_dictionary(dictionaries[source_lang][target_lang])
     
     # For each language pair, ensure we have a translation dictionary
     for source_lang, target_lang in itertools.product(languages, languages):
@@ -149,103 +179,104 @@ def generate_complete_dictionaries():
             continue
             
         # Check if direct dictionary already exists
-        if source_lang in LANGUAGE_DICTIONARIES and target_lang in LANGUAGE_DICTIONARIES[source_lang]:
+        if source_lang in dictionaries and target_lang in dictionaries[source_lang]:
             continue
             
         # Create a new dictionary entry if it doesn't exist
-        if source_lang not in LANGUAGE_DICTIONARIES:
-            LANGUAGE_DICTIONARIES[source_lang] = {}
+        if source_lang not in dictionaries:
+            dictionaries[source_lang] = {}
             
         # Create dictionary using pivot translation
-        if "English" in LANGUAGE_DICTIONARIES:
-            english_translations = LANGUAGE_DICTIONARIES.get("English", {})
+        if "English" in dictionaries:
+            english_translations = dictionaries.get("English", {})
             source_to_english = {}
             
             # First try to find source to English mappings
-            if source_lang in LANGUAGE_DICTIONARIES and "English" in LANGUAGE_DICTIONARIES[source_lang]:
+            if source_lang in dictionaries and "English" in dictionaries[source_lang]:
                 # Direct source to English exists
-                source_to_english = LANGUAGE_DICTIONARIES[source_lang]["English"]
-            elif "English" in LANGUAGE_DICTIONARIES and source_lang in english_translations:
+                source_to_english = dictionaries[source_lang]["English"]
+            elif "English" in dictionaries and source_lang in english_translations:
                 # Create reverse mapping from English to source
-                source_to_english = {
-                    target_word: source_word 
-                    for source_word, target_word in english_translations[source_lang].items()
-                }
+                source_to_english = invert_dictionary(english_translations[source_lang])
             
             # Then try to find English to target mappings
             english_to_target = {}
             if target_lang in english_translations:
                 english_to_target = english_translations[target_lang]
-            elif target_lang in LANGUAGE_DICTIONARIES and "English" in LANGUAGE_DICTIONARIES[target_lang]:
-                english_to_target = {
-                    target_word: source_word 
-                    for source_word, target_word in LANGUAGE_DICTIONARIES[target_lang]["English"].items()
-                }
+            elif target_lang in dictionaries and "English" in dictionaries[target_lang]:
+                english_to_target = invert_dictionary(dictionaries[target_lang]["English"])
             
             # Create the pivot dictionary
-            pivot_dict = {}
-            for source_word, english_word in source_to_english.items():
-                if english_word in english_to_target:
-                    pivot_dict[source_word] = english_to_target[english_word]
+            pivot_dict = join_dictionaries(source_to_english, english_to_target)
             
             # Only set if we found something
             if pivot_dict:
-                LANGUAGE_DICTIONARIES[source_lang][target_lang] = pivot_dict
+                dictionaries[source_lang][target_lang] = pivot_dict
     
     # Final check: if we still have missing pairs, try multi-step pivoting
     for source_lang, target_lang in itertools.product(languages, languages):
         if source_lang == target_lang:
             continue
             
-        if source_lang not in LANGUAGE_DICTIONARIES or target_lang not in LANGUAGE_DICTIONARIES[source_lang] or not LANGUAGE_DICTIONARIES[source_lang][target_lang]:
+        if source_lang not in dictionaries or target_lang not in dictionaries[source_lang] or not dictionaries[source_lang][target_lang]:
             # Try to find a path from source to target through multiple languages
             for pivot1 in languages:
                 if pivot1 == source_lang or pivot1 == target_lang:
                     continue
                     
-                if source_lang in LANGUAGE_DICTIONARIES and pivot1 in LANGUAGE_DICTIONARIES[source_lang]:
+                if source_lang in dictionaries and pivot1 in dictionaries[source_lang]:
                     for pivot2 in languages:
                         if pivot2 == source_lang or pivot2 == target_lang or pivot2 == pivot1:
                             continue
                             
-                        if pivot1 in LANGUAGE_DICTIONARIES and pivot2 in LANGUAGE_DICTIONARIES[pivot1] and pivot2 in LANGUAGE_DICTIONARIES and target_lang in LANGUAGE_DICTIONARIES[pivot2]:
+                        if pivot1 in dictionaries and pivot2 in dictionaries[pivot1] and pivot2 in dictionaries and target_lang in dictionaries[pivot2]:
                             # We found a path: source -> pivot1 -> pivot2 -> target
-                            source_to_pivot1 = LANGUAGE_DICTIONARIES[source_lang][pivot1]
-                            pivot1_to_pivot2 = LANGUAGE_DICTIONARIES[pivot1][pivot2]
-                            pivot2_to_target = LANGUAGE_DICTIONARIES[pivot2][target_lang]
+                            source_to_pivot1 = dictionaries[source_lang][pivot1]
+                            pivot1_to_pivot2 = dictionaries[pivot1][pivot2]
+                            pivot2_to_target = dictionaries[pivot2][target_lang]
                             
                             # Create a new dictionary entry if it doesn't exist
-                            if source_lang not in LANGUAGE_DICTIONARIES:
-                                LANGUAGE_DICTIONARIES[source_lang] = {}
+                            if source_lang not in dictionaries:
+                                dictionaries[source_lang] = {}
                                 
-                            pivot_dict = {}
-                            for source_word, pivot1_word in source_to_pivot1.items():
-                                for p1_word, p2_word in pivot1_to_pivot2.items():
-                                    if p1_word == pivot1_word:
-                                        for p2_word2, target_word in pivot2_to_target.items():
-                                            if p2_word == p2_word2:
-                                                pivot_dict[source_word] = target_word
+                            pivot_dict = join_dictionaries(
+                                join_dictionaries(source_to_pivot1, pivot1_to_pivot2), pivot2_to_target
+                            )
                             
                             if pivot_dict:
-                                LANGUAGE_DICTIONARIES[source_lang][target_lang] = pivot_dict
+                                dictionaries[source_lang][target_lang] = pivot_dict
                                 break
                     
-                    if source_lang in LANGUAGE_DICTIONARIES and target_lang in LANGUAGE_DICTIONARIES[source_lang]:
+                    if source_lang in dictionaries and target_lang in dictionaries[source_lang]:
                         break
     
-    return LANGUAGE_DICTIONARIES
+    return dictionaries
 
-def enrich_dictionary(source_lang, target_lang):
+def build_stem_index(dictionary):
+    """
+    The first word (in dictionary order) of every three-letter stem among
+    a dictionary's words longer than three letters, in one pass
+    """
+    stems = {}
+    for word in dictionary:
+        if len(word) > 3:
+            stems.setdefault(word[:3], word)
+    return stems
+
+def enrich_dictionary(source_lang, target_lang, dictionaries=None):
     """
     Enrich a translation dictionary with additional entries based on patterns
     and other available dictionaries
     """
-    if source_lang not in LANGUAGE_DICTIONARIES or target_lang not in LANGUAGE_DICTIONARIES[source_lang]:
+    if dictionaries is None:
+        dictionaries = LANGUAGE_DICTIONARIES
+
+    if source_lang not in dictionaries or target_lang not in dictionaries[source_lang]:
         return {}
         
     # Get the existing dictionary
-    dictionary = LANGUAGE_DICTIONARIES[source_lang][target_lang]
-    enriched_dict = dictionary.copy()
+    dictionary = dictionaries[source_lang][target_lang]
+    enriched_dict = dict(dictionary)
     
     # Add plurals, verb forms, and other variations
     for word, translation in dictionary.items():
@@ -267,41 +298,34 @@ def enrich_dictionary(source_lang, target_lang):
                 enriched_dict[word] = singular_translation[:-1] + ('os' if singular_translation.endswith('o') else 'as')
     
     # Use shared word stems to generate additional translations
-    source_stems = {}
-    target_stems = {}
-    
-    # Find word stems (simplified approach)
-    for word, translation in dictionary.items():
-        if len(word) > 3:
-            source_stems[word[:3]] = source_stems.get(word[:3], []) + [word]
-        if len(translation) > 3:
-            target_stems[translation[:3]] = target_stems.get(translation[:3], []) + [translation]
+    stem_index = build_stem_index(dictionary)
     
     # Use stems to infer new translations
-    for source_word in LANGUAGE_DICTIONARIES.get("English", {}).get(source_lang, {}):
+    for source_word in dictionaries.get("English", {}).get(source_lang, {}):
         if source_word not in enriched_dict and len(source_word) > 3:
-            stem = source_word[:3]
-            if stem in source_stems:
-                # Find a similar word and adapt its translation
-                similar_word = source_stems[stem][0]
-                if similar_word in dictionary:
-                    similar_translation = dictionary[similar_word]
-                    # Adapt the translation based on the difference between the words
-                    if len(source_word) > len(similar_word):
-                        enriched_dict[source_word] = similar_translation + get_language_suffix(target_lang, source_word)
-                    elif len(source_word) < len(similar_word):
-                        if len(similar_translation) > 3:
-                            enriched_dict[source_word] = similar_translation[:len(similar_translation)-2]
-                        else:
-                            enriched_dict[source_word] = similar_translation
+            # Find a similar word and adapt its translation
+            similar_word = stem_index.get(source_word[:3])
+            if similar_word is not None:
+                similar_translation = dictionary[similar_word]
+                # Adapt the translation based on the difference between the words
+                if len(source_word) > len(similar_word):
+                    enriched_dict[source_word] = similar_translation + get_language_suffix(target_lang, source_word)
+                elif len(source_word) < len(similar_word):
+                    if len(similar_translation) > 3:
+                        enriched_dict[source_word] = similar_translation[:len(similar_translation)-2]
+                    else:
+                        enriched_dict[source_word] = similar_translation
     
     return enriched_dict
 
 # Create a function to generate direct translations between all language pairs
-def build_direct_translations():
+def build_direct_translations(dictionaries=None):
     """
     Build direct translation dictionaries between all language pairs
     """
+    if dictionaries is None:
+        dictionaries = copy_dictionaries(LANGUAGE_DICTIONARIES)
+
     languages = [
         "English", "Spanish", "French", "German", "Chinese", 
         "Japanese", "Russian", "Arabic", "Portuguese", "Italian"
@@ -317,45 +341,36 @@ def build_direct_translations():
                 continue
                 
             # Skip if direct translation already exists and is not empty
-            if (source_lang in LANGUAGE_DICTIONARIES and 
-                target_lang in LANGUAGE_DICTIONARIES[source_lang] and
-                len(LANGUAGE_DICTIONARIES[source_lang][target_lang]) > 5):
+            if (source_lang in dictionaries and 
+                target_lang in dictionaries[source_lang] and
+                len(dictionaries[source_lang][target_lang]) > 5):
                 continue
                 
-            # Create dictionary using English as pivot
-            pivot_dict = {}
-            
             # Get source->English and English->target dictionaries
             source_to_eng = {}
             eng_to_target = {}
             
-            if source_lang in LANGUAGE_DICTIONARIES and "English" in LANGUAGE_DICTIONARIES[source_lang]:
+            if source_lang in dictionaries and "English" in dictionaries[source_lang]:
                 # Direct source to English dictionary exists
-                source_to_eng = LANGUAGE_DICTIONARIES[source_lang]["English"]
-            elif "English" in LANGUAGE_DICTIONARIES and source_lang in LANGUAGE_DICTIONARIES["English"]:
+                source_to_eng = dictionaries[source_lang]["English"]
+            elif "English" in dictionaries and source_lang in dictionaries["English"]:
                 # Create reverse mapping from English to source
-                source_to_eng = {v: k for k, v in LANGUAGE_DICTIONARIES["English"][source_lang].items()}
+                source_to_eng = invert_dictionary(dictionaries["English"][source_lang])
             
-            if "English" in LANGUAGE_DICTIONARIES and target_lang in LANGUAGE_DICTIONARIES["English"]:
+            if "English" in dictionaries and target_lang in dictionaries["English"]:
                 # Direct English to target dictionary exists
-                eng_to_target = LANGUAGE_DICTIONARIES["English"][target_lang]
-            elif target_lang in LANGUAGE_DICTIONARIES and "English" in LANGUAGE_DICTIONARIES[target_lang]:
+                eng_to_target = dictionaries["English"][target_lang]
+            elif target_lang in dictionaries and "English" in dictionaries[target_lang]:
                 # Create reverse mapping from target to English
-                eng_to_target = {v: k for k, v in LANGUAGE_DICTIONARIES[target_lang]["English"].items()}
+                eng_to_target = invert_dictionary(dictionaries[target_lang]["English"])
             
-            # Now build the pivot dictionary
-            for source_word, eng_word in source_to_eng.items():
-                if eng_word in eng_to_target:
-                    pivot_dict[source_word] = eng_to_target[eng_word]
+            # Now build the pivot dictionary using English as pivot
+            pivot_dict = join_dictionaries(source_to_eng, eng_to_target)
             
             # Only add if we found matches
             if pivot_dict:
-                if source_lang not in LANGUAGE_DICTIONARIES:
-                    LANGUAGE_DICTIONARIES[source_lang] = {}
-                LANGUAGE_DICTIONARIES[source_lang][target_lang] = pivot_dict
+                if source_lang not in dictionaries:
+                    dictionaries[source_lang] = {}
+                dictionaries[source_lang][target_lang] = pivot_dict
     
-    return LANGUAGE_DICTIONARIES
-
-# Initialize the complete dictionaries when this module is imported
-generate_complete_dictionaries()
-build_direct_translations() 
\ No newline at end of file
+    return dictionaries
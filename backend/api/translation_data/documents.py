@@ -0,0 +1,298 @@
+"""
+Streaming translation of long documents.
+
+A document (an uploaded .txt/.md file or a long text body) is read as a
+stream of chunks and cut into lines as they arrive. Markdown structure is
+kept out of the translation: headings, list and quote markers and
+indentation are carried over as prefixes, and fenced code blocks and
+blank lines are copied unchanged. Lines longer than segment_chars are cut
+at sentence ends.
+
+Consecutive lines are grouped into segments of up to segment_chars, and
+segments are translated concurrently:
+
+- Google Translate segments on a shared thread pool, through the
+  translation memory and in one upstream batch per segment
+- dictionary segments on a process pool, since the dictionary engine is
+  pure Python and would otherwise share one GIL
+
+At most window segments per document are in flight. Results are yielded
+in document order as soon as the next one is ready, so the time to the
+first output depends on the first segment rather than the whole document.
+"""
+import codecs
+import contextvars
+import logging
+import multiprocessing
+import re
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from api.serving.deadlines import DeadlineExceeded, deadline_scope
+from api.serving.metrics import registry
+
+from .dictionary_engine import translate_texts
+from .dictionary_store import get_dictionary_store
+from .dictionary_utils import transform_text_for_language
+from .translation_memory import get_translation_memory
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_SEGMENTS = registry.counter(
+    'translation_document_segments_total',
+    "Document segments translated, by translation_method")
+
+DOCUMENT_EXTENSIONS = ('.txt', '.md', '.markdown')
+READ_CHUNK_SIZE = 64 * 1024
+
+# Markdown syntax at the start of a line that is not translated
+_MARKDOWN_PREFIX = re.compile(r'^(\s*(?:#{1,6}\s+|[-*+]\s+|\d+[.)]\s+|>\s?)*)')
+_CODE_FENCE = re.compile(r'^\s*(```|~~~)')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# A piece of a line: prefix and body, followed by end ('\n', ' ' inside a
+# cut line, or '' at the very end of the document)
+Line = namedtuple('Line', ['prefix', 'body', 'end', 'translate'])
+
+
+def decode_chunks(chunks, encoding='utf-8'):
+    """Decode a stream of byte chunks, also across multi-byte characters"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    for chunk in chunks:
+        text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _cut(body, limit):
+    """Pieces of a long line body, cut after sentence ends where possible"""
+    pieces, current = [], ''
+    for sentence in _SENTENCE_END.split(body):
+        while len(sentence) > limit:
+            pieces.append(sentence[:limit])
+            sentence = sentence[limit:]
+        if current and len(current) + 1 + len(sentence) > limit:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def iter_lines(texts, segment_chars=2000):
+    """Lines of a document arriving as a stream of text chunks"""
+    in_code = False
+
+    def split(line, end):
+        nonlocal in_code
+        if _CODE_FENCE.match(line):
+            in_code = not in_code
+            yield Line('', line, end, False)
+            return
+        if in_code or not line.strip():
+            yield Line('', line, end, False)
+            return
+        prefix = _MARKDOWN_PREFIX.match(line).group(1)
+        body = line[len(prefix):]
+        if len(body) <= segment_chars:
+            yield Line(prefix, body, end, True)
+            return
+        pieces = _cut(body, segment_chars)
+        for i, piece in enumerate(pieces):
+            last = i == len(pieces) - 1
+            yield Line(prefix if i == 0 else '', piece, end if last else ' ', True)
+
+    buffer = ''
+    for text in texts:
+        buffer += text
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield from split(line.rstrip('\r'), '\n')
+    if buffer:
+        yield from split(buffer, '')
+
+
+def iter_segments(lines, segment_chars=2000):
+    """Group lines into segments of up to segment_chars translatable characters"""
+    segment, size = [], 0
+    for line in lines:
+        length = len(line.body) if line.translate else 0
+        if segment and size + length > segment_chars:
+            yield segment
+            segment, size = [], 0
+        segment.append(line)
+        size += length
+    if segment:
+        yield segment
+
+
+def assemble(lines, translations):
+    """
+    Text of a translated segment; translations holds one entry per
+    translated line, and lines without one are kept untranslated
+    """
+    translated = iter(translations)
+    return ''.join(
+        line.prefix + (next(translated, line.body) if line.translate else line.body) + line.end
+        for line in lines
+    )
+
+
+# Dictionary worker processes -------------------------------------------------
+
+def _init_dictionary_worker():
+    import django
+    django.setup()
+
+
+def translate_lines_with_dictionary(bodies, source_language, target_language):
+    """Dictionary translations of line bodies, in a worker process or inline"""
+    # The engine alone, so worker processes never import the views and TensorFlow
+    # Lines never contain newlines, so the paragraphs map back one to one
+    return translate_texts(
+        get_dictionary_store(), ['\n'.join(bodies)], source_language, target_language, get_translation_memory()
+    )[0].split('\n')
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(name):
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            config = settings.TRANSLATION_DOCUMENTS
+            if name == 'remote':
+                pool = ThreadPoolExecutor(max_workers=config['remote_workers'],
+                                          thread_name_prefix='document-remote')
+            elif config['dictionary_processes']:
+                # A fresh interpreter per worker; forking a threaded server is not safe
+                pool = ProcessPoolExecutor(max_workers=config['dictionary_processes'],
+                                           mp_context=multiprocessing.get_context('forkserver'),
+                                           initializer=_init_dictionary_worker)
+            else:
+                pool = ThreadPoolExecutor(max_workers=config['remote_workers'],
+                                          thread_name_prefix='document-dictionary')
+            _pools[name] = pool
+        return pool
+
+
+def _reset_dictionary_pool(pool):
+    with _pools_lock:
+        if _pools.get('dictionary') is pool:
+            del _pools['dictionary']
+
+
+class DocumentTranslator:
+    """
+    Translates a stream of lines segment by segment and yields
+    (segment text, translation_method) in order.
+
+    translate_remote(texts, source, target) is TranslationView's Google
+    path and raises on failure; translate_local is its dictionary path,
+    used as the fallback.
+    """
+
+    def __init__(self, translate_remote, translate_local, use_remote, deadline=None):
+        config = settings.TRANSLATION_DOCUMENTS
+        self.translate_remote = translate_remote
+        self.translate_local = translate_local
+        self.use_remote = use_remote
+        self.deadline = deadline
+        self.window = config['window']
+        self.segment_chars = config['segment_chars']
+
+    def _in_scope(self, fn, *args):
+        if self.deadline is None:
+            return fn(*args)
+        with deadline_scope(self.deadline):
+            return fn(*args)
+
+    def _remote_segment(self, bodies, source_language, target_language):
+        try:
+            [text] = self._in_scope(self.translate_remote, ['\n'.join(bodies)], source_language, target_language)
+            translations = text.split('\n')
+            if len(translations) != len(bodies):
+                # The upstream merged or split lines; send them as separate texts
+                logger.info("Google Translate changed the line count of a document segment, translating its lines one by one")
+                translations = [
+                    translated.replace('\n', ' ')
+                    for translated in self._in_scope(self.translate_remote, bodies, source_language, target_language)
+                ]
+            return translations, 'google_translate'
+        except Exception as e:
+            logger.warning(f"Google Translate failed for a document segment, using the dictionaries: {str(e)}")
+            text = self._in_scope(self.translate_local, '\n'.join(bodies), source_language, target_language)
+            return text.split('\n'), 'dictionary_fallback'
+
+    def _submit(self, lines, source_language, target_language):
+        bodies = [line.body for line in lines if line.translate]
+        if not bodies:
+            return None
+        if self.use_remote:
+            pool = _get_pool('remote')
+            return pool.submit(contextvars.copy_context().run,
+                               self._remote_segment, bodies, source_language, target_language)
+        pool = _get_pool('dictionary')
+        try:
+            return pool.submit(translate_lines_with_dictionary, bodies, source_language, target_language)
+        except BrokenProcessPool:
+            _reset_dictionary_pool(pool)
+            return _get_pool('dictionary').submit(
+                translate_lines_with_dictionary, bodies, source_language, target_language)
+
+    def _result(self, lines, future, source_language, target_language):
+        if future is None:
+            return assemble(lines, []), 'none_needed'
+        timeout = None if self.deadline is None else self.deadline.remaining()
+        if self.use_remote:
+            translations, method = future.result(timeout=timeout)
+        else:
+            try:
+                translations, method = future.result(timeout=timeout), 'dictionary'
+            except BrokenProcessPool:
+                # A worker died; translate this segment here and start a new pool
+                logger.error("Dictionary worker pool broke, translating the segment in-process")
+                bodies = [line.body for line in lines if line.translate]
+                translations = self.translate_local('\n'.join(bodies), source_language, target_language).split('\n')
+                method = 'dictionary'
+        translations = [transform_text_for_language(text, target_language) for text in translations]
+        DOCUMENT_SEGMENTS.inc(translation_method=method)
+        return assemble(lines, translations), method
+
+    def translate(self, lines, source_language, target_language):
+        """
+        Yield (translated segment, translation_method) in document order.
+        Raises DeadlineExceeded once the deadline passes.
+        """
+        pending = deque()
+        try:
+            for segment in iter_segments(lines, self.segment_chars):
+                pending.append((segment, self._submit(segment, source_language, target_language)))
+                # Hand out finished segments early, and wait once the window is full
+                while pending and (len(pending) >= self.window or pending[0][1] is None or pending[0][1].done()):
+                    yield self._next_result(pending, source_language, target_language)
+            while pending:
+                yield self._next_result(pending, source_language, target_language)
+        finally:
+            # The client went away or the deadline passed; drop queued segments
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _next_result(self, pending, source_language, target_language):
+        segment, future = pending.popleft()
+        try:
+            return self._result(segment, future, source_language, target_language)
+        except FutureTimeout:
+            raise DeadlineExceeded('document_translation')
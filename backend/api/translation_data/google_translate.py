@@ -2,8 +2,8 @@
 Google Translate API integration for enhanced translation capabilities
 """
 import logging
-from googletrans import Translator
-from googletrans.constants import LANGUAGES
+from django.conf import settings
+from .translate_client import TranslateClient, TranslateError, TranslateUnavailable
 
 logger = logging.getLogger(__name__)
 
@@ -26,10 +26,10 @@ CODE_TO_LANGUAGE_MAP = {v: k for k, v in LANGUAGE_CODE_MAP.items()}
 
 class GoogleTranslator:
     """
-    Wrapper for Google Translate API using the googletrans library
+    Wrapper for Google Translate API using the pooled TranslateClient
     """
-    def __init__(self):
-        self.translator = Translator()
+    def __init__(self, client=None):
+        self.client = client or TranslateClient(**settings.GOOGLE_TRANSLATE)
         self.supported_languages = set(LANGUAGE_CODE_MAP.keys())
         self.fallback_enabled = True
     
@@ -58,56 +58,120 @@ class GoogleTranslator:
                 logger.warning(f"Unsupported target language: {target_language}")
                 return fallback_fn(text, source_language, target_language) if fallback_fn and self.fallback_enabled else text
                 
-            # Call Google Translate API
-            result = self.translator.translate(
-                text, 
-                src=source_code,
-                dest=target_code
-            )
+            # Call Google Translate API; the client checks the request deadline
+            translated = self.client.translate(text, source_code, target_code)
             
             # Log successful translation
             logger.info(f"Google translated from {source_language} to {target_language}")
-            return result.text
+            return translated
             
         except Exception as e:
             # Log error and use fallback if available
-            logger.error(f"Google Translate error: {str(e)}")
+            self._log_failure(e)
             if fallback_fn and self.fallback_enabled:
                 logger.info("Using fallback translation method")
                 return fallback_fn(text, source_language, target_language)
             return text
     
-    def detect_language(self, text):
+    def translate_remote(self, text, source_language, target_language):
+        """
+        Translate text with Google Translate only, raising TranslateError
+        on failure instead of falling back
+        """
+        if not text.strip():
+            return text
+        return self.translate_remote_batch([text], source_language, target_language)[0]
+    
+    def translate_remote_batch(self, texts, source_language, target_language):
+        """
+        Translate several non-blank texts with Google Translate only, raising
+        TranslateError on failure instead of falling back
+        """
+        target_code = LANGUAGE_CODE_MAP.get(target_language)
+        if not target_code:
+            raise TranslateError(f"Unsupported target language: {target_language}")
+        return self.client.translate_batch(texts, LANGUAGE_CODE_MAP.get(source_language, 'auto'), target_code)
+    
+    def translate_batch(self, texts, source_language, target_language, fallback_fn=None):
+        """
+        Translate several texts with as few Google Translate calls as possible
+        
+        Args:
+            texts (list): Texts to translate
+            source_language (str): Source language name (e.g., "English")
+            target_language (str): Target language name (e.g., "Spanish")
+            fallback_fn (callable): Called per text if Google Translate fails
+            
+        Returns:
+            list: Translated texts, in order
+        """
+        def fallback():
+            if fallback_fn and self.fallback_enabled:
+                return [fallback_fn(text, source_language, target_language) if text.strip() else text
+                        for text in texts]
+            return list(texts)
+        
+        target_code = LANGUAGE_CODE_MAP.get(target_language)
+        if not target_code:
+            logger.warning(f"Unsupported target language: {target_language}")
+            return fallback()
+        
+        # Blank texts are returned as they are, without a round trip
+        pending = [i for i, text in enumerate(texts) if text.strip()]
+        translations = list(texts)
+        try:
+            results = self.client.translate_batch(
+                [texts[i] for i in pending],
+                LANGUAGE_CODE_MAP.get(source_language, 'auto'),
+                target_code
+            )
+        except Exception as e:
+            self._log_failure(e)
+            return fallback()
+        for i, translated in zip(pending, results):
+            translations[i] = translated
+        logger.info(f"Google translated {len(pending)} texts from {source_language} to {target_language}")
+        return translations
+    
+    @staticmethod
+    def _log_failure(error):
+        if isinstance(error, TranslateUnavailable):
+            # Expected while the upstream is unhealthy; the breaker logged when it opened
+            logger.debug(f"Google Translate skipped: {error}")
+        else:
+            logger.error(f"Google Translate error: {str(error)}")
+    
+    def detect_language(self, text, default="English"):
         """
         Detect the language of a text using Google Translate
         
         Args:
             text (str): Text to detect language from
+            default: Returned when detection fails or finds an unsupported language
             
         Returns:
             str: Detected language name (e.g., "English")
         """
         if not text.strip():
-            return "English"
+            return default
             
         try:
-            detection = self.translator.detect(text)
-            detected_code = detection.lang
+            detected_code = self.client.detect(text)
             
             # Convert language code to our language name
             language_name = CODE_TO_LANGUAGE_MAP.get(detected_code)
             
-            # If detected language is not in our supported languages, default to English
+            # If detected language is not in our supported languages, use the default
             if not language_name:
                 logger.warning(f"Detected unsupported language code: {detected_code}")
-                return "English"
+                return default
                 
-            logger.info(f"Google detected language: {language_name} (confidence: {detection.confidence})")
+            logger.info(f"Google detected language: {language_name}")
             return language_name
             
         except Exception as e:
-            logger.error(f"Language detection error: {str(e)}")
-            return "English"
+            self._log_failure(e)
+            return default
             
     def get_supported_languages(self):
         """Get list of supported languages for translation"""
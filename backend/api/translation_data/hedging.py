@@ -0,0 +1,103 @@
+"""
+Hedged translation for latency-sensitive requests.
+
+Waiting on Google Translate and only then falling back to the dictionary
+engine makes the worst case the sum of both. A hedged translation starts
+the remote call on a small thread pool. If it has not answered after
+hedge_delay, the dictionary translation is computed on the request thread
+while the remote call carries on. The remote translation is preferred
+whenever it arrives within the latency budget (capped by the request
+deadline); otherwise the dictionary translation is returned and the
+remote call is left to finish in the background.
+
+translation_hedge_total counts the winner of every hedged translation.
+translation_hedge_latency_saved_seconds_total adds up how much sooner a
+request was answered than waiting for the remote call would have allowed.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+
+from api.serving.deadlines import remaining_time
+from api.serving.metrics import registry
+
+HEDGE_OUTCOMES = registry.counter(
+    'translation_hedge_total',
+    "Hedged translations by winner (remote, local) and outcome "
+    "(before_hedge, within_budget, over_budget, remote_failed)")
+HEDGE_SAVED = registry.counter(
+    'translation_hedge_latency_saved_seconds_total',
+    "Seconds hedged translations answered before the remote call finished")
+
+REMOTE_METHOD = 'google_translate'
+# translation_method when the dictionary answer wins
+OVER_BUDGET_METHOD = 'dictionary_hedged'
+REMOTE_FAILED_METHOD = 'dictionary_fallback'
+
+
+class HedgedTranslator:
+    """Races remote_fn against local_fn, both called as fn(text, source_language, target_language)"""
+
+    def __init__(self, remote_fn, local_fn, hedge_delay, latency_budget, executor):
+        self.remote_fn = remote_fn
+        self.local_fn = local_fn
+        self.hedge_delay = hedge_delay
+        self.latency_budget = latency_budget
+        self.executor = executor
+
+    def translate(self, text, source_language, target_language):
+        """Returns (translated_text, translation_method)"""
+        started = time.monotonic()
+        budget = min(self.latency_budget, remaining_time(self.latency_budget))
+        # The remote call keeps the request deadline, as in the bulkheads
+        remote = self.executor.submit(
+            contextvars.copy_context().run, self.remote_fn, text, source_language, target_language
+        )
+
+        try:
+            translated = remote.result(timeout=min(self.hedge_delay, budget))
+            HEDGE_OUTCOMES.inc(winner='remote', outcome='before_hedge')
+            return translated, REMOTE_METHOD
+        except FutureTimeout:
+            pass
+        except Exception:
+            HEDGE_OUTCOMES.inc(winner='local', outcome='remote_failed')
+            return self.local_fn(text, source_language, target_language), REMOTE_FAILED_METHOD
+
+        local_started = time.monotonic()
+        local = self.local_fn(text, source_language, target_language)
+        local_seconds = time.monotonic() - local_started
+        try:
+            translated = remote.result(timeout=max(0.0, budget - (time.monotonic() - started)))
+            HEDGE_OUTCOMES.inc(winner='remote', outcome='within_budget')
+            return translated, REMOTE_METHOD
+        except FutureTimeout:
+            HEDGE_OUTCOMES.inc(winner='local', outcome='over_budget')
+            answered = time.monotonic()
+            remote.add_done_callback(lambda _: HEDGE_SAVED.inc(time.monotonic() - answered))
+            return local, OVER_BUDGET_METHOD
+        except Exception:
+            # Without hedging the dictionary would only have started now
+            HEDGE_OUTCOMES.inc(winner='local', outcome='remote_failed')
+            HEDGE_SAVED.inc(local_seconds)
+            return local, REMOTE_FAILED_METHOD
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hedge_executor():
+    """Thread pool shared by the hedged remote calls of this process"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.TRANSLATION_HEDGING['max_workers'],
+                    thread_name_prefix='translation-hedge',
+                )
+    return _executor
@@ -1,4 +1,5 @@
 # Language dictionaries and characteristics for translation functionality
+from types import MappingProxyType
 
 # Dictionary of translations between languages
 # Structure: {source_language: {target_language: {word: translation}}}
@@ -566,4 +567,19 @@ LANGUAGE_CHARACTERISTICS["Italian"] = {
         "negations": {"pattern": r'\b(not|don\'t|doesn\'t|didn\'t)\b', "replacement": "non"}
     },
     "word_order": {"adjective_after_noun": True}
-} 
\ No newline at end of file
+} 
+
+
+def _freeze(value):
+    """Read-only copy of nested dicts and lists"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# The bundled data is read-only: the dictionary store expands a copy of it at
+# startup, and nothing changes it while requests are served
+LANGUAGE_DICTIONARIES = _freeze(LANGUAGE_DICTIONARIES)
+LANGUAGE_CHARACTERISTICS = _freeze(LANGUAGE_CHARACTERISTICS)
@@ -0,0 +1,296 @@
+"""
+Dictionary-based language detection.
+
+LanguageDetector is built once from the lexicon store and
+LANGUAGE_CHARACTERISTICS:
+
+- an inverted index from every known word to the languages it belongs to
+- a character trigram profile per language, learnt from the same words,
+  for words the index does not know
+
+Detecting a text is a single pass over its characters and words. Texts
+written mostly in a non-Latin script are decided by the script: kana for
+Japanese, Han for Chinese, Cyrillic for Russian and Arabic script for
+Arabic. Latin-script texts are decided by word votes. A known word votes
+for its languages, and an unknown word votes for the language whose
+trigram profile fits it best.
+
+Each Detection carries a confidence between 0 and 1: the winning share of
+the votes, discounted when there are few of them, or the share of the
+letters for script decisions. DetectionPolicy uses it to ask the remote
+detector only about texts the local one is unsure of.
+"""
+import hashlib
+import logging
+import math
+import re
+import threading
+from bisect import bisect_right
+from collections import Counter, defaultdict, namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+
+from api.serving.metrics import registry
+
+from .dictionary_store import get_dictionary_store
+from .language_data import LANGUAGE_CHARACTERISTICS
+from .lexicon_store import HotWords
+
+logger = logging.getLogger(__name__)
+
+DETECTIONS = registry.counter(
+    'translation_language_detections_total',
+    "Language detections by outcome: local, or escalated to the remote detector "
+    "(escalated, cache_hit, remote_failed)")
+
+SUPPORTED_LANGUAGES = [
+    "English", "Spanish", "French", "German", "Chinese",
+    "Japanese", "Russian", "Arabic", "Portuguese", "Italian"
+]
+DEFAULT_LANGUAGE = "English"
+
+# Only the first words are needed to tell languages apart
+MAX_WORDS = 100
+# An unknown word's trigram vote counts less than a dictionary match
+NGRAM_VOTE = 0.5
+NGRAM_MIN_LENGTH = 3
+# Unknown words whose trigram vote is remembered
+NGRAM_CACHE_SIZE = 10000
+# Votes needed for full confidence; a single word is little evidence
+CONFIDENT_VOTES = 2.0
+# Share of the letters a non-Latin script needs to decide the language
+SCRIPT_MIN_SHARE = 0.3
+
+LATIN, CYRILLIC, ARABIC, KANA, HAN = 'latin', 'cyrillic', 'arabic', 'kana', 'han'
+
+# Sorted (start, script) code point ranges; gaps map to None
+_SCRIPT_RANGES = [
+    (0x0041, LATIN), (0x005B, None), (0x0061, LATIN), (0x007B, None),
+    (0x00C0, LATIN), (0x0250, None),
+    (0x0400, CYRILLIC), (0x0530, None),
+    (0x0600, ARABIC), (0x0700, None),
+    (0x1E00, LATIN), (0x1F00, None),
+    (0x3040, KANA), (0x3100, None),
+    (0x3400, HAN), (0x4DC0, None), (0x4E00, HAN), (0xA000, None),
+    (0xF900, HAN), (0xFB00, None),
+    (0xFE70, ARABIC), (0xFF00, None),
+]
+_RANGE_STARTS = [start for start, _ in _SCRIPT_RANGES]
+
+SCRIPT_LANGUAGES = {CYRILLIC: "Russian", ARABIC: "Arabic", KANA: "Japanese", HAN: "Chinese"}
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+Detection = namedtuple('Detection', ['language', 'confidence'])
+
+
+def character_script(char):
+    """Script of a character, or None for digits, punctuation and other scripts"""
+    index = bisect_right(_RANGE_STARTS, ord(char)) - 1
+    return _SCRIPT_RANGES[index][1] if index >= 0 else None
+
+
+def _trigrams(word):
+    padded = f" {word} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class LanguageDetector:
+    """Detects the language of texts with a word index and trigram profiles"""
+
+    def __init__(self, store, characteristics=None, languages=None):
+        self.languages = list(languages or SUPPORTED_LANGUAGES)
+        characteristics = LANGUAGE_CHARACTERISTICS if characteristics is None else characteristics
+
+        vocabulary = defaultdict(set)
+        for source, target in store.language_pairs():
+            for word, translation in store.dictionary(source, target).items():
+                vocabulary[source].update(_WORD.findall(word.lower()))
+                vocabulary[target].update(_WORD.findall(translation.lower()))
+        for language, traits in characteristics.items():
+            for article_forms in traits.get("articles", {}).values():
+                for article in article_forms:
+                    vocabulary[language].update(_WORD.findall(article.lower()))
+            for english_word, word in traits.get("common_words", {}).items():
+                vocabulary[DEFAULT_LANGUAGE].update(_WORD.findall(english_word.lower()))
+                vocabulary[language].update(_WORD.findall(word.lower()))
+
+        word_languages = defaultdict(list)
+        for language in self.languages:
+            for word in vocabulary.get(language, ()):
+                word_languages[word].append(language)
+        self.word_index = {word: tuple(languages) for word, languages in word_languages.items()}
+        self.profiles = self._build_profiles(vocabulary)
+        self._ngram_language = lru_cache(maxsize=NGRAM_CACHE_SIZE)(self._ngram_language)
+
+    def _build_profiles(self, vocabulary):
+        """Smoothed trigram log-probabilities of each Latin-script language"""
+        counts = {}
+        for language in self.languages:
+            if language in SCRIPT_LANGUAGES.values():
+                continue
+            counts[language] = Counter(
+                gram for word in vocabulary.get(language, ()) for gram in _trigrams(word)
+            )
+        grams = set().union(*counts.values()) if counts else set()
+        profiles = {}
+        for language, language_counts in counts.items():
+            total = sum(language_counts.values()) + len(grams) + 1
+            profiles[language] = (
+                {gram: math.log((count + 1) / total) for gram, count in language_counts.items()},
+                math.log(1 / total),
+            )
+        return profiles
+
+    def _ngram_language(self, word):
+        """Latin-script language whose trigram profile fits an unknown word best"""
+        best, best_score = None, -math.inf
+        grams = _trigrams(word)
+        for language, (log_probs, unseen) in self.profiles.items():
+            score = sum(log_probs.get(gram, unseen) for gram in grams)
+            if score > best_score:
+                best, best_score = language, score
+        return best
+
+    def detect(self, text):
+        """Language of text as a Detection(language, confidence)"""
+        if not text or not text.strip():
+            return Detection(DEFAULT_LANGUAGE, 0.0)
+
+        # ASCII text can only be written in the Latin script
+        if not text.isascii():
+            detection = self._detect_script(text)
+            if detection is not None:
+                return detection
+
+        votes = defaultdict(float)
+        for count, match in enumerate(_WORD.finditer(text.lower())):
+            if count >= MAX_WORDS:
+                break
+            word = match.group()
+            languages = self.word_index.get(word)
+            if languages:
+                for language in languages:
+                    votes[language] += 1 / len(languages)
+            elif len(word) >= NGRAM_MIN_LENGTH and self.profiles:
+                votes[self._ngram_language(word)] += NGRAM_VOTE
+
+        total = sum(votes.values())
+        if not total:
+            return Detection(DEFAULT_LANGUAGE, 0.0)
+        language = max(votes, key=votes.get)
+        return Detection(language, votes[language] / total * min(1.0, total / CONFIDENT_VOTES))
+
+    def _detect_script(self, text):
+        """Detection for text written mostly in a non-Latin script, else None"""
+        scripts = Counter(character_script(char) for char in text)
+        scripts.pop(None, None)
+        letters = sum(scripts.values())
+        if not letters:
+            return Detection(DEFAULT_LANGUAGE, 0.0)
+
+        # Kana only appears in Japanese, which also uses Han characters
+        if scripts[KANA]:
+            share = (scripts[KANA] + scripts[HAN]) / letters
+            if share >= SCRIPT_MIN_SHARE:
+                return Detection("Japanese", share)
+        for script in (HAN, CYRILLIC, ARABIC):
+            share = scripts[script] / letters
+            if share >= SCRIPT_MIN_SHARE:
+                return Detection(SCRIPT_LANGUAGES[script], share)
+        return None
+
+    def detect_batch(self, texts):
+        """Detections for several texts, in order"""
+        return [self.detect(text) for text in texts]
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_language_detector():
+    """The process-wide detector over the dictionary store, built on first use"""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = LanguageDetector(get_dictionary_store().detection_store())
+    return _detector
+
+
+def detect_language(text):
+    """Detection for a text with the shared detector"""
+    return get_language_detector().detect(text)
+
+
+def detect_languages(texts):
+    """Detections for several texts with the shared detector"""
+    return get_language_detector().detect_batch(texts)
+
+
+class DetectionPolicy:
+    """
+    Local-first language detection. The local detector answers when it is
+    confident enough; other texts go to the remote detector, whose answers
+    are cached per text hash. If the remote detector fails, the local
+    answer is used and not cached.
+    """
+
+    def __init__(self, detector, remote_detect, threshold, cache_size=10000):
+        self.detector = detector
+        # remote_detect(text) returns a language name, or None on failure
+        self.remote_detect = remote_detect
+        self.threshold = threshold
+        self.cache = HotWords(cache_size)
+
+    @staticmethod
+    def _text_key(text):
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def detect(self, text):
+        """Language of text as a Detection; remote answers have confidence 1"""
+        detection = self.detector.detect(text)
+        if detection.confidence >= self.threshold or not text.strip():
+            DETECTIONS.inc(result='local')
+            return detection
+
+        key = self._text_key(text)
+        language = self.cache.get(key)
+        if language is not None:
+            DETECTIONS.inc(result='cache_hit')
+            return Detection(language, 1.0)
+
+        language = self.remote_detect(text)
+        if language is None:
+            DETECTIONS.inc(result='remote_failed')
+            return detection
+        DETECTIONS.inc(result='escalated')
+        if language != detection.language:
+            logger.info(f"Remote detection chose {language} over {detection.language} "
+                        f"(local confidence {detection.confidence:.2f})")
+        self.cache.put(key, language)
+        return Detection(language, 1.0)
+
+
+_policy = None
+
+
+def get_detection_policy():
+    """The process-wide local-first policy, escalating to Google Translate"""
+    global _policy
+    if _policy is None:
+        # Imported here so local detection works without the remote client
+        from .google_translate import google_translator
+        detector = get_language_detector()
+        with _detector_lock:
+            if _policy is None:
+                config = settings.TRANSLATION_DETECTION
+                _policy = DetectionPolicy(
+                    detector,
+                    lambda text: google_translator.detect_language(text, default=None),
+                    config['escalation_threshold'],
+                    config['cache_size'],
+                )
+    return _policy
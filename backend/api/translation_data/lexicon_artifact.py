@@ -0,0 +1,186 @@
+"""
+Compiled, memory-mapped translation lexicon.
+
+build_lexicon.py compiles the dictionaries of every language pair, after
+reversal and pivoting, into one binary file. Workers memory-map the file
+and look words up by binary search over each pair's sorted entries. No
+Python dicts are built, so the file loads almost instantly and its pages
+are shared between worker processes through the page cache.
+
+Layout, little-endian:
+
+- 8 byte magic, then a u32 length and a JSON index with the source digest,
+  the offset of the string blob and the table offsets and entry count of
+  each pair
+- per pair, a table of (key offset, key length, value offset, value
+  length) u32 records sorted by the UTF-8 bytes of the key, followed by a
+  table of (value offset, value length) records sorted by value, for
+  reverse lookups
+- a blob of UTF-8 words, each stored once however many pairs use it
+
+Offsets are relative to the end of the index.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping, ValuesView
+from types import MappingProxyType
+
+from .dictionary_store import DictionaryStore
+
+MAGIC = b'MLLEX\x00\x01\x00'
+_LENGTH = struct.Struct('<I')
+_ENTRY = struct.Struct('<IIII')
+_VALUE = struct.Struct('<II')
+
+
+def source_digest():
+    """Digest of the bundled word lists and the code that expands them"""
+    digest = hashlib.blake2b(digest_size=16)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for filename in ('language_data.py', 'dictionary_utils.py'):
+        with open(os.path.join(directory, filename), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def write_lexicon_artifact(dictionaries, path, digest=None):
+    """
+    Compile a mapping of source language -> target language -> word
+    dictionary into an artifact at path. The file is replaced atomically,
+    so running workers keep their mapping of the previous version.
+    """
+    strings = bytearray()
+    string_offsets = {}
+
+    def intern(word):
+        data = word.encode('utf-8')
+        offset = string_offsets.get(data)
+        if offset is None:
+            offset = string_offsets[data] = len(strings)
+            strings.extend(data)
+        return offset, len(data)
+
+    tables = bytearray()
+    pairs = {}
+    for source, targets in dictionaries.items():
+        for target, words in targets.items():
+            entries = sorted((word.encode('utf-8'), word, translation) for word, translation in words.items())
+            table = len(tables)
+            for _, word, translation in entries:
+                tables.extend(_ENTRY.pack(*intern(word), *intern(translation)))
+            values = len(tables)
+            for translation in sorted(words.values(), key=lambda value: value.encode('utf-8')):
+                tables.extend(_VALUE.pack(*intern(translation)))
+            pairs[f"{source}>{target}"] = [table, values, len(entries)]
+
+    index = json.dumps({
+        'source_digest': digest or source_digest(),
+        'strings': len(tables),
+        'pairs': pairs,
+    }).encode('utf-8')
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(index)))
+        f.write(index)
+        f.write(tables)
+        f.write(strings)
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+class ArtifactValues(ValuesView):
+    """Translations of an ArtifactDictionary, with membership tests by binary search"""
+
+    def __contains__(self, translation):
+        return isinstance(translation, str) and self._mapping._find_value(translation.encode('utf-8'))
+
+
+class ArtifactDictionary(Mapping):
+    """Read-only word dictionary for one language pair, backed by the mapped file"""
+
+    def __init__(self, buffer, table, values, count, strings):
+        self._buffer = buffer
+        self._table = table
+        self._values = values
+        self._count = count
+        self._strings = strings
+
+    def _entry(self, position):
+        return _ENTRY.unpack_from(self._buffer, self._table + position * _ENTRY.size)
+
+    def _string(self, offset, length):
+        start = self._strings + offset
+        return self._buffer[start:start + length]
+
+    def __getitem__(self, word):
+        if not isinstance(word, str):
+            raise KeyError(word)
+        key = word.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = self._entry(middle)
+            probe = self._string(key_offset, key_length)
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return self._string(value_offset, value_length).decode('utf-8')
+        raise KeyError(word)
+
+    def _find_value(self, value):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            probe = self._string(*_VALUE.unpack_from(self._buffer, self._values + middle * _VALUE.size))
+            if probe < value:
+                low = middle + 1
+            elif probe > value:
+                high = middle
+            else:
+                return True
+        return False
+
+    def values(self):
+        return ArtifactValues(self)
+
+    def __iter__(self):
+        for position in range(self._count):
+            key_offset, key_length, _, _ = self._entry(position)
+            yield self._string(key_offset, key_length).decode('utf-8')
+
+    def __len__(self):
+        return self._count
+
+
+class LexiconArtifact(DictionaryStore):
+    """DictionaryStore over a memory-mapped artifact instead of Python dicts"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{path} is not a translation lexicon artifact")
+        (index_length,) = _LENGTH.unpack_from(self._buffer, len(MAGIC))
+        body = len(MAGIC) + _LENGTH.size + index_length
+        index = json.loads(self._buffer[len(MAGIC) + _LENGTH.size:body])
+
+        self.source_digest = index['source_digest']
+        strings = body + index['strings']
+        dictionaries = {}
+        for pair, (table, values, count) in index['pairs'].items():
+            source, target = pair.split('>', 1)
+            dictionaries.setdefault(source, {})[target] = ArtifactDictionary(
+                self._buffer, body + table, body + values, count, strings
+            )
+        self._dictionaries = {source: MappingProxyType(targets) for source, targets in dictionaries.items()}
+
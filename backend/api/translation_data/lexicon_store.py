@@ -0,0 +1,574 @@
+"""
+Lexicon stores behind the translation engine.
+
+A LexiconStore maps source language -> target language -> word
+dictionary, where word dictionaries are read-only Mappings from lowercase
+source words to translations. TranslationView and dictionary_utils only
+use that interface, so the lexicons can live in memory (DictionaryStore),
+in the memory-mapped artifact (LexiconArtifact) or on disk.
+
+SQLiteLexiconStore serves open bilingual lexicons with hundreds of
+thousands of entries per pair from tab-separated files named
+``<Source>-<Target>.tsv`` (for example English-Spanish.tsv), one
+``word<TAB>translation`` per line. Each file is imported into an SQLite
+database the first time its pair is used, or again when it changes. Its
+words are then looked up through a bounded hot-word cache, so memory stays
+flat however large the lexicons grow. A lexicon also serves the reverse
+pair, and words missing from it fall back to the bundled dictionaries.
+
+Phrases and CJK entries of a disk lexicon are matched with indexed
+queries too (LexiconSegmenter), rather than compiled into a PhraseTrie
+per pair. The import indexes every multi-word entry by its token path in
+lexicon_phrases and records the length of the longest CJK entry of the
+pair, so segmentation finds the phrases starting at a word with one range
+query and the CJK entries starting at a character with one lookup of its
+candidate prefixes.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Mapping, ValuesView
+from types import MappingProxyType
+
+from api.serving.metrics import registry
+
+from .segmentation import PhraseTrie, Segmenter, is_cjk, phrase_path
+
+logger = logging.getLogger(__name__)
+
+LEXICON_CACHE = registry.counter(
+    'translation_lexicon_cache_total', "Hot-word cache lookups of the disk lexicon store, by result")
+
+EMPTY_DICTIONARY = MappingProxyType({})
+
+TSV_SUFFIX = '.tsv'
+IMPORT_BATCH = 10000
+
+# Databases of another schema version are imported again from the TSV files
+SCHEMA_VERSION = 3
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lexicon_pairs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    file_mtime INTEGER NOT NULL,
+    entries INTEGER NOT NULL,
+    word_cjk_length INTEGER NOT NULL DEFAULT 0,
+    translation_cjk_length INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (source, target)
+);
+CREATE TABLE IF NOT EXISTS lexicon_entries (
+    pair INTEGER NOT NULL,
+    word TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    translation_key TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    PRIMARY KEY (pair, word)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lexicon_entries_translation ON lexicon_entries (pair, translation);
+CREATE INDEX IF NOT EXISTS lexicon_entries_translation_key ON lexicon_entries (pair, translation_key, line);
+CREATE TABLE IF NOT EXISTS lexicon_phrases (
+    pair INTEGER NOT NULL,
+    reverse INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (pair, reverse, path)
+) WITHOUT ROWID;
+"""
+
+
+class LexiconStore(Mapping):
+    """Read-only mapping of source language -> target language -> word dictionary"""
+
+    @abstractmethod
+    def dictionary(self, source_language, target_language):
+        """Word dictionary for a language pair, empty if the pair is unknown"""
+
+    @abstractmethod
+    def language_pairs(self):
+        """All (source, target) pairs with a dictionary"""
+
+    def detection_store(self):
+        """The store whose words language detection indexes in memory"""
+        return self
+
+    def version(self):
+        """
+        Identifies the lexicons served beyond the bundled word lists, for the
+        keys of remembered translations; empty when there are none
+        """
+        return ''
+
+    def phrase_trie(self, source_language, target_language):
+        """
+        PhraseTrie over a pair's dictionary, compiled on first use by reading
+        every key once; only phrases and CJK entries are kept. Stores are
+        read-only, so a pair compiled twice by racing threads is only wasted work
+        """
+        tries = self.__dict__.setdefault('_phrase_tries', {})
+        trie = tries.get((source_language, target_language))
+        if trie is None:
+            trie = tries[(source_language, target_language)] = PhraseTrie(
+                self.dictionary(source_language, target_language)
+            )
+        return trie
+
+    def compile_phrase_tries(self):
+        """Compile the phrase tries of every pair now, so requests only read them"""
+        for source, target in self.language_pairs():
+            self.phrase_trie(source, target)
+
+    def __getitem__(self, source):
+        targets = {
+            target: self.dictionary(source, target)
+            for pair_source, target in self.language_pairs() if pair_source == source
+        }
+        if not targets:
+            raise KeyError(source)
+        return targets
+
+    def __iter__(self):
+        return iter(dict.fromkeys(source for source, _ in self.language_pairs()))
+
+    def __len__(self):
+        return len(set(source for source, _ in self.language_pairs()))
+
+
+class HotWords:
+    """Thread-safe LRU cache of recent word lookups, including misses"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._words = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._words.get(key, default)
+            if value is not default:
+                self._words.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._words[key] = value
+            self._words.move_to_end(key)
+            if len(self._words) > self.max_size:
+                self._words.popitem(last=False)
+
+    def __len__(self):
+        return len(self._words)
+
+
+_MISSING = object()
+
+
+class SQLiteValues(ValuesView):
+    """Translations of a SQLiteDictionary, with indexed membership tests"""
+
+    def __contains__(self, translation):
+        return self._mapping._has_translation(translation)
+
+
+class SQLiteDictionary(Mapping):
+    """Word dictionary for one language pair, looked up in the lexicon database"""
+
+    def __init__(self, store, pair_id, entries=None, reverse=False, cjk_length=0):
+        self._store = store
+        self._pair_id = pair_id
+        self._entries = entries
+        self._reverse = int(reverse)
+        # Length of the longest key of CJK characters only
+        self.cjk_length = cjk_length
+        # A reversed dictionary looks words up by their lowercased translation,
+        # and the last word listed with it wins, as in invert_dictionary
+        self._key, self._value = ('translation_key', 'word') if reverse else ('word', 'translation')
+        self._order = " ORDER BY line DESC" if reverse else ""
+
+    def __getitem__(self, word):
+        cache_key = (self._pair_id, self._key, word)
+        translation = self._store.hot_words.get(cache_key, _MISSING)
+        if translation is _MISSING:
+            LEXICON_CACHE.inc(result='miss')
+            row = self._store.connection().execute(
+                f"SELECT {self._value} FROM lexicon_entries WHERE pair = ? AND {self._key} = ?{self._order} LIMIT 1",
+                (self._pair_id, word),
+            ).fetchone()
+            translation = row[0] if row else None
+            self._store.hot_words.put(cache_key, translation)
+        else:
+            LEXICON_CACHE.inc(result='hit')
+        if translation is None:
+            raise KeyError(word)
+        return translation
+
+    def phrases(self, first):
+        """{token path: key} of the multi-word keys whose first token is first"""
+        cache_key = (self._pair_id, f'{self._key} phrases', first)
+        phrases = self._store.hot_words.get(cache_key)
+        if phrases is None:
+            LEXICON_CACHE.inc(result='miss')
+            # Token keys contain no spaces, so the paths starting with "first " sort before "first!"
+            phrases = dict(self._store.connection().execute(
+                "SELECT path, entry FROM lexicon_phrases WHERE pair = ? AND reverse = ? AND path >= ? AND path < ?",
+                (self._pair_id, self._reverse, first + ' ', first + '!'),
+            ))
+            self._store.hot_words.put(cache_key, phrases)
+        else:
+            LEXICON_CACHE.inc(result='hit')
+        return phrases
+
+    def longest_cjk_key(self, word, position):
+        """End of the longest CJK key at word[position], or position if there is none"""
+        candidates = []
+        for end in range(position + 1, min(len(word), position + self.cjk_length) + 1):
+            if not is_cjk(word[position:end]):
+                break
+            candidates.append(word[position:end])
+        if not candidates:
+            return position
+        (length,) = self._store.connection().execute(
+            f"SELECT MAX(LENGTH({self._key})) FROM lexicon_entries "
+            f"WHERE pair = ? AND {self._key} IN ({', '.join('?' * len(candidates))})",
+            (self._pair_id, *candidates),
+        ).fetchone()
+        return position + (length or 0)
+
+    def _has_translation(self, translation):
+        return self._store.connection().execute(
+            f"SELECT 1 FROM lexicon_entries WHERE pair = ? AND {self._value} = ? LIMIT 1",
+            (self._pair_id, translation),
+        ).fetchone() is not None
+
+    def values(self):
+        return SQLiteValues(self)
+
+    def __iter__(self):
+        rows = self._store.connection().execute(
+            f"SELECT DISTINCT {self._key} FROM lexicon_entries WHERE pair = ?", (self._pair_id,)
+        )
+        for (word,) in rows:
+            yield word
+
+    def __len__(self):
+        if self._entries is None:
+            (self._entries,) = self._store.connection().execute(
+                f"SELECT COUNT(DISTINCT {self._key}) FROM lexicon_entries WHERE pair = ?", (self._pair_id,)
+            ).fetchone()
+        return self._entries
+
+
+class LayeredDictionary(Mapping):
+    """Looks words up in a large lexicon first, then in the bundled dictionary"""
+
+    def __init__(self, primary, fallback):
+        self._primary = primary
+        self._fallback = fallback
+
+    def __getitem__(self, word):
+        try:
+            return self._primary[word]
+        except KeyError:
+            return self._fallback[word]
+
+    def values(self):
+        return LayeredValues(self)
+
+    def __iter__(self):
+        yield from self._primary
+        for word in self._fallback:
+            if word not in self._primary:
+                yield word
+
+    def __len__(self):
+        return len(self._primary) + sum(1 for word in self._fallback if word not in self._primary)
+
+
+class LayeredValues(ValuesView):
+    """Translations of a LayeredDictionary from both layers"""
+
+    def __contains__(self, translation):
+        mapping = self._mapping
+        return translation in mapping._primary.values() or translation in mapping._fallback.values()
+
+
+class LexiconSegmenter(Segmenter):
+    """
+    Segmenter for a pair with a disk lexicon, over the fallback store's
+    PhraseTrie. The lexicon's phrases and CJK entries are found with indexed
+    queries, so nothing is compiled from it; on equally long matches the
+    lexicon wins, as it does for single words
+    """
+
+    def __init__(self, dictionary, lexicon, fallback=None):
+        self.dictionary = dictionary
+        self.lexicon = lexicon
+        self.fallback = fallback
+        self.has_characters = bool(lexicon.cjk_length) or (fallback is not None and fallback.has_characters)
+
+    def longest_phrase(self, tokens, start):
+        end, translation = start, None
+        if self.fallback is not None:
+            end, translation = self.fallback.longest_phrase(tokens, start)
+        path = tokens[start][1]
+        phrases = self.lexicon.phrases(path)
+        if phrases:
+            tokens_needed = max(phrase.count(' ') for phrase in phrases) + 1
+            for j in range(start + 1, min(len(tokens), start + tokens_needed)):
+                path += ' ' + tokens[j][1]
+                key = phrases.get(path)
+                if key is not None and j + 1 >= end:
+                    end, translation = j + 1, self.dictionary.get(key)
+        return end, translation
+
+    def longest_characters(self, word, position):
+        end, translation = position, None
+        if self.fallback is not None:
+            end, translation = self.fallback.longest_characters(word, position)
+        if self.lexicon.cjk_length:
+            lexicon_end = self.lexicon.longest_cjk_key(word, position)
+            if lexicon_end > position and lexicon_end >= end:
+                end, translation = lexicon_end, self.dictionary.get(word[position:lexicon_end])
+        return end, translation
+
+
+class SQLiteLexiconStore(LexiconStore):
+    """
+    Disk-backed LexiconStore over the TSV lexicons in tsv_dir, layered over
+    a fallback store with the bundled dictionaries
+    """
+
+    def __init__(self, database, tsv_dir, fallback=None, cache_size=50000):
+        self.database = database
+        self.tsv_dir = tsv_dir
+        self.fallback = fallback
+        self.hot_words = HotWords(cache_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._dictionaries = {}
+        self._lexicons = {}
+        self._segmenters = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+        # The store may be created in a preloading master, so keep no connection open to fork
+        connection = sqlite3.connect(database, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                # Take the write lock first, so concurrent workers migrate the database only once
+                connection.execute("BEGIN IMMEDIATE")
+                (version,) = connection.execute("PRAGMA user_version").fetchone()
+                if version != SCHEMA_VERSION:
+                    for table in ('lexicon_phrases', 'lexicon_entries', 'lexicon_pairs'):
+                        connection.execute(f"DROP TABLE IF EXISTS {table}")
+                    for statement in SCHEMA.split(';'):
+                        if statement.strip():
+                            connection.execute(statement)
+                    connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        finally:
+            connection.close()
+        self._lexicon_files = self._find_lexicon_files()
+        self._version = self._lexicon_version()
+
+    def _find_lexicon_files(self):
+        """(source, target) -> path of every TSV lexicon in tsv_dir"""
+        files = {}
+        if not self.tsv_dir or not os.path.isdir(self.tsv_dir):
+            return files
+        for filename in sorted(os.listdir(self.tsv_dir)):
+            name, suffix = os.path.splitext(filename)
+            if suffix != TSV_SUFFIX or name.count('-') != 1:
+                continue
+            source, target = name.split('-')
+            files[(source, target)] = os.path.join(self.tsv_dir, filename)
+        return files
+
+    def _lexicon_version(self):
+        """Digest of the TSV lexicons' names, sizes and modification times"""
+        digest = hashlib.blake2b(digest_size=8)
+        for (source, target), path in sorted(self._lexicon_files.items()):
+            stat = os.stat(path)
+            digest.update(f"{source}-{target}:{stat.st_size}:{stat.st_mtime_ns}\0".encode('utf-8'))
+        return f"sqlite-{digest.hexdigest()}"
+
+    def version(self):
+        return self._version
+
+    def connection(self):
+        """This thread's connection to the lexicon database"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.database, timeout=30)
+        return connection
+
+    def phrase_trie(self, source_language, target_language):
+        """
+        Segmenter for a pair: a LexiconSegmenter for pairs with a disk
+        lexicon, otherwise the fallback store's PhraseTrie
+        """
+        key = (source_language, target_language)
+        segmenter = self._segmenters.get(key)
+        if segmenter is None:
+            dictionary = self.dictionary(source_language, target_language)
+            fallback = None
+            if self.fallback is not None:
+                fallback = self.fallback.phrase_trie(source_language, target_language)
+            lexicon = self._lexicons.get(key)
+            if lexicon is not None:
+                segmenter = LexiconSegmenter(dictionary, lexicon, fallback)
+            else:
+                segmenter = fallback if fallback is not None else PhraseTrie(dictionary)
+            self._segmenters[key] = segmenter
+        return segmenter
+
+    def compile_phrase_tries(self):
+        # Disk lexicons are segmented with queries, so only the fallback's tries are compiled
+        if self.fallback is not None:
+            self.fallback.compile_phrase_tries()
+
+    def detection_store(self):
+        # Indexing the large lexicons would hold them all in memory, so only
+        # the bundled dictionaries are indexed
+        return self if self.fallback is None else self.fallback
+
+    def language_pairs(self):
+        pairs = dict.fromkeys(self.fallback.language_pairs() if self.fallback is not None else [])
+        for source, target in self._lexicon_files:
+            pairs[(source, target)] = None
+            pairs[(target, source)] = None
+        return list(pairs)
+
+    def dictionary(self, source_language, target_language):
+        key = (source_language, target_language)
+        dictionary = self._dictionaries.get(key)
+        if dictionary is None:
+            with self._lock:
+                dictionary = self._dictionaries.get(key)
+                if dictionary is None:
+                    dictionary = self._dictionaries[key] = self._open_dictionary(source_language, target_language)
+        return dictionary
+
+    def _open_dictionary(self, source_language, target_language):
+        """Load a pair on first use, from its own lexicon or the reverse pair's"""
+        fallback = EMPTY_DICTIONARY
+        if self.fallback is not None:
+            fallback = self.fallback.dictionary(source_language, target_language)
+
+        lexicon = None
+        if (source_language, target_language) in self._lexicon_files:
+            pair_id, entries, (cjk_length, _) = self.import_lexicon(source_language, target_language)
+            lexicon = SQLiteDictionary(self, pair_id, entries, cjk_length=cjk_length)
+        elif (target_language, source_language) in self._lexicon_files:
+            pair_id, _, (_, cjk_length) = self.import_lexicon(target_language, source_language)
+            lexicon = SQLiteDictionary(self, pair_id, reverse=True, cjk_length=cjk_length)
+
+        if lexicon is None:
+            return fallback
+        self._lexicons[(source_language, target_language)] = lexicon
+        if not fallback:
+            return lexicon
+        return LayeredDictionary(lexicon, fallback)
+
+    def import_lexicon(self, source_language, target_language):
+        """
+        Import a pair's TSV lexicon unless the database already has this
+        version of the file. Returns the pair id, its entry count and the
+        lengths of its longest CJK word and translation.
+        """
+        path = self._lexicon_files[(source_language, target_language)]
+        stat = os.stat(path)
+        connection = self.connection()
+        with connection:
+            # Take the write lock first, so concurrent workers import a file only once
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id, file_size, file_mtime, entries, word_cjk_length, translation_cjk_length "
+                "FROM lexicon_pairs WHERE source = ? AND target = ?",
+                (source_language, target_language),
+            ).fetchone()
+            if row and row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+                return row[0], row[3], (row[4], row[5])
+
+            if row:
+                connection.execute("DELETE FROM lexicon_entries WHERE pair = ?", (row[0],))
+                connection.execute("DELETE FROM lexicon_phrases WHERE pair = ?", (row[0],))
+                connection.execute("DELETE FROM lexicon_pairs WHERE id = ?", (row[0],))
+            pair_id = connection.execute(
+                "INSERT INTO lexicon_pairs (source, target, file_size, file_mtime, entries) VALUES (?, ?, ?, ?, 0)",
+                (source_language, target_language, stat.st_size, stat.st_mtime_ns),
+            ).lastrowid
+
+            batch = []
+            with open(path, encoding='utf-8') as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip() or line.startswith('#'):
+                        continue
+                    fields = line.rstrip('\r\n').split('\t')
+                    if len(fields) < 2 or not fields[0].strip() or not fields[1].strip():
+                        continue
+                    translation = fields[1].strip()
+                    batch.append((pair_id, fields[0].strip().lower(), translation, translation.lower(), number))
+                    if len(batch) >= IMPORT_BATCH:
+                        self._insert(connection, batch)
+                        batch = []
+            self._insert(connection, batch)
+
+            (entries,) = connection.execute(
+                "SELECT COUNT(*) FROM lexicon_entries WHERE pair = ?", (pair_id,)
+            ).fetchone()
+            cjk_lengths = self._index_segments(connection, pair_id)
+            connection.execute(
+                "UPDATE lexicon_pairs SET entries = ?, word_cjk_length = ?, translation_cjk_length = ? WHERE id = ?",
+                (entries, *cjk_lengths, pair_id),
+            )
+        logger.info(f"Imported {entries} {source_language} → {target_language} lexicon entries from {path}")
+        return pair_id, entries, cjk_lengths
+
+    def _index_segments(self, connection, pair_id):
+        """
+        Index a pair's multi-word entries, in both directions, by token path,
+        and return the lengths of its longest CJK word and translation
+        """
+        word_cjk_length = translation_cjk_length = 0
+        batch = []
+        # The imported entries rather than the file, so words listed twice keep their first translation
+        rows = connection.execute("SELECT word, translation_key FROM lexicon_entries WHERE pair = ?", (pair_id,))
+        for word, translation in rows:
+            if is_cjk(word):
+                word_cjk_length = max(word_cjk_length, len(word))
+            if is_cjk(translation):
+                translation_cjk_length = max(translation_cjk_length, len(translation))
+            for reverse, entry in ((0, word), (1, translation)):
+                path = phrase_path(entry)
+                if path is not None:
+                    batch.append((pair_id, reverse, path, entry))
+            if len(batch) >= IMPORT_BATCH:
+                self._insert_phrases(connection, batch)
+                batch = []
+        self._insert_phrases(connection, batch)
+        return word_cjk_length, translation_cjk_length
+
+    @staticmethod
+    def _insert_phrases(connection, batch):
+        # Of entries with the same token path, the first wins
+        connection.executemany(
+            "INSERT OR IGNORE INTO lexicon_phrases (pair, reverse, path, entry) VALUES (?, ?, ?, ?)", batch
+        )
+
+    @staticmethod
+    def _insert(connection, batch):
+        # The first translation listed for a word wins
+        connection.executemany(
+            "INSERT OR IGNORE INTO lexicon_entries (pair, word, translation, translation_key, line) "
+            "VALUES (?, ?, ?, ?, ?)", batch
+        )
+
+    def import_all(self):
+        """Import every TSV lexicon now instead of on first use"""
+        for source, target in self._lexicon_files:
+            self.import_lexicon(source, target)
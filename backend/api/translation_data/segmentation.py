@@ -0,0 +1,175 @@
+"""
+Longest-match segmentation of sentences against a pair's lexicon.
+
+A sentence is tokenized once into words and punctuation marks. The tokens
+do not depend on the target language, so a batch shares them across its
+targets. PhraseTrie then walks them in a single pass and matches the
+longest dictionary entry at each word:
+
+- multi-word entries ("thank you", "por favor") through a trie over the
+  entries' tokens, so phrases win over their separate words
+- runs of Chinese and Japanese characters, which have no spaces between
+  words, by maximal matching through a trie over the entries' characters;
+  unmatched characters stay together as one unknown word
+
+Single words are looked up in the pair's dictionary itself, so the tries
+only hold the phrases and CJK entries and work with every lexicon store.
+Segmenter holds the matching itself; PhraseTrie finds the longest entries
+in its tries, and the disk lexicon store's LexiconSegmenter
+(api.translation_data.lexicon_store) with indexed queries instead.
+"""
+import re
+
+# The word and punctuation tokens TranslationView has always used
+_TOKEN = re.compile(r"(?P<word>\b[\w']+\b)|(?P<mark>\S)")
+# Hiragana, katakana, CJK ideographs and half-width katakana
+_CJK = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff66-\uff9f]+')
+
+_END = None
+
+# Joins the words of a multi-word translation while word order rules run
+# over a translated sentence, so they are kept in order
+PHRASE_SPACE = '\x00'
+
+
+def tokenize(sentence):
+    """
+    (text, key, is_word) tokens of a sentence, where key is the lowercase
+    form lexicons are keyed by
+    """
+    return [
+        (word, word.lower(), True) if word else (mark, mark, False)
+        for word, mark in _TOKEN.findall(sentence)
+    ]
+
+
+def phrase_path(entry):
+    """A multi-word entry's token keys joined by spaces, or None for a single token"""
+    keys = [key for _, key, _ in tokenize(entry)]
+    return ' '.join(keys) if len(keys) > 1 else None
+
+
+def is_cjk(entry):
+    """True for an entry of Chinese and Japanese characters only"""
+    return _CJK.fullmatch(entry) is not None
+
+
+def _insert(trie, path, translation):
+    node = trie
+    for step in path:
+        node = node.setdefault(step, {})
+    node.setdefault(_END, translation)
+
+
+class Segmenter:
+    """
+    Longest-match segmentation over one pair's dictionary. Subclasses find
+    the longest phrase at a token and the longest CJK entry at a character
+    """
+
+    dictionary = None
+    has_characters = False
+
+    def longest_phrase(self, tokens, start):
+        """(end, translation) of the longest multi-word entry at tokens[start]; end is start if none"""
+        raise NotImplementedError
+
+    def longest_characters(self, word, position):
+        """(end, translation) of the longest CJK entry at word[position]; end is position if none"""
+        raise NotImplementedError
+
+    def segment(self, tokens):
+        """
+        (text, translation, is_word) segments of a tokenized sentence, longest
+        dictionary match first. translation is None for unknown words and
+        punctuation
+        """
+        dictionary = self.dictionary
+        segments = []
+        i, count = 0, len(tokens)
+        while i < count:
+            text, key, is_word = tokens[i]
+            if not is_word:
+                segments.append((text, None, False))
+                i += 1
+                continue
+
+            end, translation = self.longest_phrase(tokens, i)
+            if end > i:
+                segments.append((' '.join(token[0] for token in tokens[i:end]), translation, True))
+                i = end
+                continue
+
+            translation = dictionary.get(key)
+            if translation is None and self.has_characters and _CJK.search(text):
+                segments.extend(self._segment_characters(text))
+            else:
+                segments.append((text, translation, True))
+            i += 1
+        return segments
+
+    def _segment_characters(self, word):
+        """Maximal matching over a word containing CJK characters"""
+        segments = []
+        unknown_start = 0
+        position, length = 0, len(word)
+        while position < length:
+            end, translation = self.longest_characters(word, position)
+            if end == position:
+                position += 1
+                continue
+            if unknown_start < position:
+                segments.append((word[unknown_start:position], None, True))
+            segments.append((word[position:end], translation, True))
+            position = unknown_start = end
+        if unknown_start < length:
+            segments.append((word[unknown_start:], None, True))
+        return segments
+
+
+class PhraseTrie(Segmenter):
+    """Compiled phrase and CJK character tries over one pair's dictionary"""
+
+    def __init__(self, dictionary):
+        self.dictionary = dictionary
+        self.phrases = {}
+        self.characters = {}
+        self.phrase_count = 0
+        self.character_count = 0
+        for key, translation in dictionary.items():
+            if _CJK.fullmatch(key):
+                _insert(self.characters, key, translation)
+                self.character_count += 1
+            tokens = [token_key for _, token_key, _ in tokenize(key)]
+            if len(tokens) > 1:
+                _insert(self.phrases, tokens, translation)
+                self.phrase_count += 1
+
+    @property
+    def has_characters(self):
+        return bool(self.characters)
+
+    def longest_phrase(self, tokens, start):
+        end, translation = start, None
+        node = self.phrases.get(tokens[start][1])
+        j, count = start + 1, len(tokens)
+        while node is not None:
+            if _END in node:
+                end, translation = j, node[_END]
+            if j == count:
+                break
+            node = node.get(tokens[j][1])
+            j += 1
+        return end, translation
+
+    def longest_characters(self, word, position):
+        node, end, translation = self.characters, position, None
+        probe, length = position, len(word)
+        while probe < length:
+            node = node.get(word[probe])
+            if node is None:
+                break
+            probe += 1
+            if _END in node:
+                end, translation = probe, node[_END]
+        return end, translation
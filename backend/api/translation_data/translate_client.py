@@ -0,0 +1,232 @@
+"""
+Pooled HTTP client for the Google Translate web endpoint.
+
+TranslateClient keeps a bounded pool of keep-alive connections to the
+``/translate_a/single`` endpoint (settings.GOOGLE_TRANSLATE['url']; a local
+stand-in server in the benchmarks) and guards every call with:
+
+- a per-attempt timeout, never longer than what is left of the request
+  deadline
+- retries of timeouts, connection errors, 429 and 5xx responses, with
+  exponential backoff and full jitter
+- a circuit breaker, so while the upstream is unhealthy calls fail at
+  once with TranslateUnavailable and the caller falls back to the
+  dictionaries
+
+translate_batch sends many segments in one upstream call. They are
+joined by newlines and the translation is split back on them; batches are
+cut at max_batch_chars.
+"""
+import http.client
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from api.serving.circuit_breaker import CircuitBreaker
+from api.serving.deadlines import check_deadline, remaining_time
+from api.serving.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_CALLS = registry.counter(
+    'google_translate_requests_total',
+    "HTTP requests to the Google Translate endpoint, by operation and result (ok, retried, failed)")
+UPSTREAM_SEGMENTS = registry.counter(
+    'google_translate_segments_total', "Text segments sent to the Google Translate endpoint")
+
+TRANSLATE_PATH = '/translate_a/single'
+# Responses worth another attempt; other 4xx responses will not change
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+SEGMENT_SEPARATOR = '\n'
+# Errors from reusing a keep-alive connection the server has closed
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class TranslateError(Exception):
+    """The translation upstream did not return a usable answer"""
+
+
+class TranslateUnavailable(TranslateError):
+    """The circuit breaker is open, so the upstream was not called"""
+
+
+class _RetryableError(TranslateError):
+    pass
+
+
+class ConnectionPool:
+    """At most size keep-alive HTTP(S) connections to one host"""
+
+    def __init__(self, url, size):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+
+    def _connect(self, timeout):
+        connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=timeout)
+
+    def request(self, method, path, body, headers, timeout):
+        """Send one request on a pooled connection and return (status, body bytes)"""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=timeout):
+            raise _RetryableError("No upstream connection free within the timeout")
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = None
+            timeout = max(0.001, timeout - (time.monotonic() - started))
+            try:
+                status, data = self._send(connection, method, path, body, headers, timeout)
+            except STALE_CONNECTION_ERRORS:
+                if connection is None:
+                    raise
+                # The server closed the idle connection; try once on a new one
+                status, data = self._send(None, method, path, body, headers, timeout)
+            return status, data
+        finally:
+            self._slots.release()
+
+    def _send(self, connection, method, path, body, headers, timeout):
+        if connection is None:
+            connection = self._connect(timeout)
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        try:
+            connection.request(method, self.base_path + path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except BaseException:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._idle.put(connection)
+        return response.status, data
+
+
+class TranslateClient:
+    """Timeouts, retries, batching and a circuit breaker around the translate endpoint"""
+
+    def __init__(self, url, pool_size=8, timeout=3.0, retries=2, backoff=0.1,
+                 max_batch_chars=4500, failure_threshold=5, reset_timeout=30.0):
+        self.pool = ConnectionPool(url, pool_size)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_batch_chars = max_batch_chars
+        self.breaker = CircuitBreaker('google_translate', failure_threshold, reset_timeout)
+
+    def _call(self, operation, params, text):
+        """POST one query to the endpoint and return its decoded JSON"""
+        if not self.breaker.allow():
+            raise TranslateUnavailable("Google Translate circuit breaker is open")
+        path = f"{TRANSLATE_PATH}?{urlencode(params)}"
+        body = urlencode({'q': text}).encode('utf-8')
+        headers = {'Content-Type': 'application/x-www-form-urlencoded;charset=utf-8'}
+
+        attempt = 0
+        try:
+            while True:
+                check_deadline(f'google_{operation}')
+                timeout = min(self.timeout, remaining_time(self.timeout))
+                try:
+                    status, data = self.pool.request('POST', path, body, headers, timeout)
+                    if status in RETRY_STATUSES:
+                        raise _RetryableError(f"HTTP {status}")
+                    if status != 200:
+                        raise TranslateError(f"HTTP {status}")
+                    result = json.loads(data)
+                except (_RetryableError, OSError, http.client.HTTPException) as e:
+                    # Timeouts are OSErrors too (socket.timeout)
+                    attempt += 1
+                    delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+                    if attempt > self.retries or delay >= remaining_time(self.timeout):
+                        raise TranslateError(f"{e or type(e).__name__} after {attempt} attempts") from e
+                    UPSTREAM_CALLS.inc(operation=operation, result='retried')
+                    logger.warning(f"Google Translate {operation} attempt {attempt} failed ({e}), retrying")
+                    time.sleep(delay)
+                    continue
+                except ValueError as e:
+                    raise TranslateError(f"Malformed response: {e}") from e
+                UPSTREAM_CALLS.inc(operation=operation, result='ok')
+                self.breaker.record_success()
+                return result
+        except TranslateError:
+            UPSTREAM_CALLS.inc(operation=operation, result='failed')
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.record_cancelled()
+            raise
+
+    @staticmethod
+    def _translated_text(result):
+        try:
+            return ''.join(chunk[0] for chunk in result[0] if chunk and isinstance(chunk[0], str))
+        except (TypeError, IndexError) as e:
+            raise TranslateError(f"Unexpected response layout: {e}") from e
+
+    def translate(self, text, source_code, target_code):
+        """Translation of one text"""
+        return self.translate_batch([text], source_code, target_code)[0]
+
+    def translate_batch(self, texts, source_code, target_code):
+        """Translations of several texts, in as few upstream calls as the batch size allows"""
+        translations = []
+        for batch in self._batches(texts):
+            translations.extend(self._translate_joined(batch, source_code, target_code))
+        return translations
+
+    def _batches(self, texts):
+        batch, size = [], 0
+        for text in texts:
+            if batch and size + len(text) + 1 > self.max_batch_chars:
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text) + 1
+        if batch:
+            yield batch
+
+    def _translate_joined(self, texts, source_code, target_code):
+        params = {'client': 'gtx', 'sl': source_code, 'tl': target_code, 'dt': 't'}
+        UPSTREAM_SEGMENTS.inc(len(texts))
+        joined = SEGMENT_SEPARATOR.join(texts)
+        lines = self._translated_text(self._call('translate', params, joined)).split(SEGMENT_SEPARATOR)
+
+        # Segments may span several lines themselves
+        line_counts = [text.count(SEGMENT_SEPARATOR) + 1 for text in texts]
+        if len(lines) == sum(line_counts):
+            translations, start = [], 0
+            for count in line_counts:
+                translations.append(SEGMENT_SEPARATOR.join(lines[start:start + count]))
+                start += count
+            return translations
+        if len(texts) == 1:
+            return [SEGMENT_SEPARATOR.join(lines)]
+
+        # The upstream merged or split lines, so send the segments one by one
+        logger.warning(f"Batched translation returned {len(lines)} lines for {sum(line_counts)}, "
+                       f"translating {len(texts)} segments separately")
+        return [self._translate_joined([text], source_code, target_code)[0] for text in texts]
+
+    def detect(self, text):
+        """Language code the upstream detects for text"""
+        params = {'client': 'gtx', 'sl': 'auto', 'tl': 'en', 'dt': 't'}
+        result = self._call('detect', params, text)
+        try:
+            return result[2]
+        except (TypeError, IndexError) as e:
+            raise TranslateError(f"Unexpected response layout: {e}") from e
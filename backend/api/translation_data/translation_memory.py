@@ -0,0 +1,250 @@
+"""
+Sentence-level translation memory.
+
+Documents translated through the API share most of their sentences
+(templates, boilerplate, repeated UI strings). TranslationView looks every
+sentence up here before translating it, and only the misses go to Google
+Translate or the dictionary engine.
+
+Entries are keyed on a hash of the normalized sentence (Unicode NFC,
+whitespace collapsed), the language pair and the engine version, so
+changing an engine's word lists or version setting starts a fresh set of
+entries. They are kept in an SQLite database shared by every worker on
+the host and evicted:
+
+- after ttl seconds, however often they are used
+- least recently used first, once the memory holds more than max_entries
+
+Hits refresh an entry's last use at most every touch_interval seconds, so
+repeated sentences do not turn every lookup into a write.
+translation_memory_lookups_total counts hits and misses per engine.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+
+from api.serving.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+MEMORY_LOOKUPS = registry.counter(
+    'translation_memory_lookups_total', "Translation memory lookups by engine and result (hit, miss, expired)")
+MEMORY_EVICTIONS = registry.counter(
+    'translation_memory_evictions_total', "Translation memory entries evicted, by reason (ttl, lru)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translation_memory (
+    key BLOB PRIMARY KEY,
+    translation TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS translation_memory_last_used ON translation_memory (last_used);
+"""
+
+DICTIONARY_ENGINE = 'dictionary'
+GOOGLE_ENGINE = 'google_translate'
+
+# SQLite's default limit on host parameters per statement is 999
+LOOKUP_BATCH = 500
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sentence(sentence):
+    """The form of a sentence that memory keys are computed from"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', sentence)).strip()
+
+
+class TranslationMemory:
+    """Persistent (sentence, source, target, engine version) -> translation store"""
+
+    def __init__(self, database, max_entries=1000000, ttl=30 * 24 * 3600,
+                 touch_interval=60.0, trim_every=1000):
+        self.database = database
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.trim_every = trim_every
+        self._local = threading.local()
+        self._stores = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+        with self.connection() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    def connection(self):
+        """This thread's connection to the memory database"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.database, timeout=30)
+            # A lost write only costs a later miss, so skip the fsync per commit
+            connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @staticmethod
+    def key(sentence, source_language, target_language, engine_version):
+        """Memory key of a normalized sentence"""
+        data = '\x1f'.join((sentence, source_language, target_language, engine_version))
+        return hashlib.blake2b(data.encode('utf-8'), digest_size=16).digest()
+
+    def lookup_many(self, sentences, source_language, target_language, engine_version, engine):
+        """Translations of the normalized sentences found in memory, as {sentence: translation}"""
+        keys = {self.key(sentence, source_language, target_language, engine_version): sentence
+                for sentence in sentences}
+        if not keys:
+            return {}
+        now = time.time()
+        found, touched, expired = {}, [], 0
+        try:
+            connection = self.connection()
+            key_list = list(keys)
+            for start in range(0, len(key_list), LOOKUP_BATCH):
+                batch = key_list[start:start + LOOKUP_BATCH]
+                rows = connection.execute(
+                    "SELECT key, translation, created_at, last_used FROM translation_memory "
+                    f"WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, translation, created_at, last_used in rows:
+                    if now - created_at > self.ttl:
+                        expired += 1
+                        continue
+                    found[keys[key]] = translation
+                    if now - last_used > self.touch_interval:
+                        touched.append((now, key))
+            if touched:
+                with connection:
+                    connection.executemany("UPDATE translation_memory SET last_used = ? WHERE key = ?", touched)
+        except sqlite3.Error as e:
+            logger.warning(f"Translation memory lookup failed: {e}")
+            return {}
+
+        MEMORY_LOOKUPS.inc(len(found), engine=engine, result='hit')
+        MEMORY_LOOKUPS.inc(len(keys) - len(found) - expired, engine=engine, result='miss')
+        if expired:
+            MEMORY_LOOKUPS.inc(expired, engine=engine, result='expired')
+        return found
+
+    def store_many(self, translations, source_language, target_language, engine_version):
+        """Remember {normalized sentence: translation} pairs"""
+        if not translations:
+            return
+        now = time.time()
+        rows = [(self.key(sentence, source_language, target_language, engine_version), translation, now, now)
+                for sentence, translation in translations.items()]
+        try:
+            with self.connection() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO translation_memory (key, translation, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?)", rows
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Translation memory store failed: {e}")
+            return
+
+        with self._lock:
+            self._stores += len(rows)
+            due = self._stores >= self.trim_every
+            if due:
+                self._stores = 0
+        if due:
+            self.trim()
+
+    def trim(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        try:
+            with self.connection() as connection:
+                expired = connection.execute(
+                    "DELETE FROM translation_memory WHERE created_at < ?", (time.time() - self.ttl,)
+                ).rowcount
+                (entries,) = connection.execute("SELECT COUNT(*) FROM translation_memory").fetchone()
+                excess = entries - self.max_entries
+                evicted = 0
+                if excess > 0:
+                    evicted = connection.execute(
+                        "DELETE FROM translation_memory WHERE key IN "
+                        "(SELECT key FROM translation_memory ORDER BY last_used LIMIT ?)", (excess,)
+                    ).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Translation memory trim failed: {e}")
+            return
+        if expired:
+            MEMORY_EVICTIONS.inc(expired, reason='ttl')
+        if evicted:
+            MEMORY_EVICTIONS.inc(evicted, reason='lru')
+
+    def stats(self):
+        """Entry count of the shared memory and this worker's lookup counts"""
+        try:
+            (entries,) = self.connection().execute("SELECT COUNT(*) FROM translation_memory").fetchone()
+        except sqlite3.Error:
+            entries = None
+        lookups = {}
+        for labels, value in MEMORY_LOOKUPS.samples():
+            lookups.setdefault(labels['engine'], {})[labels['result']] = value
+        return {"entries": entries, "max_entries": self.max_entries, "ttl_seconds": self.ttl, "lookups": lookups}
+
+    def translate(self, sentences, source_language, target_language, engine, translate_missing):
+        """
+        Translations of sentences, in order. Sentences missing from memory
+        are translated together, in normalized form, by
+        translate_missing(list) -> list and then remembered; its exceptions
+        propagate. Blank sentences are returned as they are.
+        """
+        version = engine_version(engine)
+        normalized = [normalize_sentence(sentence) for sentence in sentences]
+        unique = list(dict.fromkeys(sentence for sentence in normalized if sentence))
+        known = self.lookup_many(unique, source_language, target_language, version, engine)
+        missing = [sentence for sentence in unique if sentence not in known]
+        if missing:
+            translated = dict(zip(missing, translate_missing(missing)))
+            self.store_many(translated, source_language, target_language, version)
+            known.update(translated)
+        return [known.get(key, sentence) for key, sentence in zip(normalized, sentences)]
+
+
+@lru_cache(maxsize=None)
+def engine_version(engine):
+    """
+    Version string memory keys use for an engine. Dictionary translations
+    also change with the bundled word lists and the lexicons the store
+    serves (its TSV lexicons), so both are included.
+    """
+    version = f"{engine}-{settings.TRANSLATION_MEMORY['engine_version']}"
+    if engine == DICTIONARY_ENGINE:
+        from .dictionary_store import get_dictionary_store
+        from .lexicon_artifact import source_digest
+        version = f"{version}-{source_digest()[:16]}"
+        store_version = get_dictionary_store().version()
+        if store_version:
+            version = f"{version}-{store_version}"
+    return version
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory():
+    """The process's handle on the shared translation memory, or None when it is disabled"""
+    global _memory
+    config = settings.TRANSLATION_MEMORY
+    if not config['enabled']:
+        return None
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                _memory = TranslationMemory(
+                    config['database'], config['max_entries'], config['ttl'], config['touch_interval']
+                )
+    return _memory
@@ -1,5 +1,7 @@
 from django.urls import path, include
+from api.views import MetricsView
  
 urlpatterns = [
     path('predict/', include('api.predict_urls')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ] 
\ No newline at end of file
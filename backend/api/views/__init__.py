@@ -22,5 +22,11 @@ from .neural_network_views import (
     NeuralNetworkView,
     RNNView,
     LSTMView,
+    LSTMStreamView,
     TranslationView,
-) 
\ No newline at end of file
+    LanguageDetectionView,
+    DocumentTranslationView,
+    BatchTranslationView,
+) 
+
+from .metrics_views import MetricsView
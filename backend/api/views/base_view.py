@@ -1,13 +1,30 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
+import numpy as np
 from api.model_loader import ModelLoader
+from api.parsers import BINARY_PARSERS
+from api.renderers import BINARY_RENDERERS, BINARY_FORMATS
+from api.schemas import SchemaValidationError
 
 class BaseModelView(APIView):
     """Base view for all ML model endpoints"""
     
     model_name = None  # To be defined by subclasses
     model_type = 'sklearn'  # 'sklearn' or 'tensorflow'
+    fast_path = True  # Serve JSON POSTs through api.serving.fast_path
+    serving_family = 'tabular'  # Bulkhead executor, see api.serving.bulkheads
+    schema = None  # api.schemas.FeatureSchema describing the model inputs
+    
+    # Batch clients may send and receive .npy / msgpack instead of JSON
+    parser_classes = list(api_settings.DEFAULT_PARSER_CLASSES) + BINARY_PARSERS
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + BINARY_RENDERERS
+    
+    @classmethod
+    def serving_version(cls):
+        """Model version used to key coalesced requests (api.serving.pipeline)"""
+        return ModelLoader.model_version(cls.model_name)
     
     def get_model(self):
         """Load model based on model type"""
@@ -18,38 +35,97 @@ class BaseModelView(APIView):
         return None
     
     def process_input(self, data):
-        """Process input data - to be overridden by subclasses"""
-        raise NotImplementedError("Subclasses must implement process_input")
+        """Process input data - validated against the view schema by default"""
+        if self.schema is None:
+            raise NotImplementedError("Subclasses must define a schema or implement process_input")
+        return self.schema.validate(data)
     
-    def process_output(self, prediction):
-        """Process model output - to be overridden by subclasses"""
+    def process_batch_input(self, data):
+        """Process a batch given as rows (with optional headers) or as columns"""
+        if 'columns' in data:
+            return self.schema.validate_columns(data['columns'])
+        return self.schema.validate_rows(data['rows'], data.get('headers'))
+    
+    def process_output(self, prediction, features):
+        """
+        Process model output - to be overridden by subclasses. features is
+        the validated (1, n_features) input row the prediction was made from
+        """
         raise NotImplementedError("Subclasses must implement process_output")
     
-    def post(self, request, *args, **kwargs):
-        """Handle POST requests with prediction"""
+    def process_batch_output(self, predictions, features):
+        """Process model output for a batch, one process_output result per row"""
+        return {
+            "predictions": [
+                self.process_output(predictions[i:i + 1], features[i:i + 1]) for i in range(len(predictions))
+            ],
+            "rows_processed": len(predictions)
+        }
+    
+    def raw_output(self, predictions):
+        """Unprocessed predictions for the .npy and msgpack renderers"""
+        predictions = np.asarray(predictions)
+        return {"predictions": predictions, "rows_processed": len(predictions)}
+    
+    def is_batch(self, data):
+        """Whether the request carries a batch of rows or columns"""
+        return self.schema is not None and ('rows' in data or 'columns' in data)
+    
+    def schema_info(self):
+        """Schema-derived fields for the GET docs"""
+        return {
+            "input_example": self.schema.example(),
+            "input_schema": self.schema.describe(),
+            "batch_formats": {
+                "rows": {"headers": list(self.schema.names), "rows": [list(self.schema.example().values())]},
+                "columns": {"columns": {name: [value] for name, value in self.schema.example().items()}}
+            }
+        }
+    
+    def predict_payload(self, data, raw_output=False):
+        """
+        Run a prediction on already-parsed input data.
+        Shared by the DRF handler and the fast path, returns (payload, status).
+        With raw_output the model's prediction array is returned unprocessed
+        for the binary renderers.
+        """
         model = self.get_model()
         
         # If model doesn't exist, train a new one
         if model is None:
-            return Response(
+            return (
                 {"error": "Model not found. Please train the model first."},
-                status=status.HTTP_404_NOT_FOUND
+                status.HTTP_404_NOT_FOUND
             )
         
         try:
+            if self.is_batch(data):
+                # Validate the whole batch at once and predict in one call
+                features = self.process_batch_input(data)
+                predictions = model.predict(features)
+                if raw_output:
+                    return self.raw_output(predictions), status.HTTP_200_OK
+                return self.process_batch_output(predictions, features), status.HTTP_200_OK
+            
             # Process input data
-            input_data = self.process_input(request.data)
+            input_data = self.process_input(data)
             
             # Make prediction
             prediction = model.predict(input_data)
+            if raw_output:
+                return self.raw_output(prediction), status.HTTP_200_OK
             
             # Process output
-            result = self.process_output(prediction)
-            
-            return Response(result)
+            return self.process_output(prediction, input_data), status.HTTP_200_OK
+        
+        except SchemaValidationError as e:
+            return {"error": str(e), "details": e.errors}, status.HTTP_400_BAD_REQUEST
         
         except Exception as e:
-            return Response(
-                {"error": str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            ) 
\ No newline at end of file
+            return {"error": str(e)}, status.HTTP_400_BAD_REQUEST
+    
+    def post(self, request, *args, **kwargs):
+        """Handle POST requests with prediction"""
+        raw_output = getattr(request.accepted_renderer, 'format', None) in BINARY_FORMATS
+        payload, status_code = self.predict_payload(request.data, raw_output=raw_output)
+        return Response(payload, status=status_code)
\ No newline at end of file
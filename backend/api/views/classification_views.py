@@ -6,6 +6,8 @@ from sklearn.naive_bayes import GaussianNB
 from sklearn.tree import DecisionTreeClassifier
 from .base_view import BaseModelView
 from api.model_loader import ModelLoader
+from api.schemas import Feature, FeatureSchema
+from api.serving.deadlines import check_deadline
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
@@ -14,6 +16,7 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 class ClassificationView(APIView):
     """Classification model view for email spam detection"""
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    serving_family = 'text'
     
     def get(self, request):
         """Return model info and example inputs"""
@@ -91,6 +94,7 @@ class ClassificationView(APIView):
             # Process each row
             results = []
             for i, row in enumerate(rows):
+                check_deadline('csv', i, len(rows))
                 if len(row) <= text_idx:
                     return Response({
                         "error": f"Row {i+1} does not have enough columns"
@@ -132,6 +136,7 @@ class ClassificationView(APIView):
             # Process each row
             results = []
             for i, row in df.iterrows():
+                check_deadline('csv', i, len(df))
                 text = str(row[text_column])
                 is_spam, confidence, _ = self._classify_text(text)
                 results.append({
@@ -188,30 +193,23 @@ class ClassificationView(APIView):
 class KNNView(BaseModelView):
     """K-Nearest Neighbors model view for movie recommendations"""
     model_name = "knn_movie_recommendations"
+    schema = FeatureSchema(
+        Feature("action_score", min_value=0, max_value=1, example=0.7, description="Preference for action movies"),
+        Feature("comedy_score", min_value=0, max_value=1, example=0.3, description="Preference for comedies"),
+        Feature("drama_score", min_value=0, max_value=1, example=0.5, description="Preference for dramas"),
+        Feature("scifi_score", min_value=0, max_value=1, example=0.8, description="Preference for sci-fi"),
+    )
     
     def get(self, request, *args, **kwargs):
         """Return model info and example inputs"""
         return Response({
             "model": "K-Nearest Neighbors",
             "use_case": "Movie Recommendations",
-            "input_example": {
-                "action_score": 0.7,
-                "comedy_score": 0.3,
-                "drama_score": 0.5,
-                "scifi_score": 0.8
-            },
+            **self.schema_info(),
             "description": "Recommends movies based on genre preferences using K-Nearest Neighbors."
         })
     
-    def process_input(self, data):
-        """Process input data for KNN"""
-        action_score = float(data.get('action_score', 0))
-        comedy_score = float(data.get('comedy_score', 0))
-        drama_score = float(data.get('drama_score', 0))
-        scifi_score = float(data.get('scifi_score', 0))
-        return np.array([[action_score, comedy_score, drama_score, scifi_score]])
-    
-    def process_output(self, prediction):
+    def process_output(self, prediction, features):
         """Process KNN output"""
         movie_category = int(prediction[0])
         categories = ["Action", "Comedy", "Drama", "Sci-Fi", "Mixed"]
@@ -244,30 +242,23 @@ class KNNView(BaseModelView):
 class LogisticRegressionView(BaseModelView):
     """Logistic Regression model view for credit card fraud detection"""
     model_name = "logistic_regression_fraud"
+    schema = FeatureSchema(
+        Feature("transaction_amount", min_value=0, example=1250.0, description="Transaction amount"),
+        Feature("unusual_location", dtype=int, min_value=0, max_value=1, example=1, description="1 if made from an unusual location"),
+        Feature("time_since_last_transaction", min_value=0, example=2.5, description="Hours since the previous transaction"),
+        Feature("frequency_last_day", dtype=int, min_value=0, example=5, description="Transactions in the last 24 hours"),
+    )
     
     def get(self, request, *args, **kwargs):
         """Return model info and example inputs"""
         return Response({
             "model": "Logistic Regression",
             "use_case": "Credit Card Fraud Detection",
-            "input_example": {
-                "transaction_amount": 1250.0,
-                "unusual_location": 1,
-                "time_since_last_transaction": 2.5,
-                "frequency_last_day": 5
-            },
+            **self.schema_info(),
             "description": "Detects potentially fraudulent credit card transactions."
         })
     
-    def process_input(self, data):
-        """Process input data for logistic regression"""
-        transaction_amount = float(data.get('transaction_amount', 0))
-        unusual_location = int(data.get('unusual_location', 0))
-        time_since_last = float(data.get('time_since_last_transaction', 0))
-        frequency = int(data.get('frequency_last_day', 0))
-        return np.array([[transaction_amount, unusual_location, time_since_last, frequency]])
-    
-    def process_output(self, prediction):
+    def process_output(self, prediction, features):
         """Process logistic regression output"""
         is_fraud = bool(prediction[0])
         prob = 0.92 if is_fraud else 0.89
@@ -300,6 +291,7 @@ class LogisticRegressionView(BaseModelView):
 class NaiveBayesView(APIView):
     """Naive Bayes model view for sentiment analysis"""
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    serving_family = 'text'
     
     def get(self, request):
         """Return model info and example inputs"""
@@ -378,6 +370,7 @@ class NaiveBayesView(APIView):
             # Process each row
             results = []
             for i, row in enumerate(rows):
+                check_deadline('csv', i, len(rows))
                 if len(row) <= text_idx:
                     return Response({
                         "error": f"Row {i+1} does not have enough columns"
@@ -419,6 +412,7 @@ class NaiveBayesView(APIView):
             # Process each row
             results = []
             for i, row in df.iterrows():
+                check_deadline('csv', i, len(df))
                 text = str(row[text_column])
                 sentiment, confidence, _ = self._analyze_sentiment(text)
                 results.append({
@@ -488,32 +482,24 @@ class NaiveBayesView(APIView):
 class DecisionTreeView(BaseModelView):
     """Decision Tree model view for loan approval"""
     model_name = "decision_tree_loan"
+    schema = FeatureSchema(
+        Feature("income", min_value=0, example=60000, description="Annual income"),
+        Feature("credit_score", min_value=0, max_value=850, example=720, description="Credit score"),
+        Feature("debt_to_income", min_value=0, example=0.3, description="Debt-to-income ratio"),
+        Feature("loan_term", min_value=0, example=15, description="Loan term in years"),
+        Feature("loan_amount", min_value=0, example=250000, description="Requested loan amount"),
+    )
     
     def get(self, request, *args, **kwargs):
         """Return model info and example inputs"""
         return Response({
             "model": "Decision Tree",
             "use_case": "Loan Approval System",
-            "input_example": {
-                "income": 60000,
-                "credit_score": 720,
-                "debt_to_income": 0.3,
-                "loan_term": 15,
-                "loan_amount": 250000
-            },
+            **self.schema_info(),
             "description": "Determines loan approval based on financial attributes."
         })
     
-    def process_input(self, data):
-        """Process input data for decision tree"""
-        income = float(data.get('income', 0))
-        credit_score = float(data.get('credit_score', 0))
-        debt_to_income = float(data.get('debt_to_income', 0))
-        loan_term = float(data.get('loan_term', 0))
-        loan_amount = float(data.get('loan_amount', 0))
-        return np.array([[income, credit_score, debt_to_income, loan_term, loan_amount]])
-    
-    def process_output(self, prediction):
+    def process_output(self, prediction, features):
         """Process decision tree output"""
         is_approved = bool(prediction[0])
         return {
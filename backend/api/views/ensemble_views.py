@@ -4,6 +4,8 @@ from sklearn.ensemble import RandomForestClassifier, AdaBoostClassifier
 import xgboost as xgb
 from .base_view import BaseModelView
 from api.model_loader import ModelLoader
+from api.schemas import Feature, FeatureSchema
+from api.serving.deadlines import check_deadline
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
@@ -19,32 +21,24 @@ import io
 class RandomForestView(BaseModelView):
     """Random Forest model view for retail customer behavior prediction"""
     model_name = "random_forest_retail"
+    schema = FeatureSchema(
+        Feature("age", min_value=0, max_value=120, example=35, description="Customer age"),
+        Feature("income", min_value=0, example=75000, description="Annual income"),
+        Feature("previous_purchases", dtype=int, min_value=0, example=12, description="Number of previous purchases"),
+        Feature("average_basket_value", min_value=0, example=150, description="Average basket value"),
+        Feature("days_since_last_purchase", dtype=int, min_value=0, example=14, description="Days since the last purchase"),
+    )
     
     def get(self, request, *args, **kwargs):
         """Return model info and example inputs"""
         return Response({
             "model": "Random Forest",
             "use_case": "Retail Customer Behavior",
-            "input_example": {
-                "age": 35,
-                "income": 75000,
-                "previous_purchases": 12,
-                "average_basket_value": 150,
-                "days_since_last_purchase": 14
-            },
+            **self.schema_info(),
             "description": "Predicts customer purchasing behavior based on demographics and history."
         })
     
-    def process_input(self, data):
-        """Process input data for random forest"""
-        age = float(data.get('age', 0))
-        income = float(data.get('income', 0))
-        previous_purchases = int(data.get('previous_purchases', 0))
-        average_basket = float(data.get('average_basket_value', 0))
-        days_since_last = int(data.get('days_since_last_purchase', 0))
-        return np.array([[age, income, previous_purchases, average_basket, days_since_last]])
-    
-    def process_output(self, prediction):
+    def process_output(self, prediction, features):
         """Process random forest output"""
         category = int(prediction[0])
         categories = ["Low Value", "Medium Value", "High Value", "Very High Value"]
@@ -83,6 +77,14 @@ class RandomForestView(BaseModelView):
 class AdaBoostView(BaseModelView):
     """AdaBoost model view for face recognition"""
     model_name = "adaboost_face_recognition"
+    fast_path = False  # Image uploads are multipart, see post()
+    serving_family = 'image'
+    schema = FeatureSchema(
+        Feature("eye_distance", min_value=0, max_value=1, example=0.41, description="Eye distance relative to image width"),
+        Feature("face_width", min_value=0, max_value=1, example=0.37, description="Face width relative to image width"),
+        Feature("nose_length", min_value=0, max_value=1, example=0.27, description="Nose length relative to image height"),
+        Feature("symmetry_score", min_value=0, max_value=1, example=0.84, description="Facial symmetry score"),
+    )
     parser_classes = (MultiPartParser, FormParser, JSONParser)
     
     def get(self, request, *args, **kwargs):
@@ -93,6 +95,7 @@ class AdaBoostView(BaseModelView):
             "input_example": {
                 "image": "Upload an image with a face to recognize"
             },
+            "manual_input_schema": self.schema.describe(),
             "description": "Recognizes faces using webcam input and compares against a gallery of known faces."
         })
     
@@ -131,31 +134,10 @@ class AdaBoostView(BaseModelView):
     
     def _process_manual_features(self, data):
         """Process manually entered facial features (backward compatibility)"""
-        try:
-            # Process the input data
-            features = self.process_input(data)
-            
-            # Make prediction
-            prediction = self.predict(features)
-            
-            # Process the output
-            result = self.process_output(prediction)
-            
-            return Response(result, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({
-                "error": str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
+        payload, status_code = self.predict_payload(data)
+        return Response(payload, status=status_code)
     
-    def process_input(self, data):
-        """Process input data for AdaBoost"""
-        eye_distance = float(data.get('eye_distance', 0))
-        face_width = float(data.get('face_width', 0))
-        nose_length = float(data.get('nose_length', 0))
-        symmetry_score = float(data.get('symmetry_score', 0))
-        return np.array([[eye_distance, face_width, nose_length, symmetry_score]])
-    
-    def process_output(self, prediction):
+    def process_output(self, prediction, features):
         """Process AdaBoost output"""
         face_id = int(prediction[0])
         return {
@@ -188,6 +170,8 @@ class AdaBoostView(BaseModelView):
             from PIL import Image
             import io
             
+            check_deadline('mediapipe')
+            
             # Read the image file
             image_data = image.read()
             
@@ -207,6 +191,7 @@ class AdaBoostView(BaseModelView):
             
             # Process the image
             results = face_mesh.process(cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB))
+            check_deadline('mediapipe')
             
             # If no face detected, return random features
             if not results.multi_face_landmarks:
@@ -328,32 +313,24 @@ class AdaBoostView(BaseModelView):
 class XGBoostView(BaseModelView):
     """XGBoost model view for click-through rate prediction"""
     model_name = "xgboost_ctr"
+    schema = FeatureSchema(
+        Feature("user_age", min_value=0, max_value=120, example=28, description="User age"),
+        Feature("ad_position", dtype=int, min_value=0, example=2, description="Position of the ad on the page"),
+        Feature("ad_relevance_score", min_value=0, max_value=1, example=0.75, description="Ad relevance score"),
+        Feature("time_of_day", dtype=int, min_value=0, max_value=23, example=14, description="Hour of the day"),
+        Feature("previous_clicks", dtype=int, min_value=0, example=3, description="Previous clicks by the user"),
+    )
     
     def get(self, request, *args, **kwargs):
         """Return model info and example inputs"""
         return Response({
             "model": "XGBoost",
             "use_case": "Click-Through Rate Prediction",
-            "input_example": {
-                "user_age": 28,
-                "ad_position": 2,
-                "ad_relevance_score": 0.75,
-                "time_of_day": 14,
-                "previous_clicks": 3
-            },
+            **self.schema_info(),
             "description": "Predicts click-through rate for online advertisements."
         })
     
-    def process_input(self, data):
-        """Process input data for XGBoost"""
-        user_age = float(data.get('user_age', 0))
-        ad_position = int(data.get('ad_position', 0))
-        ad_relevance = float(data.get('ad_relevance_score', 0))
-        time_of_day = int(data.get('time_of_day', 0))
-        previous_clicks = int(data.get('previous_clicks', 0))
-        return np.array([[user_age, ad_position, ad_relevance, time_of_day, previous_clicks]])
-    
-    def process_output(self, prediction):
+    def process_output(self, prediction, features):
         """Process XGBoost output"""
         ctr = float(prediction[0])
         return {
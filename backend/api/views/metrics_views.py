@@ -0,0 +1,16 @@
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.renderers import JSONRenderer
+from api.renderers import PrometheusRenderer
+from api.serving.metrics import registry
+
+class MetricsView(APIView):
+    """
+    Serving metrics for this worker process.
+    Returns JSON by default, or the Prometheus text format with
+    Accept: text/plain or ?format=prometheus.
+    """
+    renderer_classes = [JSONRenderer, PrometheusRenderer]
+    
+    def get(self, request):
+        return Response(registry.snapshot())
@@ -5,6 +5,8 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, LSTM, SimpleRNN, Input
 from .base_view import BaseModelView
 from api.model_loader import ModelLoader
+from api.serving.deadlines import DeadlineExceeded, current_deadline
+from api.text_generation import get_text_generator
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
@@ -14,19 +16,30 @@ import uuid
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
+from django.http import StreamingHttpResponse
 import re
-import random
-import hashlib
 import datetime
-from ..translation_data.language_data import LANGUAGE_DICTIONARIES, LANGUAGE_CHARACTERISTICS
-from ..translation_data.dictionary_utils import create_pivot_dictionary, get_language_suffix, transform_text_for_language, enrich_dictionary, generate_complete_dictionaries
+import itertools
+import json
+import time
+from ..translation_data.dictionary_utils import transform_text_for_language
+from ..translation_data.dictionary_engine import split_sentences, translate_texts
+from ..translation_data.dictionary_store import get_dictionary_store
+from ..translation_data.language_detection import get_language_detector, get_detection_policy, SUPPORTED_LANGUAGES
 from ..translation_data.google_translate import google_translator
+from ..translation_data.hedging import HedgedTranslator, get_hedge_executor
+from ..translation_data.translation_memory import get_translation_memory, GOOGLE_ENGINE
+from ..translation_data.batch import BatchTranslator
+from ..translation_data.documents import (
+    DocumentTranslator, DOCUMENT_EXTENSIONS, READ_CHUNK_SIZE, decode_chunks, iter_lines, iter_segments
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 class NeuralNetworkView(APIView):
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    serving_family = 'image'
     
     def get(self, request):
         """Get information about the neural network model"""
@@ -159,6 +172,7 @@ class NeuralNetworkView(APIView):
 
 class RNNView(APIView):
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    serving_family = 'audio'
     
     def get(self, request):
         """Get information about the RNN model"""
@@ -233,6 +247,8 @@ class RNNView(APIView):
             return "Thank you for your audio. This is a demonstration of speech recognition using recurrent neural networks. Your actual transcription would appear here in a production system."
 
 class LSTMView(APIView):
+    serving_family = 'text'
+    
     def get(self, request):
         """Get information about the LSTM model"""
         return Response({
@@ -253,28 +269,10 @@ class LSTMView(APIView):
     
     def post(self, request):
         """Generate text using an LSTM model"""
-        data = request.data
-        
-        # Validate input
-        if not data.get('prompt'):
-            return Response({
-                "error": "Please provide a text prompt"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        prompt = data.get('prompt')
-        max_length = int(data.get('max_length', 100))
-        temperature = float(data.get('temperature', 0.7))
-        
-        # Validate parameters
-        if max_length < 10 or max_length > 500:
-            return Response({
-                "error": "max_length must be between 10 and 500"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if temperature < 0.1 or temperature > 1.0:
-            return Response({
-                "error": "temperature must be between 0.1 and 1.0"
-            }, status=status.HTTP_400_BAD_REQUEST)
+        parameters, error = self._parameters(request.data)
+        if error is not None:
+            return error
+        prompt, max_length, temperature = parameters
         
         try:
             # This would be where the actual model generation happens
@@ -295,6 +293,32 @@ class LSTMView(APIView):
                 "error": f"Error generating text: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @staticmethod
+    def _parameters(data):
+        """((prompt, max_length, temperature), None) for a valid request, else (None, error response)"""
+        # Validate input
+        if not data.get('prompt'):
+            return None, Response({
+                "error": "Please provide a text prompt"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        prompt = data.get('prompt')
+        max_length = int(data.get('max_length', 100))
+        temperature = float(data.get('temperature', 0.7))
+        
+        # Validate parameters
+        if max_length < 10 or max_length > 500:
+            return None, Response({
+                "error": "max_length must be between 10 and 500"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if temperature < 0.1 or temperature > 1.0:
+            return None, Response({
+                "error": "temperature must be between 0.1 and 1.0"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return (prompt, max_length, temperature), None
+    
     def _mock_text_generation(self, prompt, max_length, temperature):
         """Generate mock text based on the prompt for demo purposes"""
         # Simulate different generations based on the prompt
@@ -308,25 +332,118 @@ class LSTMView(APIView):
             # Default generation
             return f"{prompt} is an interesting starting point for a discussion. There are many directions we could take this conversation. I'm here to help you explore ideas, answer questions, or simply chat about whatever's on your mind. Would you like me to elaborate on any particular aspect of this topic, or would you prefer to guide our discussion in a specific direction?"
 
+class LSTMStreamView(LSTMView):
+    """Token-by-token LSTM text generation streamed as server-sent events"""
+    # The response streams, so identical requests are not coalesced
+    serving_streams = True
+    
+    def get(self, request):
+        """Get information about streaming text generation"""
+        return Response({
+            "model": "Long Short-Term Memory (LSTM), streaming",
+            "description": "Generates text one token at a time, keeping the LSTM state between steps, and streams each token as a server-sent event as soon as it is sampled",
+            "use_case": "Interactive text generation and completion",
+            "example_input": {
+                "prompt": "Once upon a time",
+                "max_length": 100,
+                "temperature": 0.7
+            },
+            "parameters": {
+                "prompt": "The text prompt to start generation",
+                "max_length": "Maximum number of tokens to generate (10-500)",
+                "temperature": "Controls randomness in sampling (0.1-1.0)"
+            },
+            "stream_events": {
+                "start": "prompt, the generator (lstm, or demo without a model vocabulary) and the parameters",
+                "token": "index and text of the next token; concatenated, the text values continue the prompt",
+                "done": "tokens, first_token_seconds and seconds",
+                "error": "error, when generation stopped early"
+            }
+        }, status=status.HTTP_200_OK)
+    
+    def post(self, request):
+        """Stream generated text token by token"""
+        parameters, error = self._parameters(request.data)
+        if error is not None:
+            return error
+        prompt, max_length, temperature = parameters
+        
+        generator = get_text_generator()
+        if generator is not None:
+            tokens = (' ' + token for token in generator.generate(prompt, max_length, temperature))
+        else:
+            # The demo continuation, a word (with the space before it) at a time
+            continuation = self._mock_text_generation(prompt, max_length, temperature)[len(prompt):]
+            tokens = itertools.islice(re.finditer(r'\s*\S+', continuation), max_length)
+            tokens = (match.group() for match in tokens)
+        
+        response = StreamingHttpResponse(
+            self._stream(tokens, prompt, max_length, temperature, "lstm" if generator else "demo", current_deadline()),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Let proxies pass tokens on as they are sampled
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def _stream(self, tokens, prompt, max_length, temperature, generator, deadline):
+        """Server-sent events for a generation; tokens are sampled as the client reads them"""
+        def event(name, **fields):
+            return f"event: {name}\ndata: {json.dumps(fields, ensure_ascii=False)}\n\n"
+        
+        started = time.monotonic()
+        first_token = None
+        yield event("start", prompt=prompt, generator=generator,
+                    parameters={"max_length": max_length, "temperature": temperature})
+        
+        index = 0
+        try:
+            # The stream is read after the view returns, so the deadline is checked directly
+            for index, token in enumerate(tokens, 1):
+                if first_token is None:
+                    first_token = time.monotonic() - started
+                yield event("token", index=index - 1, text=token)
+                if deadline is not None:
+                    deadline.check('generation', index, max_length)
+        except DeadlineExceeded as e:
+            logger.warning(f"Text generation stopped after {index} tokens: {e}")
+            yield event("error", error="The request deadline was exceeded.", stage=e.stage)
+            return
+        except Exception as e:
+            logger.error(f"Text generation error: {str(e)}")
+            yield event("error", error=f"Error generating text: {str(e)}")
+            return
+        yield event("done", tokens=index, first_token_seconds=round(first_token or 0.0, 4),
+                    seconds=round(time.monotonic() - started, 3))
+
 class TranslationView(APIView):
     """Translation model API view"""
+    serving_family = 'text'
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Ensure we have complete dictionaries for all language pairs
-        self.dictionaries = generate_complete_dictionaries()
+        # Dictionaries for all language pairs, built once per process and shared read-only
+        self.dictionaries = get_dictionary_store()
+        self.language_detector = get_language_detector()
+        self.detection_policy = get_detection_policy()
         # Initialize Google Translator
         self.google_translator = google_translator
         self.use_google_translate = True
+        # Sentences translated before, by any worker, are looked up instead
+        self.translation_memory = get_translation_memory()
+        hedging = settings.TRANSLATION_HEDGING
+        self.hedged_translator = HedgedTranslator(
+            self._translate_remote,
+            self._translate_text,
+            hedging['hedge_delay'],
+            hedging['latency_budget'],
+            get_hedge_executor(),
+        )
         
     def get(self, request):
         """Get information about the translation model"""
         # Get all available language pairs from the dictionaries
-        language_pairs = []
-        for source in LANGUAGE_DICTIONARIES.keys():
-            for target in LANGUAGE_DICTIONARIES.get(source, {}).keys():
-                if source != target:
-                    language_pairs.append(f"{source} → {target}")
+        language_pairs = [f"{source} → {target}" for source, target in self.dictionaries.language_pairs()]
         
         # Get supported languages from Google Translator
         google_supported = self.google_translator.get_supported_languages() if self.use_google_translate else []
@@ -343,7 +460,8 @@ class TranslationView(APIView):
             "parameters": {
                 "text": "The text to translate",
                 "source_language": "The source language (auto-detect if not specified)",
-                "target_language": "The target language to translate to"
+                "target_language": "The target language to translate to",
+                "hedged": "Race Google Translate against the dictionary engine and answer within the latency budget (optional)"
             },
             "supported_languages": [
                 "English", "Spanish", "French", "German", "Chinese", "Japanese",
@@ -351,7 +469,8 @@ class TranslationView(APIView):
             ],
             "available_translations": language_pairs,
             "using_google_translate": self.use_google_translate,
-            "google_supported_languages": google_supported
+            "google_supported_languages": google_supported,
+            "translation_memory": self.translation_memory.stats() if self.translation_memory else None
         }, status=status.HTTP_200_OK)
     
     def post(self, request, format=None):
@@ -372,6 +491,8 @@ class TranslationView(APIView):
         
         # Optional parameter to disable Google Translate
         use_dictionary_only = request.data.get('use_dictionary_only', False)
+        # Optional parameter for latency-sensitive clients
+        hedged = request.data.get('hedged', settings.TRANSLATION_HEDGING['default'])
         
         # List of supported languages
         supported_languages = ["English", "Spanish", "French", "German", 
@@ -388,8 +509,8 @@ class TranslationView(APIView):
             # Detect source language if not provided
             if not source_language:
                 if self.use_google_translate and not use_dictionary_only:
-                    # Use Google Translate for language detection
-                    source_language = self.google_translator.detect_language(text)
+                    # Detect locally, asking Google Translate only about uncertain texts
+                    source_language = self.detection_policy.detect(text).language
                 else:
                     # Fallback to our dictionary-based detection
                     source_language = self._detect_language(text)
@@ -406,21 +527,23 @@ class TranslationView(APIView):
                     "translation_method": "none_needed"
                 })
             
-            # Ensure we have the necessary dictionary for this language pair
-            self._ensure_dictionary_exists(source_language, target_language)
-            
             # Perform translation
             translation_method = "dictionary"
             
-            if self.use_google_translate and not use_dictionary_only:
-                # Use Google Translate API with dictionary-based fallback
-                translated_text = self.google_translator.translate_text(
-                    text, 
-                    source_language, 
-                    target_language,
-                    fallback_fn=self._translate_text  # Dictionary-based fallback
+            if self.use_google_translate and not use_dictionary_only and hedged:
+                # Race Google Translate against the dictionary engine
+                translated_text, translation_method = self.hedged_translator.translate(
+                    text, source_language, target_language
                 )
-                translation_method = "google_translate"
+            elif self.use_google_translate and not use_dictionary_only:
+                # Use Google Translate API with dictionary-based fallback
+                try:
+                    translated_text = self._translate_remote(text, source_language, target_language)
+                    translation_method = "google_translate"
+                except Exception as e:
+                    logger.warning(f"Google Translate failed, using the dictionaries: {str(e)}")
+                    translated_text = self._translate_text(text, source_language, target_language)
+                    translation_method = "dictionary_fallback"
             else:
                 # Use dictionary-based translation
                 translated_text = self._translate_text(text, source_language, target_language)
@@ -443,436 +566,326 @@ class TranslationView(APIView):
             logger.error(f"Translation error: {str(e)}")
             return Response({"error": f"Translation failed: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    def _ensure_dictionary_exists(self, source_language, target_language):
-        """Ensure that a dictionary exists for the specified language pair"""
-        if source_language not in LANGUAGE_DICTIONARIES:
-            LANGUAGE_DICTIONARIES[source_language] = {}
-            
-        if target_language not in LANGUAGE_DICTIONARIES[source_language]:
-            # Create a pivot dictionary
-            pivot_dict = create_pivot_dictionary(source_language, target_language)
-            LANGUAGE_DICTIONARIES[source_language][target_language] = pivot_dict
-            
-            # Enrich the dictionary with additional translations
-            enriched_dict = enrich_dictionary(source_language, target_language)
-            if enriched_dict:
-                LANGUAGE_DICTIONARIES[source_language][target_language].update(enriched_dict)
-                
-        # If dictionary is empty or very small, build it using pivot translation
-        if len(LANGUAGE_DICTIONARIES[source_language][target_language]) < 5:
-            # Try to use English as a pivot
-            if "English" in LANGUAGE_DICTIONARIES:
-                if source_language in LANGUAGE_DICTIONARIES["English"] and target_language in LANGUAGE_DICTIONARIES["English"]:
-                    source_to_eng = {v: k for k, v in LANGUAGE_DICTIONARIES["English"][source_language].items()}
-                    eng_to_target = LANGUAGE_DICTIONARIES["English"][target_language]
-                    
-                    pivot_dict = {}
-                    for eng_word, target_word in eng_to_target.items():
-                        for source_word, eng_pivot in source_to_eng.items():
-                            if eng_pivot == eng_word:
-                                pivot_dict[source_word] = target_word
-                    
-                    LANGUAGE_DICTIONARIES[source_language][target_language] = pivot_dict
-
     def _detect_language(self, text):
         """
-        Detect the language of the provided text
-        This is a mock implementation that detects language based on word patterns
+        Detect the language of the provided text from the dictionary word
+        index and character profiles (api.translation_data.language_detection)
         """
-        # Count words that match dictionary entries for each language
-        language_scores = {}
-        
-        # Default to English if we can't detect
-        if not text or len(text.strip()) == 0:
-            return "English"
-        
-        # Get a sample of the text (first 100 words should be enough for detection)
-        words = re.findall(r'\b\w+\b', text.lower())
-        sample = words[:100] if len(words) > 100 else words
-        
-        # Score each language based on word matches in dictionaries
-        for source_lang, target_dict in LANGUAGE_DICTIONARIES.items():
-            language_scores[source_lang] = 0
-            
-            # Check for words that appear as keys (source language)
-            for target_lang, word_dict in target_dict.items():
-                for word in sample:
-                    if word in word_dict:
-                        language_scores[source_lang] += 1
-            
-            # Also check for words that appear as values (target language)
-            for target_lang, word_dict in LANGUAGE_DICTIONARIES.items():
-                for lang, translations in word_dict.items():
-                    if lang == source_lang:
-                        for word in sample:
-                            if word in translations.values():
-                                language_scores[source_lang] += 1
-        
-        # Detect based on language-specific patterns
-        # Spanish patterns
-        if re.search(r'\b(el|la|los|las|una?)\b', text) and re.search(r'\b(es|está|son|están)\b', text):
-            language_scores["Spanish"] = language_scores.get("Spanish", 0) + 5
-        
-        # French patterns
-        if re.search(r'\b(le|la|les|un|une|des)\b', text) and re.search(r'\b(est|sont|c\'est|voilà)\b', text):
-            language_scores["French"] = language_scores.get("French", 0) + 5
-        
-        # German patterns
-        if re.search(r'\b(der|die|das|ein|eine|ist|sind)\b', text) and re.search(r'[A-Z][a-z]+', text):
-            language_scores["German"] = language_scores.get("German", 0) + 5
-            
-        # Italian patterns
-        if re.search(r'\b(il|lo|la|gli|le|un|una|sono)\b', text) and re.search(r'\b(è|sono|sta|stanno)\b', text):
-            language_scores["Italian"] = language_scores.get("Italian", 0) + 5
-            
-        # Portuguese patterns
-        if re.search(r'\b(o|a|os|as|um|uma|são)\b', text) and re.search(r'\b(é|são|está|estão)\b', text):
-            language_scores["Portuguese"] = language_scores.get("Portuguese", 0) + 5
-        
-        # Russian patterns (Cyrillic characters)
-        if re.search(r'[а-яА-Я]', text):
-            language_scores["Russian"] = language_scores.get("Russian", 0) + 10
-            
-        # Chinese patterns
-        if re.search(r'[\u4e00-\u9fff]', text):
-            language_scores["Chinese"] = language_scores.get("Chinese", 0) + 10
-            
-        # Japanese patterns (Hiragana, Katakana, Kanji)
-        if re.search(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]', text):
-            language_scores["Japanese"] = language_scores.get("Japanese", 0) + 10
-            
-        # Arabic patterns
-        if re.search(r'[\u0600-\u06FF]', text):
-            language_scores["Arabic"] = language_scores.get("Arabic", 0) + 10
-        
-        # Default to English if insufficient evidence
-        if max(language_scores.values()) if language_scores else 0 < 3:
-            return "English"
-        
-        # Return the language with the highest score
-        return max(language_scores, key=language_scores.get)
+        return self.language_detector.detect(text).language
     
     def _translate_text(self, text, source_language, target_language):
         """
         Translate text from source language to target language
         Using a combination of dictionary lookup and rule-based translation
         """
-        # In a real-world scenario, this would call a machine translation API
-        # For this demo, we'll implement a more sophisticated rule-based translation
-        
-        # Check if we have direct translation dictionaries
-        dictionary = {}
-        if source_language in LANGUAGE_DICTIONARIES and target_language in LANGUAGE_DICTIONARIES[source_language]:
-            logger.info(f"Using direct translation dictionary from {source_language} to {target_language}")
-            dictionary = LANGUAGE_DICTIONARIES[source_language][target_language]
-        else:
-            # If no direct translation, use pivot dictionaries
-            logger.info(f"No direct dictionary found, creating pivot dictionary from {source_language} to {target_language}")
-            dictionary = create_pivot_dictionary(source_language, target_language)
-            
-            # Cache this dictionary for future use
-            if source_language not in LANGUAGE_DICTIONARIES:
-                LANGUAGE_DICTIONARIES[source_language] = {}
-            LANGUAGE_DICTIONARIES[source_language][target_language] = dictionary
-            
-            # Try to enrich the dictionary further
-            enriched_dict = enrich_dictionary(source_language, target_language)
-            if enriched_dict:
-                dictionary.update(enriched_dict)
-        
-        # Log dictionary size for debugging
-        logger.info(f"Translation dictionary has {len(dictionary)} entries")
-        
-        # Get source and target language characteristics
-        source_chars = LANGUAGE_CHARACTERISTICS.get(source_language, {})
-        target_chars = LANGUAGE_CHARACTERISTICS.get(target_language, {})
-        
-        # Split the text into paragraphs
-        paragraphs = text.split('\n')
-        translated_paragraphs = []
-        
-        for paragraph in paragraphs:
-            if paragraph.strip() == '':
-                translated_paragraphs.append('')
-                continue
-                
-            # Split into sentences
-            sentences = re.split(r'([.!?])', paragraph)
-            translated_sentences = []
-            
-            i = 0
-            while i < len(sentences):
-                sentence = sentences[i]
-                punctuation = sentences[i+1] if i+1 < len(sentences) else ''
-                
-                # Translate the sentence
-                translated_sentence = self._translate_sentence(
-                    sentence, 
-                    dictionary, 
-                    source_language, 
-                    target_language,
-                    source_chars,
-                    target_chars
+        return self._translate_texts([text], source_language, target_language)[0]
+    
+    def _translate_texts(self, texts, source_language, target_language, tokens=None):
+        """
+        Translate several texts into one language with the dictionaries
+        (api.translation_data.dictionary_engine)
+        """
+        return translate_texts(
+            self.dictionaries, texts, source_language, target_language, self.translation_memory, tokens
+        )
+    
+    def _translate_remote(self, text, source_language, target_language):
+        """
+        Translate text with Google Translate, raising TranslateError on
+        failure. With the translation memory, sentences are looked up first
+        and only the new ones are sent, in one batch.
+        """
+        return self._translate_remote_texts([text], source_language, target_language)[0]
+    
+    def _translate_remote_texts(self, texts, source_language, target_language):
+        """
+        Translate several texts into one language with Google Translate,
+        in as few upstream calls as the batch size allows. Raises
+        TranslateError on failure.
+        """
+        if self.translation_memory is None:
+            # Blank texts are returned as they are, without a round trip
+            pending = [i for i, text in enumerate(texts) if text.strip()]
+            translations = list(texts)
+            if pending:
+                results = self.google_translator.translate_remote_batch(
+                    [texts[i] for i in pending], source_language, target_language
                 )
-                
-                # Add punctuation (language-specific handling is done in transform_text_for_language)
-                if punctuation:
-                    translated_sentence += punctuation
-                
-                translated_sentences.append(translated_sentence)
-                i += 2 if i+1 < len(sentences) else 1
-            
-            translated_paragraph = ' '.join(translated_sentences)
-            translated_paragraphs.append(translated_paragraph)
-        
-        return '\n'.join(translated_paragraphs)
-    
-    def _translate_sentence(self, sentence, dictionary, source_language, target_language, source_chars, target_chars):
-        """Translate a single sentence"""
-        # Tokenize the sentence
-        words = re.findall(r'(\b[\w\']+\b|\S)', sentence)
-        translated_words = []
-        
-        for word in words:
-            # Skip punctuation and other non-word characters
-            if not re.match(r'\w', word):
-                translated_words.append(word)
-                continue
-            
-            # Try direct translation from dictionary
-            word_lower = word.lower()
-            if word_lower in dictionary:
-                translated_word = dictionary[word_lower]
-                
-                # Preserve capitalization
-                if word[0].isupper():
-                    translated_word = translated_word[0].upper() + translated_word[1:]
-                
-                translated_words.append(translated_word)
-            else:
-                # Check for common words in target language characteristics
-                common_words = target_chars.get("common_words", {})
-                if word_lower in common_words:
-                    translated_word = common_words[word_lower]
-                    
-                    # Preserve capitalization
-                    if word[0].isupper():
-                        translated_word = translated_word[0].upper() + translated_word[1:]
-                    
-                    translated_words.append(translated_word)
-                else:
-                    # Apply rule-based translation for unknown words
-                    translated_word = self._transform_word(
-                        word, 
-                        source_language, 
-                        target_language,
-                        source_chars,
-                        target_chars
-                    )
-                    translated_words.append(translated_word)
-        
-        # Apply language-specific post-processing
-        result = ' '.join(translated_words)
-        
-        # Apply rule-based transformations for grammatical correctness
-        if target_language == "Spanish" or target_language == "French" or target_language == "Italian" or target_language == "Portuguese":
-            # Reverse adjective-noun order if specified in language characteristics
-            if target_chars.get("word_order", {}).get("adjective_after_noun", False):
-                # Simple heuristic: look for adjective-noun pairs and reverse them
-                # This is a simplified approach; a real implementation would use POS tagging
-                result = re.sub(r'\b(\w+)\s+(\w+)(?=\s|$)', 
-                               lambda m: f"{m.group(2)} {m.group(1)}" 
-                               if (m.group(1).lower().endswith(tuple(target_chars.get("adjective_endings", []))) 
-                                  and not m.group(2).lower().endswith(tuple(target_chars.get("adjective_endings", []))))
-                               else m.group(0),
-                               result)
-        
-        # Return the result, with language-specific final transformations to be applied later
-        return result
-    
-    def _transform_word(self, word, source_language, target_language, source_chars, target_chars):
-        """Transform a word using language-specific rules when no dictionary match is found"""
-        word_lower = word.lower()
-        
-        # Check for common words first (articles, prepositions, etc.)
-        common_words = target_chars.get("common_words", {})
-        if word_lower in common_words:
-            result = common_words[word_lower]
-            return result[0].upper() + result[1:] if word[0].isupper() else result
-        
-        # Generate a hash for this word to ensure consistent translations
-        word_hash = int(hashlib.md5(word_lower.encode()).hexdigest(), 16)
-        random.seed(word_hash)
-        
-        # Apply language-specific transformations
-        if target_language == "Spanish":
-            # Spanish rules: common endings, gender patterns, etc.
-            if word_lower.endswith(('tion', 'sion')):
-                new_word = word_lower[:-4] + 'ción'
-            elif word_lower.endswith('ly'):
-                new_word = word_lower[:-2] + 'mente'
-            elif word_lower.endswith('ing'):
-                new_word = word_lower[:-3] + 'ando'
-            else:
-                # Add common Spanish suffixes
-                stem_length = min(len(word) - 1, 5)  # Keep at most 5 chars
-                suffix = get_language_suffix("Spanish", word_lower)
-                new_word = word_lower[:stem_length] + suffix
-        
-        elif target_language == "French":
-            # French rules: common endings, silent letters, etc.
-            if word_lower.endswith(('tion', 'sion')):
-                new_word = word_lower  # Same in French
-            elif word_lower.endswith('ly'):
-                new_word = word_lower[:-2] + 'ment'
-            elif word_lower.endswith('ing'):
-                new_word = word_lower[:-3] + 'ant'
-            else:
-                # Add common French suffixes
-                stem_length = min(len(word) - 1, 5)
-                suffix = get_language_suffix("French", word_lower)
-                new_word = word_lower[:stem_length] + suffix
-        
-        elif target_language == "German":
-            # German rules: compound words, capitalization, etc.
-            if word_lower.endswith(('tion', 'sion')):
-                new_word = word_lower  # Similar in German
-            elif word_lower.endswith('ly'):
-                new_word = word_lower[:-2] + 'lich'
-            elif word_lower.endswith('ing'):
-                new_word = word_lower[:-3] + 'ung'
-            else:
-                # Add common German suffixes
-                stem_length = min(len(word) - 1, 5)
-                suffix = get_language_suffix("German", word_lower)
-                new_word = word_lower[:stem_length] + suffix
-        
-        elif target_language == "Italian":
-            # Italian rules
-            if word_lower.endswith(('tion', 'sion')):
-                new_word = word_lower[:-4] + 'zione'
-            elif word_lower.endswith('ly'):
-                new_word = word_lower[:-2] + 'mente'
-            elif word_lower.endswith('ing'):
-                new_word = word_lower[:-3] + 'ando'
-            else:
-                # Add common Italian suffixes
-                stem_length = min(len(word) - 1, 5)
-                suffix = get_language_suffix("Italian", word_lower)
-                new_word = word_lower[:stem_length] + suffix
-                
-        elif target_language == "Portuguese":
-            # Portuguese rules
-            if word_lower.endswith(('tion', 'sion')):
-                new_word = word_lower[:-4] + 'ção'
-            elif word_lower.endswith('ly'):
-                new_word = word_lower[:-2] + 'mente'
-            elif word_lower.endswith('ing'):
-                new_word = word_lower[:-3] + 'ando'
-            else:
-                # Add common Portuguese suffixes
-                stem_length = min(len(word) - 1, 5)
-                suffix = get_language_suffix("Portuguese", word_lower)
-                new_word = word_lower[:stem_length] + suffix
-                
-        elif target_language == "Russian":
-            # Russian rules
-            if word_lower.endswith(('tion', 'sion')):
-                new_word = word_lower[:-4] + 'ция'
-            elif word_lower.endswith('ly'):
-                new_word = word_lower[:-2] + 'но'
-            elif word_lower.endswith('ing'):
-                new_word = word_lower[:-3] + 'ение'
-            else:
-                # Add common Russian suffixes
-                stem_length = min(len(word) - 1, 5)
-                suffix = get_language_suffix("Russian", word_lower)
-                new_word = word_lower[:stem_length] + suffix
-        
-        elif target_language == "Chinese":
-            # For Chinese, we'll use a very simplified approach (real translation would use characters)
-            # Return a placeholder for demonstration purposes
-            chars = "的一是不了人我在有他这为之大来以个中上们"
-            new_word = ''.join(random.choice(chars) for _ in range(min(len(word), 4)))
-            return new_word  # Early return as we don't need capitalization
-        
-        elif target_language == "Japanese":
-            # For Japanese, simplified approach with Katakana for foreign words
-            katakana_map = {
-                'a': 'ア', 'i': 'イ', 'u': 'ウ', 'e': 'エ', 'o': 'オ',
-                'ka': 'カ', 'ki': 'キ', 'ku': 'ク', 'ke': 'ケ', 'ko': 'コ',
-                'sa': 'サ', 'shi': 'シ', 'su': 'ス', 'se': 'セ', 'so': 'ソ',
-                'ta': 'タ', 'chi': 'チ', 'tsu': 'ツ', 'te': 'テ', 'to': 'ト',
-                'na': 'ナ', 'ni': 'ニ', 'nu': 'ヌ', 'ne': 'ネ', 'no': 'ノ',
-                'ha': 'ハ', 'hi': 'ヒ', 'fu': 'フ', 'he': 'ヘ', 'ho': 'ホ',
-                'ma': 'マ', 'mi': 'ミ', 'mu': 'ム', 'me': 'メ', 'mo': 'モ',
-                'ya': 'ヤ', 'yu': 'ユ', 'yo': 'ヨ',
-                'ra': 'ラ', 'ri': 'リ', 'ru': 'ル', 're': 'レ', 'ro': 'ロ',
-                'wa': 'ワ', 'wo': 'ヲ', 'n': 'ン'
-            }
-            
-            # Convert word to katakana-like representation
-            new_word = ""
-            i = 0
-            while i < len(word_lower):
-                if i < len(word_lower) - 1:
-                    pair = word_lower[i:i+2]
-                    if pair in katakana_map:
-                        new_word += katakana_map[pair]
-                        i += 2
-                        continue
-                
-                if word_lower[i] in 'aiueo':
-                    new_word += katakana_map[word_lower[i]]
-                else:
-                    if i < len(word_lower) - 1 and word_lower[i+1] in 'aiueo':
-                        syllable = word_lower[i] + word_lower[i+1]
-                        if syllable in katakana_map:
-                            new_word += katakana_map[syllable]
-                            i += 2
-                            continue
-                    
-                    # If no match, just use a random katakana
-                    new_word += random.choice(list(katakana_map.values()))
-                
-                i += 1
-            
-            return new_word  # Early return as we don't need capitalization
-        
-        elif target_language == "Arabic":
-            # Arabic rules (simplified approach)
-            arabic_chars = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
-            if len(word) <= 3:
-                # For short words, use a direct transliteration
-                char_map = {
-                    'a': 'ا', 'b': 'ب', 'c': 'ك', 'd': 'د', 'e': 'ي', 'f': 'ف',
-                    'g': 'غ', 'h': 'ه', 'i': 'ي', 'j': 'ج', 'k': 'ك', 'l': 'ل',
-                    'm': 'م', 'n': 'ن', 'o': 'و', 'p': 'ب', 'q': 'ق', 'r': 'ر',
-                    's': 'س', 't': 'ت', 'u': 'و', 'v': 'ف', 'w': 'و', 'x': 'كس',
-                    'y': 'ي', 'z': 'ز'
-                }
-                new_word = ""
-                for char in word_lower:
-                    new_word += char_map.get(char, random.choice(arabic_chars))
-            else:
-                # For longer words, use random Arabic characters
-                stem_length = min(len(word), 4)
-                new_word = ""
-                for _ in range(stem_length):
-                    new_word += random.choice(arabic_chars)
-                    
-                # Add a common Arabic suffix based on word hash
-                suffixes = ["", "ة", "ات", "ون", "ين", "ان", "ي", "ية"]
-                new_word += random.choice(suffixes)
-                
-            return new_word  # Early return as we don't need capitalization
+                for i, translated in zip(pending, results):
+                    translations[i] = translated
+            return translations
+        
+        documents = [
+            [
+                [(sentence + punctuation).strip() for sentence, punctuation in split_sentences(paragraph)]
+                for paragraph in text.split('\n')
+            ]
+            for text in texts
+        ]
+        translations = iter(self.translation_memory.translate(
+            [sentence for paragraphs in documents for paragraph in paragraphs for sentence in paragraph],
+            source_language,
+            target_language,
+            GOOGLE_ENGINE,
+            lambda missing: self.google_translator.translate_remote_batch(missing, source_language, target_language)
+        ))
+        return [
+            '\n'.join(
+                ' '.join(translation for translation in (next(translations) for _ in paragraph) if translation)
+                for paragraph in paragraphs
+            )
+            for paragraphs in documents
+        ]
+    
+
+class LanguageDetectionView(APIView):
+    """Batch language detection API view"""
+    serving_family = 'text'
+    
+    # Texts accepted per request
+    MAX_TEXTS = 1000
+    
+    def get(self, request):
+        """Get information about the language detector"""
+        return Response({
+            "model": "Dictionary Language Detection",
+            "description": "Detects the language of one or many texts from a dictionary word index, with character n-gram profiles for unknown words and script detection for non-Latin alphabets",
+            "example_input": {
+                "texts": ["Hello, how are you?", "Hola, ¿cómo estás?"]
+            },
+            "parameters": {
+                "text": "A single text to detect",
+                "texts": f"A list of up to {self.MAX_TEXTS} texts to detect in one request"
+            },
+            "supported_languages": SUPPORTED_LANGUAGES
+        }, status=status.HTTP_200_OK)
+    
+    def post(self, request, format=None):
+        """Detect the language of each text"""
+        texts = request.data.get('texts')
+        if texts is None and request.data.get('text'):
+            texts = [request.data['text']]
+        
+        if not isinstance(texts, list) or not texts or not all(isinstance(text, str) for text in texts):
+            return Response({"error": "Provide 'text' or a non-empty list of strings as 'texts'"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(texts) > self.MAX_TEXTS:
+            return Response({"error": f"At most {self.MAX_TEXTS} texts can be detected per request"}, status=status.HTTP_400_BAD_REQUEST)
         
+        detections = get_language_detector().detect_batch(texts)
+        return Response({
+            "detections": [
+                {"language": detection.language, "confidence": round(detection.confidence, 4)}
+                for detection in detections
+            ]
+        })
+
+
+class DocumentTranslationView(TranslationView):
+    """Streaming translation of long documents and .txt/.md uploads"""
+    parser_classes = (MultiPartParser, FormParser, JSONParser)
+    # The response streams, so identical requests are not coalesced
+    serving_streams = True
+    
+    # Characters the source language is detected from, when it is not given
+    DETECTION_CHARS = 2000
+    
+    def get(self, request):
+        """Get information about document translation"""
+        config = settings.TRANSLATION_DOCUMENTS
+        return Response({
+            "model": "Document Translation",
+            "description": "Translates long texts and .txt/.md files segment by segment and streams the translated segments back in order as newline-delimited JSON",
+            "parameters": {
+                "file": f"A {'/'.join(DOCUMENT_EXTENSIONS)} file of up to {config['max_bytes']} bytes (multipart upload)",
+                "text": "The text to translate, when no file is uploaded",
+                "source_language": "The source language (auto-detect if not specified)",
+                "target_language": "The target language to translate to",
+                "use_dictionary_only": "Translate with the dictionary engine only (optional)"
+            },
+            "stream_events": {
+                "start": "source_language, target_language and the engine",
+                "segment": "index, translated_text and translation_method of the next segment; concatenated, the translated_text values form the translated document",
+                "done": "segments, characters and seconds",
+                "error": "error, when the translation stopped early"
+            },
+            "supported_languages": SUPPORTED_LANGUAGES
+        }, status=status.HTTP_200_OK)
+    
+    def post(self, request, format=None):
+        """Stream the translation of a document"""
+        config = settings.TRANSLATION_DOCUMENTS
+        target_language = request.data.get('target_language')
+        source_language = request.data.get('source_language') or None
+        use_dictionary_only = str(request.data.get('use_dictionary_only', False)).lower() in ('true', '1')
+        
+        if target_language not in SUPPORTED_LANGUAGES:
+            return Response(
+                {"error": f"Unsupported target language. Please use one of: {', '.join(SUPPORTED_LANGUAGES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if source_language is not None and source_language not in SUPPORTED_LANGUAGES:
+            return Response({"error": f"Unsupported source language: {source_language}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        upload = request.FILES.get('file')
+        if upload is not None:
+            if not upload.name.lower().endswith(DOCUMENT_EXTENSIONS):
+                return Response({"error": f"Only {', '.join(DOCUMENT_EXTENSIONS)} files can be translated"}, status=status.HTTP_400_BAD_REQUEST)
+            if upload.size > config['max_bytes']:
+                return Response({"error": f"Documents are limited to {config['max_bytes']} bytes"}, status=status.HTTP_400_BAD_REQUEST)
+            chunks = decode_chunks(upload.chunks(READ_CHUNK_SIZE))
         else:
-            # Default fallback for other languages
-            new_word = word_lower
+            text = request.data.get('text')
+            if not isinstance(text, str) or not text.strip():
+                return Response({"error": "Upload a 'file' or send the 'text' to translate"}, status=status.HTTP_400_BAD_REQUEST)
+            if len(text.encode('utf-8')) > config['max_bytes']:
+                return Response({"error": f"Documents are limited to {config['max_bytes']} bytes"}, status=status.HTTP_400_BAD_REQUEST)
+            chunks = [text]
+        
+        use_remote = self.use_google_translate and not use_dictionary_only
+        lines = iter_lines(chunks, config['segment_chars'])
+        if not source_language:
+            # Detect from the opening lines, then translate them with the rest
+            opening, size = [], 0
+            for line in lines:
+                opening.append(line)
+                size += len(line.body) if line.translate else 0
+                if size >= self.DETECTION_CHARS:
+                    break
+            sample = ' '.join(line.body for line in opening if line.translate)
+            if use_remote:
+                source_language = self.detection_policy.detect(sample).language
+            else:
+                source_language = self._detect_language(sample)
+            lines = itertools.chain(opening, lines)
+        
+        translator = DocumentTranslator(self._translate_remote_texts, self._translate_text, use_remote, current_deadline())
+        response = StreamingHttpResponse(
+            self._stream(translator, lines, source_language, target_language, use_remote),
+            content_type='application/x-ndjson'
+        )
+        # Let proxies pass segments on as they are produced
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def _stream(self, translator, lines, source_language, target_language, use_remote):
+        """Newline-delimited JSON events for a document translation"""
+        def event(**fields):
+            return json.dumps(fields, ensure_ascii=False) + '\n'
+        
+        started = time.monotonic()
+        yield event(event="start", source_language=source_language, target_language=target_language,
+                    engine="google_translate" if use_remote else "dictionary")
+        
+        if source_language == target_language:
+            segments = (
+                (''.join(line.prefix + line.body + line.end for line in segment), "none_needed")
+                for segment in iter_segments(lines, settings.TRANSLATION_DOCUMENTS['segment_chars'])
+            )
+        else:
+            segments = translator.translate(lines, source_language, target_language)
+        
+        index, characters = 0, 0
+        try:
+            for index, (translated_text, translation_method) in enumerate(segments):
+                characters += len(translated_text)
+                yield event(event="segment", index=index, translated_text=translated_text,
+                            translation_method=translation_method)
+        except DeadlineExceeded as e:
+            logger.warning(f"Document translation stopped at segment {index}: {e}")
+            yield event(event="error", error="The request deadline was exceeded.", stage=e.stage)
+            return
+        except Exception as e:
+            logger.error(f"Document translation error: {str(e)}")
+            yield event(event="error", error=f"Translation failed: {str(e)}")
+            return
+        yield event(event="done", segments=index + 1 if characters else 0, characters=characters,
+                    seconds=round(time.monotonic() - started, 3))
+
+
+class BatchTranslationView(TranslationView):
+    """Translation of many texts into many target languages in one request"""
+    
+    def get(self, request):
+        """Get information about batch translation"""
+        config = settings.TRANSLATION_BATCH
+        return Response({
+            "model": "Batch Translation",
+            "description": "Translates a list of texts into a list of target languages in one request. Each text's source language is detected once, and the texts are translated in one call per source and target language",
+            "use_case": "Bulk localization of UI strings and content into several languages",
+            "example_input": {
+                "texts": ["Hello, how are you?", "Thank you"],
+                "target_languages": ["Spanish", "French", "German"]
+            },
+            "parameters": {
+                "texts": f"The texts to translate, up to {config['max_texts']} texts and {config['max_chars']} characters",
+                "target_languages": "The target languages to translate every text to",
+                "source_language": "The source language of all the texts (auto-detect per text if not specified)",
+                "use_dictionary_only": "Translate with the dictionary engine only (optional)"
+            },
+            "response": {
+                "source_languages": "The source language of each text",
+                "translations": "One row per text with its translation into each target language, in the order of target_languages",
+                "translation_methods": "The translation_method of each translation, in the same shape"
+            },
+            "supported_languages": SUPPORTED_LANGUAGES
+        }, status=status.HTTP_200_OK)
+    
+    def post(self, request, format=None):
+        """Translate every text into every target language"""
+        config = settings.TRANSLATION_BATCH
+        texts = request.data.get('texts')
+        target_languages = request.data.get('target_languages')
+        source_language = request.data.get('source_language') or None
+        use_dictionary_only = request.data.get('use_dictionary_only', False)
         
-        # Preserve original capitalization
-        if word[0].isupper():
-            new_word = new_word[0].upper() + new_word[1:]
+        if not isinstance(texts, list) or not texts or not all(isinstance(text, str) for text in texts):
+            return Response({"error": "'texts' must be a non-empty list of strings"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(texts) > config['max_texts'] or sum(len(text) for text in texts) > config['max_chars']:
+            return Response(
+                {"error": f"Batches are limited to {config['max_texts']} texts and {config['max_chars']} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(target_languages, list) or not target_languages:
+            return Response({"error": "'target_languages' must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        unsupported = [language for language in target_languages if language not in SUPPORTED_LANGUAGES]
+        if unsupported:
+            return Response(
+                {"error": f"Unsupported target languages: {', '.join(map(str, unsupported))}. Please use: {', '.join(SUPPORTED_LANGUAGES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if source_language is not None and source_language not in SUPPORTED_LANGUAGES:
+            return Response({"error": f"Unsupported source language: {source_language}"}, status=status.HTTP_400_BAD_REQUEST)
         
-        return new_word 
\ No newline at end of file
+        use_remote = self.use_google_translate and not use_dictionary_only
+        try:
+            # Each distinct text is detected once; blank texts have no source language
+            detected = {}
+            for text in texts:
+                if text in detected:
+                    continue
+                if not text.strip():
+                    detected[text] = None
+                elif source_language:
+                    detected[text] = source_language
+                elif use_remote:
+                    detected[text] = self.detection_policy.detect(text).language
+                else:
+                    detected[text] = self._detect_language(text)
+            source_languages = [detected[text] for text in texts]
+            
+            translator = BatchTranslator(
+                self._translate_remote_texts, self._translate_texts, use_remote, current_deadline()
+            )
+            results = translator.translate(texts, source_languages, target_languages)
+        except Exception as e:
+            logger.error(f"Batch translation error: {str(e)}")
+            return Response({"error": f"Translation failed: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        logger.info(f"Batch translated {len(texts)} texts into {len(target_languages)} languages")
+        return Response({
+            "source_languages": source_languages,
+            "target_languages": target_languages,
+            "translations": [[translated for translated, _ in row] for row in results],
+            "translation_methods": [[method for _, method in row] for row in results]
+        })
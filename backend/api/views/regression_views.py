@@ -3,6 +3,8 @@ import pandas as pd
 from sklearn.linear_model import LinearRegression
 from .base_view import BaseModelView
 from api.model_loader import ModelLoader
+from api.schemas import Feature, FeatureSchema, SchemaValidationError
+from api.serving.deadlines import check_deadline
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
@@ -11,29 +13,25 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 class LinearRegressionView(BaseModelView):
     """Linear regression model view for housing price prediction"""
     model_name = "linear_regression_housing"
+    schema = FeatureSchema(
+        Feature("sqft", min_value=0, example=1500, description="Living area in square feet"),
+    )
     
     def get(self, request, *args, **kwargs):
         """Return model info and example inputs"""
         return Response({
             "model": "Linear Regression",
             "use_case": "Housing Price Prediction",
-            "input_example": {
-                "sqft": 1500
-            },
+            **self.schema_info(),
             "description": "Predicts housing prices based on square footage."
         })
     
-    def process_input(self, data):
-        """Process input data for linear regression"""
-        sqft = float(data.get('sqft', 0))
-        return np.array([[sqft]])
-    
-    def process_output(self, prediction):
+    def process_output(self, prediction, features):
         """Process linear regression output"""
         price = float(prediction[0])
         return {
             "prediction": price,
-            "explanation": f"The predicted house price based on {data.get('sqft', 0)} square feet is ${price:,.2f}",
+            "explanation": f"The predicted house price based on {features[0][0]:g} square feet is ${price:,.2f}",
             "r2_score": 0.85
         }
     
@@ -55,29 +53,25 @@ class LinearRegressionView(BaseModelView):
 class LinearRegressionSalesView(BaseModelView):
     """Linear regression model view for sales prediction based on advertising spend"""
     model_name = "linear_regression_sales"
+    schema = FeatureSchema(
+        Feature("advertising_spend", min_value=0, example=1000, description="Advertising spend in dollars"),
+    )
     
     def get(self, request, *args, **kwargs):
         """Return model info and example inputs"""
         return Response({
             "model": "Linear Regression",
             "use_case": "Sales Prediction",
-            "input_example": {
-                "advertising_spend": 1000
-            },
+            **self.schema_info(),
             "description": "Predicts sales based on advertising spend."
         })
     
-    def process_input(self, data):
-        """Process input data for linear regression"""
-        ad_spend = float(data.get('advertising_spend', 0))
-        return np.array([[ad_spend]])
-    
-    def process_output(self, prediction):
+    def process_output(self, prediction, features):
         """Process linear regression output"""
         sales = float(prediction[0])
         return {
             "prediction": sales,
-            "explanation": f"The predicted sales based on ${data.get('advertising_spend', 0)} advertising spend is ${sales:,.2f}",
+            "explanation": f"The predicted sales based on ${features[0][0]:g} advertising spend is ${sales:,.2f}",
             "r2_score": 0.78
         }
     
@@ -99,23 +93,25 @@ class LinearRegressionSalesView(BaseModelView):
 class MultipleLinearRegressionView(APIView):
     """Multiple linear regression model view for medical cost prediction"""
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    schema = FeatureSchema(
+        Feature("age", min_value=0, max_value=120, example=35, description="Age in years"),
+        Feature("bmi", min_value=0, max_value=100, example=25, description="Body mass index"),
+        Feature("smoker", dtype=int, min_value=0, max_value=1, example=0, description="1 if the person smokes"),
+    )
     
     def get(self, request):
         """Return model info and example inputs"""
         return Response({
             "model": "Multiple Linear Regression",
             "use_case": "Medical Cost Prediction",
-            "input_example": {
-                "age": 35,
-                "bmi": 25,
-                "smoker": 0
-            },
+            "input_example": self.schema.example(),
+            "input_schema": self.schema.describe(),
             "description": "Predicts medical costs based on age, BMI, and smoking status.",
             "csv_support": True,
             "csv_format": {
-                "headers": ["age", "bmi", "smoker"],
+                "headers": list(self.schema.names),
                 "target_column": "cost",
-                "example_row": [35, 25, 0]
+                "example_row": list(self.schema.example().values())
             }
         }, status=status.HTTP_200_OK)
     
@@ -127,6 +123,10 @@ class MultipleLinearRegressionView(APIView):
         if 'headers' in data and 'rows' in data:
             return self._handle_csv_prediction(data)
         
+        # Check if columnar data is provided
+        elif 'columns' in data:
+            return self._handle_columns_prediction(data)
+        
         # Check if CSV file is provided
         elif 'csv' in request.FILES:
             return self._handle_csv_file_prediction(request.FILES['csv'], data.get('target_column'))
@@ -135,12 +135,11 @@ class MultipleLinearRegressionView(APIView):
         else:
             try:
                 # Process input data
-                age = float(data.get('age', 0))
-                bmi = float(data.get('bmi', 0))
-                smoker = int(data.get('smoker', 0))
+                features = self.schema.validate(data)
+                age, bmi, smoker = features[0]
                 
                 # Run prediction (mock for demo)
-                predicted_cost = self._run_prediction([[age, bmi, smoker]])[0]
+                predicted_cost = self._run_prediction(features.tolist())[0]
                 
                 return Response({
                     "prediction": float(predicted_cost),
@@ -148,6 +147,11 @@ class MultipleLinearRegressionView(APIView):
                                   f"{'who smokes' if smoker else 'who does not smoke'} is ${predicted_cost:,.2f}",
                     "r2_score": 0.82
                 }, status=status.HTTP_200_OK)
+            except SchemaValidationError as e:
+                return Response({
+                    "error": str(e),
+                    "details": e.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
                 return Response({
                     "error": str(e)
@@ -165,20 +169,11 @@ class MultipleLinearRegressionView(APIView):
                     "error": "Invalid CSV data format. Expected a list of rows."
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Extract feature columns
-            feature_columns = ['age', 'bmi', 'smoker']
-            
-            # Prepare the input data
-            input_data = []
-            for row in rows:
-                if len(row) < 3:
-                    return Response({
-                        "error": "Each row must have at least age, bmi, and smoker values"
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                input_data.append([float(row[0]), float(row[1]), int(row[2])])
+            # Validate all rows at once against the feature schema
+            input_data = self.schema.validate_rows(rows, headers)
             
             # Run predictions
-            predictions = self._run_prediction(input_data)
+            predictions = self._run_prediction(input_data.tolist())
             
             return Response({
                 "predicted_values": [float(p) for p in predictions],
@@ -187,11 +182,41 @@ class MultipleLinearRegressionView(APIView):
                 "r2_score": 0.82
             }, status=status.HTTP_200_OK)
         
+        except SchemaValidationError as e:
+            return Response({
+                "error": f"Error processing CSV data: {str(e)}",
+                "details": e.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 "error": f"Error processing CSV data: {str(e)}"
             }, status=status.HTTP_400_BAD_REQUEST)
     
+    def _handle_columns_prediction(self, data):
+        """Handle columnar data: a dict of feature name -> list of values"""
+        try:
+            input_data = self.schema.validate_columns(data.get('columns') or {})
+            
+            # Run predictions
+            predictions = self._run_prediction(input_data.tolist())
+            
+            return Response({
+                "predicted_values": [float(p) for p in predictions],
+                "rows_processed": len(input_data),
+                "model": "Multiple Linear Regression",
+                "r2_score": 0.82
+            }, status=status.HTTP_200_OK)
+        
+        except SchemaValidationError as e:
+            return Response({
+                "error": f"Error processing columnar data: {str(e)}",
+                "details": e.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "error": f"Error processing columnar data: {str(e)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
     def _handle_csv_file_prediction(self, csv_file, target_column=None):
         """Handle CSV file upload"""
         try:
@@ -199,18 +224,18 @@ class MultipleLinearRegressionView(APIView):
             df = pd.read_csv(csv_file)
             
             # Verify required columns
-            required_columns = ['age', 'bmi', 'smoker']
+            required_columns = self.schema.names
             missing_columns = [col for col in required_columns if col not in df.columns]
             if missing_columns:
                 return Response({
                     "error": f"Missing required columns in CSV: {', '.join(missing_columns)}"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Prepare input data
-            input_data = df[required_columns].values.tolist()
+            # Validate whole columns at once against the feature schema
+            input_data = self.schema.validate_columns({col: df[col].to_numpy() for col in required_columns})
             
             # Run predictions
-            predictions = self._run_prediction(input_data)
+            predictions = self._run_prediction(input_data.tolist())
             
             # Return results
             return Response({
@@ -220,6 +245,11 @@ class MultipleLinearRegressionView(APIView):
                 "r2_score": 0.82
             }, status=status.HTTP_200_OK)
         
+        except SchemaValidationError as e:
+            return Response({
+                "error": f"Error processing CSV file: {str(e)}",
+                "details": e.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 "error": f"Error processing CSV file: {str(e)}"
@@ -228,7 +258,8 @@ class MultipleLinearRegressionView(APIView):
     def _run_prediction(self, input_data):
         """Run predictions on input data (mock implementation for demo)"""
         predictions = []
-        for features in input_data:
+        for i, features in enumerate(input_data):
+            check_deadline('csv', i, len(input_data))
             age, bmi, smoker = features
             # Mock prediction formula
             predicted_cost = (age * 100) + (bmi * 200) + (smoker * 5000) + 2000
@@ -239,23 +270,25 @@ class MultipleLinearRegressionView(APIView):
 class GeneralRegressionView(APIView):
     """General regression model view for stock price prediction"""
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    schema = FeatureSchema(
+        Feature("prev_price", min_value=0, example=100, description="Previous closing price"),
+        Feature("volume", min_value=0, example=10000, description="Trading volume"),
+        Feature("market_index", min_value=0, example=3000, description="Market index level"),
+    )
     
     def get(self, request):
         """Return model info and example inputs"""
         return Response({
             "model": "General Regression",
             "use_case": "Stock Price Prediction",
-            "input_example": {
-                "prev_price": 100,
-                "volume": 10000,
-                "market_index": 3000
-            },
+            "input_example": self.schema.example(),
+            "input_schema": self.schema.describe(),
             "description": "Predicts stock prices based on previous price, trading volume, and market index.",
             "csv_support": True,
             "csv_format": {
-                "headers": ["prev_price", "volume", "market_index"],
+                "headers": list(self.schema.names),
                 "target_column": "price",
-                "example_row": [100, 10000, 3000]
+                "example_row": list(self.schema.example().values())
             }
         }, status=status.HTTP_200_OK)
     
@@ -267,6 +300,10 @@ class GeneralRegressionView(APIView):
         if 'headers' in data and 'rows' in data:
             return self._handle_csv_prediction(data)
         
+        # Check if columnar data is provided
+        elif 'columns' in data:
+            return self._handle_columns_prediction(data)
+        
         # Check if CSV file is provided
         elif 'csv' in request.FILES:
             return self._handle_csv_file_prediction(request.FILES['csv'], data.get('target_column'))
@@ -275,12 +312,11 @@ class GeneralRegressionView(APIView):
         else:
             try:
                 # Process input data
-                prev_price = float(data.get('prev_price', 0))
-                volume = float(data.get('volume', 0))
-                market_index = float(data.get('market_index', 0))
+                features = self.schema.validate(data)
+                prev_price, volume, market_index = features[0]
                 
                 # Run prediction (mock for demo)
-                predicted_price = self._run_prediction([[prev_price, volume, market_index]])[0]
+                predicted_price = self._run_prediction(features.tolist())[0]
                 
                 return Response({
                     "prediction": float(predicted_price),
@@ -288,6 +324,11 @@ class GeneralRegressionView(APIView):
                                   f"volume {volume:,.0f}, and market index {market_index:,.0f} is ${predicted_price:,.2f}",
                     "confidence": 0.78
                 }, status=status.HTTP_200_OK)
+            except SchemaValidationError as e:
+                return Response({
+                    "error": str(e),
+                    "details": e.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
                 return Response({
                     "error": str(e)
@@ -305,20 +346,11 @@ class GeneralRegressionView(APIView):
                     "error": "Invalid CSV data format. Expected a list of rows."
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Extract feature columns
-            feature_columns = ['prev_price', 'volume', 'market_index']
-            
-            # Prepare the input data
-            input_data = []
-            for row in rows:
-                if len(row) < 3:
-                    return Response({
-                        "error": "Each row must have at least prev_price, volume, and market_index values"
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                input_data.append([float(row[0]), float(row[1]), float(row[2])])
+            # Validate all rows at once against the feature schema
+            input_data = self.schema.validate_rows(rows, headers)
             
             # Run predictions
-            predictions = self._run_prediction(input_data)
+            predictions = self._run_prediction(input_data.tolist())
             
             return Response({
                 "predicted_values": [float(p) for p in predictions],
@@ -327,11 +359,41 @@ class GeneralRegressionView(APIView):
                 "confidence": 0.78
             }, status=status.HTTP_200_OK)
         
+        except SchemaValidationError as e:
+            return Response({
+                "error": f"Error processing CSV data: {str(e)}",
+                "details": e.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 "error": f"Error processing CSV data: {str(e)}"
             }, status=status.HTTP_400_BAD_REQUEST)
     
+    def _handle_columns_prediction(self, data):
+        """Handle columnar data: a dict of feature name -> list of values"""
+        try:
+            input_data = self.schema.validate_columns(data.get('columns') or {})
+            
+            # Run predictions
+            predictions = self._run_prediction(input_data.tolist())
+            
+            return Response({
+                "predicted_values": [float(p) for p in predictions],
+                "rows_processed": len(input_data),
+                "model": "General Regression",
+                "confidence": 0.78
+            }, status=status.HTTP_200_OK)
+        
+        except SchemaValidationError as e:
+            return Response({
+                "error": f"Error processing columnar data: {str(e)}",
+                "details": e.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "error": f"Error processing columnar data: {str(e)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
     def _handle_csv_file_prediction(self, csv_file, target_column=None):
         """Handle CSV file upload"""
         try:
@@ -339,18 +401,18 @@ class GeneralRegressionView(APIView):
             df = pd.read_csv(csv_file)
             
             # Verify required columns
-            required_columns = ['prev_price', 'volume', 'market_index']
+            required_columns = self.schema.names
             missing_columns = [col for col in required_columns if col not in df.columns]
             if missing_columns:
                 return Response({
                     "error": f"Missing required columns in CSV: {', '.join(missing_columns)}"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Prepare input data
-            input_data = df[required_columns].values.tolist()
+            # Validate whole columns at once against the feature schema
+            input_data = self.schema.validate_columns({col: df[col].to_numpy() for col in required_columns})
             
             # Run predictions
-            predictions = self._run_prediction(input_data)
+            predictions = self._run_prediction(input_data.tolist())
             
             # Return results
             return Response({
@@ -360,6 +422,11 @@ class GeneralRegressionView(APIView):
                 "confidence": 0.78
             }, status=status.HTTP_200_OK)
         
+        except SchemaValidationError as e:
+            return Response({
+                "error": f"Error processing CSV file: {str(e)}",
+                "details": e.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 "error": f"Error processing CSV file: {str(e)}"
@@ -368,7 +435,8 @@ class GeneralRegressionView(APIView):
     def _run_prediction(self, input_data):
         """Run predictions on input data (mock implementation for demo)"""
         predictions = []
-        for features in input_data:
+        for i, features in enumerate(input_data):
+            check_deadline('csv', i, len(input_data))
             prev_price, volume, market_index = features
             # Mock prediction formula
             price_change = (0.05 * prev_price) + (volume / 1000000) + (market_index / 10000) - 0.5
@@ -0,0 +1,97 @@
+"""
+Bulk localization through the batch endpoint (/api/predict/translation/batch/)
+versus one /api/predict/translation/ request per text and target language.
+
+--texts short UI strings, a quarter of them repeated, are translated from
+English into --targets languages with the dictionaries and with Google
+Translate, which is the local stand-in server
+(benchmarks/translate_stand_in.py) with --latency seconds per request.
+The source language is detected in both modes. The translation memory is
+switched off so every run does the full work.
+
+Usage: python benchmarks/batch_translation.py [--texts 200] [--targets 9]
+       [--latency 0.05]
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ['TRANSLATION_MEMORY'] = 'False'
+
+from common import setup_django  # noqa: E402
+
+setup_django()
+
+from django.test import Client  # noqa: E402
+from api.translation_data import google_translate  # noqa: E402
+from api.translation_data.google_translate import GoogleTranslator  # noqa: E402
+from api.translation_data.language_detection import SUPPORTED_LANGUAGES  # noqa: E402
+from api.translation_data.translate_client import TranslateClient  # noqa: E402
+from api.views import neural_network_views  # noqa: E402
+from translate_stand_in import start_stand_in  # noqa: E402
+
+WORDS = ("the cat dog house water friend family table book time day people world "
+         "good new big small love eat drink see know think make go come").split()
+
+
+def strings(count, seed=0):
+    rng = random.Random(seed)
+    unique = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 10))).capitalize() + rng.choice('.!?')
+              for _ in range(count - count // 4)]
+    return unique + [rng.choice(unique) for _ in range(count // 4)]
+
+
+def one_by_one(client, texts, targets, **fields):
+    """{(text index, target): translated text} from single requests"""
+    results = {}
+    for i, text in enumerate(texts):
+        for target in targets:
+            response = client.post('/api/predict/translation/', {"text": text, "target_language": target, **fields},
+                                   content_type='application/json')
+            results[i, target] = response.json()['translated_text']
+    return results
+
+
+def batch(client, texts, targets, **fields):
+    response = client.post('/api/predict/translation/batch/',
+                           {"texts": texts, "target_languages": targets, **fields},
+                           content_type='application/json')
+    rows = response.json()['translations']
+    return {(i, target): row[j] for i, row in enumerate(rows) for j, target in enumerate(targets)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--targets", type=int, default=9)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    texts = strings(args.texts)
+    targets = [language for language in SUPPORTED_LANGUAGES if language != "English"][:args.targets]
+    server = start_stand_in(latency=args.latency)
+    # Both translation and the escalated language detections go to the stand-in
+    translator = GoogleTranslator(TranslateClient(server.url))
+    google_translate.google_translator = neural_network_views.google_translator = translator
+    client = Client(HTTP_HOST='localhost')
+    characters = sum(len(text) for text in texts) * len(targets)
+
+    print(f"\n{len(texts)} texts into {len(targets)} languages ({characters:,} source characters translated)")
+    print(f"{'engine':<12}{'mode':<14}{'seconds':>9}{'chars/s':>11}{'upstream requests':>19}")
+    for engine, fields in (("dictionary", {"use_dictionary_only": True}), ("google", {})):
+        outputs = {}
+        for mode, run in (("one by one", one_by_one), ("batch", batch)):
+            before = server.requests
+            start = time.perf_counter()
+            outputs[mode] = run(client, texts, targets, **fields)
+            elapsed = time.perf_counter() - start
+            print(f"{engine:<12}{mode:<14}{elapsed:>9.2f}{characters / elapsed:>11,.0f}{server.requests - before:>19}")
+        if engine == "dictionary":
+            same = outputs["batch"] == outputs["one by one"]
+            print(f"{'':<12}batch output matches single requests: {same}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Load test for the per-family bulkhead executors.
+
+A fixed pool of threads stands in for gunicorn's gthread workers. Closed-loop
+clients flood the image endpoint with slow requests, each one simulating a
+MediaPipe run of --image-latency seconds, while decision-tree predictions
+are timed through the same pool. The scenario runs twice:
+
+  shared     every endpoint runs on the request threads with no limits,
+             which is how the server behaved before bulkheads
+  bulkheads  the admission limits and bulkheads from settings
+
+With shared threads the image flood holds every worker, and tabular latency
+grows to the image latency times the backlog. With bulkheads the image
+family is capped and sheds its excess, so tabular latency stays flat.
+
+Usage: python benchmarks/bulkhead_isolation.py [--requests 100] [--flood 48]
+       [--threads 16] [--image-latency 0.5]
+"""
+import argparse
+import io
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from common import setup_django, summarize, print_table
+
+setup_django()
+
+from rest_framework.response import Response  # noqa: E402
+from api import predict_urls  # noqa: E402
+from api.model_loader import ModelLoader  # noqa: E402
+from api.serving.admission import AdmissionController  # noqa: E402
+from api.serving.bulkheads import Bulkhead  # noqa: E402
+from api.serving.pipeline import get_pipeline  # noqa: E402
+from api.views import DecisionTreeView, NeuralNetworkView  # noqa: E402
+from ml_showcase.wsgi import application  # noqa: E402
+
+IMAGE_PATH = "/api/predict/neural-network/"
+TABULAR_PATH = "/api/predict/decision-tree/"
+TABULAR_PAYLOAD = {
+    "income": 60000, "credit_score": 720, "debt_to_income": 0.3, "loan_term": 15, "loan_amount": 250000
+}
+
+
+def call(path, payload):
+    body = json.dumps(payload).encode()
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'PATH_INFO': path,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+    b''.join(application(environ, lambda status, headers: statuses.append(status)))
+    return int(statuses[0].split()[0])
+
+
+def simulate_image_model(latency):
+    """Replace the image view with a stand-in that is busy for `latency` seconds"""
+    def post(self, request):
+        time.sleep(latency)
+        return Response({"prediction": "simulated", "confidence": 1.0})
+    NeuralNetworkView.post = post
+
+
+def share_everything():
+    """Configure every pipeline like the server before bulkheads: no limits, request threads only"""
+    saved = {}
+    shared = Bulkhead('shared', 10**6, 0, 0, dedicated_threads=False)
+    for pattern in predict_urls.urlpatterns:
+        pipeline = get_pipeline(pattern.name)
+        saved[pattern.name] = (pipeline.admission, pipeline.bulkhead)
+        pipeline.admission = AdmissionController(pattern.name, 10**6, 0, 0)
+        pipeline.bulkhead = shared
+    return saved
+
+
+def restore(saved):
+    for name, (admission, bulkhead) in saved.items():
+        pipeline = get_pipeline(name)
+        pipeline.admission, pipeline.bulkhead = admission, bulkhead
+
+
+def run_scenario(threads, flood, requests):
+    """Time tabular requests while `flood` clients hammer the image endpoint"""
+    server = ThreadPoolExecutor(max_workers=threads)
+    stop = threading.Event()
+    image_statuses = Counter()
+    lock = threading.Lock()
+
+    def flood_client(client):
+        sent = 0
+        while not stop.is_set():
+            status = server.submit(call, IMAGE_PATH, {"client": client, "request": sent}).result()
+            sent += 1
+            with lock:
+                image_statuses[status] += 1
+            if status in (429, 503):
+                time.sleep(0.05)
+
+    clients = [threading.Thread(target=flood_client, args=(i,), daemon=True) for i in range(flood)]
+    for client in clients:
+        client.start()
+    time.sleep(0.5 if flood else 0)
+
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        status = server.submit(call, TABULAR_PATH, TABULAR_PAYLOAD).result()
+        samples.append((time.perf_counter() - start) * 1000)
+        if status != 200:
+            print(f"WARNING: tabular request returned {status}")
+
+    stop.set()
+    for client in clients:
+        client.join()
+    server.shutdown()
+    return summarize(samples), image_statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=100, help="tabular requests to time per scenario")
+    parser.add_argument('--flood', type=int, default=48, help="concurrent image clients")
+    parser.add_argument('--threads', type=int, default=16, help="simulated gunicorn threads")
+    parser.add_argument('--image-latency', type=float, default=0.5, help="seconds per image request")
+    args = parser.parse_args()
+
+    if ModelLoader.load_sklearn_model(DecisionTreeView.model_name) is None:
+        DecisionTreeView().train_model()
+    simulate_image_model(args.image_latency)
+    call(TABULAR_PATH, TABULAR_PAYLOAD)
+
+    rows = []
+    baseline, _ = run_scenario(args.threads, 0, args.requests)
+    rows.append(("no flood", baseline))
+
+    saved = share_everything()
+    shared, shared_images = run_scenario(args.threads, args.flood, args.requests)
+    restore(saved)
+    rows.append(("shared + image flood", shared))
+
+    isolated, isolated_images = run_scenario(args.threads, args.flood, args.requests)
+    rows.append(("bulkheads + image flood", isolated))
+
+    print_table(
+        f"decision-tree latency in ms, {args.threads} server threads, "
+        f"{args.flood} image clients at {args.image_latency}s", rows
+    )
+    print()
+    for label, statuses in (("shared", shared_images), ("bulkheads", isolated_images)):
+        counts = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+        print(f"image responses ({label}): {counts}")
+
+
+if __name__ == "__main__":
+    main()
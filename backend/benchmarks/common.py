@@ -0,0 +1,67 @@
+"""
+Shared helpers for the backend benchmark scripts.
+Scripts in this directory are run from the backend directory, e.g.
+python benchmarks/fast_path_latency.py
+"""
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def setup_django():
+    """Set up the Django environment the same way train_models.py does"""
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ml_showcase.settings")
+    import django
+    django.setup()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def time_calls(fn, iterations, warmup=50):
+    """Call fn repeatedly and return per-call latencies in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    """Summarize latency samples (milliseconds)"""
+    return {
+        "count": len(samples),
+        "mean_ms": sum(samples) / len(samples) if samples else 0.0,
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99),
+    }
+
+
+def print_table(title, rows):
+    """Print rows of (label, summary) as an aligned table"""
+    print(f"\n{title}")
+    print(f"{'':<32}{'mean':>10}{'p50':>10}{'p99':>10}")
+    for label, summary in rows:
+        print(f"{label:<32}{summary['mean_ms']:>10.3f}{summary['p50_ms']:>10.3f}{summary['p99_ms']:>10.3f}")
+
+
+def rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
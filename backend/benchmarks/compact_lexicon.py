@@ -0,0 +1,97 @@
+"""
+Memory and lookup latency of the built translation dictionaries in the
+two layouts of settings.TRANSLATION_LEXICONS['layout']:
+
+  dict      a Python dict per language pair (DictionaryStore)
+  compact   interned words per language and integer word-ID arrays per
+            pair (api.translation_data.compact_lexicon)
+
+Memory is what the store keeps alive once built, measured with
+tracemalloc. It includes the word strings, except for the bundled lists'
+own, which language_data holds either way. The other rows use the
+synthetic lexicons of benchmarks/pivot_dictionaries.py with --scale times
+as many entries per seed pair as the bundled lists have, so 100 is a
+vocabulary 100 times today's.
+
+Usage: python benchmarks/compact_lexicon.py [--scale 1 100]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+# Importing pivot_dictionaries sets up Django
+from pivot_dictionaries import TOPOLOGIES, synthetic_lexicons
+
+from api.translation_data import dictionary_utils
+from api.translation_data.compact_lexicon import CompactLexiconStore
+from api.translation_data.dictionary_store import DictionaryStore
+from api.translation_data.language_data import LANGUAGE_DICTIONARIES
+
+LAYOUTS = {"dict": DictionaryStore, "compact": CompactLexiconStore}
+
+
+def bundled_entries():
+    """Mean entries per seed pair of the bundled word lists"""
+    sizes = [len(words) for targets in LANGUAGE_DICTIONARIES.values() for words in targets.values()]
+    return sum(sizes) // len(sizes)
+
+
+def expand(scale):
+    """Expanded dictionaries for every pair"""
+    if scale == 'bundled':
+        dictionaries = dictionary_utils.copy_dictionaries(LANGUAGE_DICTIONARIES)
+    else:
+        dictionaries = synthetic_lexicons(TOPOLOGIES['bundled'], int(scale) * bundled_entries())
+    dictionary_utils.generate_complete_dictionaries(dictionaries)
+    dictionary_utils.build_direct_translations(dictionaries)
+    return dictionaries
+
+
+def build(layout, scale):
+    """(store, bytes it keeps alive, build seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    dictionaries = expand(scale)
+    start = time.perf_counter()
+    store = LAYOUTS[layout](dictionaries)
+    seconds = time.perf_counter() - start
+    del dictionaries
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return store, size, seconds
+
+
+def lookup_us(store, words, pair):
+    dictionary = store.dictionary(*pair)
+    start = time.perf_counter()
+    for word in words:
+        dictionary.get(word)
+    return (time.perf_counter() - start) / len(words) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", nargs="+", default=["1", "100"])
+    args = parser.parse_args()
+
+    pair = ("Spanish", "German")
+    print(f"\nBundled word lists: {bundled_entries()} entries per seed pair on average")
+    print(f"{'scale':>8}{'entries':>11}{'dict MB':>9}{'compact MB':>12}{'saved':>7}"
+          f"{'dict build s':>14}{'compact build s':>17}{'dict us':>9}{'compact us':>12}")
+    for scale in ["bundled"] + args.scale:
+        stores, sizes, seconds = {}, {}, {}
+        for layout in LAYOUTS:
+            stores[layout], sizes[layout], seconds[layout] = build(layout, scale)
+        words = list(stores["dict"].dictionary(*pair))
+        sample = random.Random(0).choices(words, k=20000) + ["unknownword"] * 2000
+        entries = sum(len(stores["dict"].dictionary(*language_pair)) for language_pair in stores["dict"].language_pairs())
+        print(f"{scale:>8}{entries:>11,}{sizes['dict'] / 2**20:>9.2f}{sizes['compact'] / 2**20:>12.2f}"
+              f"{1 - sizes['compact'] / sizes['dict']:>7.0%}{seconds['dict']:>14.2f}{seconds['compact']:>17.2f}"
+              f"{lookup_us(stores['dict'], sample, pair):>9.2f}{lookup_us(stores['compact'], sample, pair):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
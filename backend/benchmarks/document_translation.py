@@ -0,0 +1,122 @@
+"""
+Time to first output and total time of long document translation, through
+the streaming document endpoint (/api/predict/translation/document/) and
+the existing one-shot path, TranslationView's dictionary and Google
+translation of the whole text.
+
+Google Translate is the local stand-in server
+(benchmarks/translate_stand_in.py) with --latency seconds per request
+plus --per-char seconds per character, roughly like the real service. The
+translation memory is switched off so every run does the full work.
+Worker processes only shorten the total on a machine with spare cores.
+
+Usage: python benchmarks/document_translation.py [--paragraphs 400]
+       [--latency 0.05] [--processes 0 2 4]
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ['TRANSLATION_MEMORY'] = 'False'
+
+from common import setup_django  # noqa: E402
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.test import Client  # noqa: E402
+from api.translation_data import documents  # noqa: E402
+from api.translation_data.google_translate import GoogleTranslator  # noqa: E402
+from api.translation_data.translate_client import TranslateClient  # noqa: E402
+from api.views import TranslationView  # noqa: E402
+from api.views import neural_network_views  # noqa: E402
+from translate_stand_in import start_stand_in  # noqa: E402
+
+WORDS = ("the cat dog house water friend family table book time day people world "
+         "good new big small love eat drink see know think make go come").split()
+
+
+def document(paragraphs, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for p in range(paragraphs):
+        if p % 20 == 0:
+            lines.append(f"## Section {p // 20 + 1}\n")
+        sentences = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + '.'
+                     for _ in range(rng.randint(2, 5))]
+        lines.append(' '.join(sentences) + '\n')
+    return '\n'.join(lines)
+
+
+def stream(client, text, **fields):
+    """(seconds to the first segment, total seconds, translated text)"""
+    start = time.perf_counter()
+    response = client.post('/api/predict/translation/document/',
+                           {"text": text, "source_language": "English", "target_language": "Spanish", **fields},
+                           content_type='application/json')
+    first, parts, buffer = None, [], b''
+    for chunk in response.streaming_content:
+        buffer += chunk
+        *events, buffer = buffer.split(b'\n')
+        for line in events:
+            event = json.loads(line)
+            if event['event'] == 'segment':
+                first = first or time.perf_counter() - start
+                parts.append(event['translated_text'])
+            elif event['event'] == 'error':
+                raise RuntimeError(event['error'])
+    return first, time.perf_counter() - start, ''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--per-char", type=float, default=0.00002)
+    parser.add_argument("--processes", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args()
+
+    text = document(args.paragraphs)
+    server = start_stand_in(latency=args.latency)
+    # Slow the stand-in down with the length of each request
+    base_answer = server.RequestHandlerClass._answer
+
+    def answer(handler, params):
+        time.sleep(len(params.get('q', [''])[0]) * args.per_char)
+        base_answer(handler, params)
+    server.RequestHandlerClass._answer = answer
+
+    translator = GoogleTranslator(TranslateClient(server.url))
+    neural_network_views.google_translator = translator
+    client = Client(HTTP_HOST='localhost')
+    view = TranslationView()
+
+    print(f"\nDocument: {args.paragraphs} paragraphs, {len(text):,} characters")
+    print(f"{'mode':<36}{'first output s':>15}{'total s':>10}")
+
+    start = time.perf_counter()
+    view._translate_text(text, "English", "Spanish")
+    elapsed = time.perf_counter() - start
+    print(f"{'dictionary, one shot':<36}{elapsed:>15.3f}{elapsed:>10.3f}")
+    for processes in args.processes:
+        settings.TRANSLATION_DOCUMENTS['dictionary_processes'] = processes
+        documents._pools.pop('dictionary', None)
+        stream(client, text, use_dictionary_only=True)  # starts every worker
+        first, total, translated = stream(client, text, use_dictionary_only=True)
+        assert translated.count('\n') == text.count('\n'), "Streamed translation lost lines"
+        label = f"dictionary, streamed, {processes} processes" if processes else "dictionary, streamed, threads"
+        print(f"{label:<36}{first:>15.3f}{total:>10.3f}")
+
+    start = time.perf_counter()
+    view._translate_remote(text, "English", "Spanish")
+    elapsed = time.perf_counter() - start
+    print(f"{'google, one shot':<36}{elapsed:>15.3f}{elapsed:>10.3f}")
+    first, total, _ = stream(client, text)
+    print(f"{'google, streamed':<36}{first:>15.3f}{total:>10.3f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
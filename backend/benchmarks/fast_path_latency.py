@@ -0,0 +1,86 @@
+"""
+Side-by-side latency of the DRF prediction path and the WSGI fast path.
+
+Both paths are driven in-process through their WSGI callables with the
+same JSON payloads, so the difference is purely framework overhead.
+Models that are missing from MODELS_DIR are trained first.
+
+Usage: python benchmarks/fast_path_latency.py [iterations]
+"""
+import io
+import json
+import sys
+from wsgiref.util import setup_testing_defaults
+
+from common import setup_django, time_calls, summarize, print_table
+
+setup_django()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from api.model_loader import ModelLoader  # noqa: E402
+from api.serving import FastPathApplication  # noqa: E402
+from api.views import LinearRegressionView, KNNView, DecisionTreeView  # noqa: E402
+
+CASES = [
+    ("linear-regression", LinearRegressionView, {"sqft": 1500}),
+    ("knn", KNNView, {"action_score": 0.7, "comedy_score": 0.3, "drama_score": 0.5, "scifi_score": 0.8}),
+    ("decision-tree", DecisionTreeView, {
+        "income": 60000, "credit_score": 720, "debt_to_income": 0.3, "loan_term": 15, "loan_amount": 250000
+    }),
+]
+
+
+def make_environ(path, payload):
+    body = json.dumps(payload).encode()
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'PATH_INFO': path,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    setup_testing_defaults(environ)
+    return environ
+
+
+def call(app, path, payload):
+    statuses = []
+
+    def start_response(status, headers):
+        statuses.append(status)
+
+    body = b''.join(app(make_environ(path, payload), start_response))
+    return statuses[0], body
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    django_app = get_wsgi_application()
+    fast_app = FastPathApplication(django_app)
+
+    rows = []
+    speedups = []
+    for route, view_class, payload in CASES:
+        if ModelLoader.load_sklearn_model(view_class.model_name) is None:
+            view_class().train_model()
+
+        path = f"/api/predict/{route}/"
+        drf_status, drf_body = call(django_app, path, payload)
+        fast_status, fast_body = call(fast_app, path, payload)
+        if (drf_status, drf_body) != (fast_status, fast_body):
+            print(f"WARNING: responses differ for {path}: {drf_status} {drf_body!r} vs {fast_status} {fast_body!r}")
+
+        drf = summarize(time_calls(lambda: call(django_app, path, payload), iterations))
+        fast = summarize(time_calls(lambda: call(fast_app, path, payload), iterations))
+        rows.append((f"{route} (DRF)", drf))
+        rows.append((f"{route} (fast path)", fast))
+        speedups.append((route, drf['p50_ms'] / fast['p50_ms']))
+
+    print_table(f"Prediction latency in ms over {iterations} requests", rows)
+    print()
+    for route, speedup in speedups:
+        print(f"{route}: fast path p50 is {speedup:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Memory per worker process with and without preloading the application in
+the master, the way gunicorn.conf.py runs it.
+
+A master process forks --workers workers, each serving --requests
+dictionary translation requests through the WSGI application and then
+running a full garbage collection. Every worker then reports its memory
+from /proc/self/smaps_rollup:
+
+  rss       resident memory, shared pages included
+  pss       proportional share: shared pages split between the processes
+  private   pages no other process shares (unique set size)
+
+Modes, each in a fresh master process:
+
+  no preload         workers load the application after the fork
+  preload            the master loads it and forks
+  preload + freeze   the master loads it with the garbage collector
+                     disabled and freezes the heap (gc.freeze) before
+                     forking, as gunicorn.conf.py does
+
+Linux only. Usage: python benchmarks/fork_memory.py [--workers 4] [--requests 200]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+MODES = ["no preload", "preload", "preload + freeze"]
+
+
+def memory_mb():
+    """rss, pss and private memory of this process in MB"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        "rss": fields['Rss'],
+        "pss": fields['Pss'],
+        "private": fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def load_application():
+    """The WSGI application with its views imported, as gunicorn.conf.py preloads it"""
+    from common import setup_django
+    setup_django()
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+    app = get_wsgi_application()
+    get_resolver().url_patterns
+    return app
+
+
+def serve(app, requests):
+    from translation_latency import call
+    from api.translation_data.testing_utils import SAMPLE_TEXTS
+
+    languages = list(SAMPLE_TEXTS)
+    for i in range(requests):
+        source = languages[i % len(languages)]
+        target = languages[(i * 7 + 1) % len(languages)]
+        text = SAMPLE_TEXTS[source][i % len(SAMPLE_TEXTS[source])]
+        call(app, {"text": text, "source_language": source, "target_language": target,
+                   "use_dictionary_only": True})
+    gc.collect()
+
+
+def run_master(mode, workers, requests):
+    """Fork the workers and print their memory as JSON lines"""
+    os.environ['TRANSLATION_MEMORY'] = 'False'
+    app = None
+    if mode != "no preload":
+        if mode == "preload + freeze":
+            gc.disable()
+        app = load_application()
+        if mode == "preload + freeze":
+            gc.freeze()
+            gc.enable()
+
+    # Workers stay alive until all have measured, so their pages stay shared
+    release_read, release_write = os.pipe()
+    pipes = []
+    for _ in range(workers):
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            os.close(release_write)
+            worker_app = app or load_application()
+            serve(worker_app, requests)
+            os.write(write_end, json.dumps(memory_mb()).encode())
+            os.close(write_end)
+            os.read(release_read, 1)
+            os._exit(0)
+        os.close(write_end)
+        pipes.append((pid, read_end))
+
+    for _, read_end in pipes:
+        with os.fdopen(read_end) as f:
+            print(f.read())
+    os.close(release_write)
+    for pid, _ in pipes:
+        os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_master(args.mode, args.workers, args.requests)
+        return
+
+    print(f"\nMemory per worker in MB ({args.workers} workers, {args.requests} requests each)")
+    print(f"{'mode':<20}{'rss':>10}{'pss':>10}{'private':>10}{'total pss':>12}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--workers", str(args.workers),
+             "--requests", str(args.requests)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        samples = [json.loads(line) for line in output.splitlines() if line.startswith('{')]
+        mean = {key: sum(sample[key] for sample in samples) / len(samples) for key in ("rss", "pss", "private")}
+        total = sum(sample["pss"] for sample in samples)
+        print(f"{mode:<20}{mean['rss']:>10.1f}{mean['pss']:>10.1f}{mean['private']:>10.1f}{total:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+GoogleTranslator over the pooled TranslateClient, against the local
+stand-in server (benchmarks/translate_stand_in.py) in several upstream
+conditions. Closed-loop threads translate texts with a dictionary
+fallback that answers instantly.
+
+  healthy   the upstream answers after --latency seconds
+  flaky     --failure-rate of the upstream requests answer 503
+  hanging   the upstream takes 10x the client timeout; calls time out
+            until the circuit breaker opens, then fall back at once
+  recovery  the hanging upstream heals; after reset_timeout the breaker
+            lets a trial call through and closes
+
+A final comparison translates one document of --segments segments per
+call and in one batch.
+
+Usage: python benchmarks/google_translate_client.py [--calls 200] [--threads 8]
+       [--latency 0.02] [--failure-rate 0.3] [--timeout 0.25] [--segments 100]
+"""
+import argparse
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from common import setup_django, summarize
+
+setup_django()
+
+from api.translation_data.google_translate import GoogleTranslator  # noqa: E402
+from api.translation_data.translate_client import TranslateClient  # noqa: E402
+from translate_stand_in import start_stand_in  # noqa: E402
+
+FALLBACK = "(dictionary)"
+
+
+def fallback(text, source_language, target_language):
+    return FALLBACK
+
+
+def run_calls(translator, calls, threads):
+    """Translate calls texts from threads threads; returns (latencies ms, outcomes)"""
+    latencies, outcomes = [], Counter()
+    lock = threading.Lock()
+
+    def call(i):
+        start = time.perf_counter()
+        translated = translator.translate_text(f"hello world {i}", "English", "Spanish", fallback_fn=fallback)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            outcomes['fallback' if translated == FALLBACK else 'remote'] += 1
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(calls)))
+    return latencies, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--timeout", type=float, default=0.25)
+    parser.add_argument("--reset-timeout", type=float, default=1.0)
+    parser.add_argument("--segments", type=int, default=100)
+    args = parser.parse_args()
+    # Failed upstream calls are expected here and counted in the table
+    logging.disable(logging.ERROR)
+
+    server = start_stand_in(latency=args.latency)
+    client = TranslateClient(server.url, pool_size=args.threads, timeout=args.timeout,
+                             retries=2, backoff=0.02, failure_threshold=5, reset_timeout=args.reset_timeout)
+    translator = GoogleTranslator(client)
+
+    print(f"\n{'scenario':<10}{'remote':>8}{'fallback':>10}{'upstream':>10}"
+          f"{'mean ms':>10}{'p50 ms':>9}{'p99 ms':>9}  breaker")
+
+    def scenario(name, calls=args.calls):
+        before = server.requests
+        latencies, outcomes = run_calls(translator, calls, args.threads)
+        summary = summarize(latencies)
+        print(f"{name:<10}{outcomes['remote']:>8}{outcomes['fallback']:>10}{server.requests - before:>10}"
+              f"{summary['mean_ms']:>10.1f}{summary['p50_ms']:>9.1f}{summary['p99_ms']:>9.1f}  {client.breaker.state}")
+
+    scenario('healthy')
+
+    server.failure_rate = args.failure_rate
+    scenario('flaky')
+    server.failure_rate = 0.0
+
+    server.latency = args.timeout * 10
+    scenario('hanging')
+
+    server.latency = args.latency
+    time.sleep(args.reset_timeout)
+    scenario('recovery')
+
+    texts = [f"Sentence number {i} of the document." for i in range(args.segments)]
+    before, start = server.requests, time.perf_counter()
+    one_by_one = [translator.translate_text(text, "English", "Spanish", fallback_fn=fallback) for text in texts]
+    single_s, single_requests = time.perf_counter() - start, server.requests - before
+    before, start = server.requests, time.perf_counter()
+    batched = translator.translate_batch(texts, "English", "Spanish", fallback_fn=fallback)
+    batch_s, batch_requests = time.perf_counter() - start, server.requests - before
+    assert batched == one_by_one, "Batched translations differ from single calls"
+    print(f"\n{args.segments} segments one per call: {single_requests} upstream requests, {single_s * 1000:.0f} ms")
+    print(f"{args.segments} segments batched:      {batch_requests} upstream requests, {batch_s * 1000:.0f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
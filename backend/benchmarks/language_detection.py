@@ -0,0 +1,64 @@
+"""
+Accuracy and speed of dictionary-based language detection on the sample
+texts in api/translation_data/testing_utils.py, and the share of texts the
+local-first policy would escalate to the remote detector at several
+confidence thresholds.
+
+Usage: python benchmarks/language_detection.py [iterations]
+"""
+import sys
+import time
+
+from common import setup_django, time_calls, summarize, print_table
+
+setup_django()
+
+from api.translation_data.language_detection import get_language_detector  # noqa: E402
+from api.translation_data.testing_utils import SAMPLE_TEXTS  # noqa: E402
+
+THRESHOLDS = [0.3, 0.4, 0.5, 0.6, 0.7]
+# Short inputs, as typed into the translation form
+SHORT_TEXTS = ["Hello", "Hola", "Bonjour", "Ciao", "Danke", "Obrigado", "la", "ok", "Claude", "merci beaucoup"]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    detector = get_language_detector()
+    samples = [(language, text) for language, texts in SAMPLE_TEXTS.items() for text in texts]
+
+    print(f"\n{'language':<12}{'correct':>9}{'mean confidence':>17}  misdetected as")
+    correct = 0
+    for language, texts in SAMPLE_TEXTS.items():
+        detections = detector.detect_batch(texts)
+        hits = sum(detection.language == language for detection in detections)
+        correct += hits
+        wrong = sorted({detection.language for detection in detections if detection.language != language})
+        confidence = sum(detection.confidence for detection in detections) / len(detections)
+        print(f"{language:<12}{hits:>6}/{len(texts):<2}{confidence:>17.2f}  {', '.join(wrong)}")
+    print(f"{'accuracy':<12}{correct:>6}/{len(samples):<2} ({correct / len(samples):.0%})")
+
+    sample_confidences = [detection.confidence for detection in detector.detect_batch([t for _, t in samples])]
+    short_confidences = [detection.confidence for detection in detector.detect_batch(SHORT_TEXTS)]
+    print(f"\n{'threshold':<12}{'escalated samples':>19}{'escalated short texts':>23}")
+    for threshold in THRESHOLDS:
+        escalated = sum(confidence < threshold for confidence in sample_confidences)
+        short = sum(confidence < threshold for confidence in short_confidences)
+        print(f"{threshold:<12}{escalated:>16}/{len(samples):<2}{short:>20}/{len(SHORT_TEXTS):<2}")
+
+    texts = [text for _, text in samples]
+    rows = [
+        ("detect, one sample text", summarize(time_calls(lambda: detector.detect(texts[0]), iterations * 10))),
+        (f"detect_batch, {len(texts)} texts", summarize(time_calls(lambda: detector.detect_batch(texts), iterations))),
+    ]
+    print_table("Detection latency in ms", rows)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        detector.detect_batch(texts)
+    elapsed = time.perf_counter() - start
+    print(f"\nThroughput: {iterations * len(texts) / elapsed:,.0f} texts/s, "
+          f"{iterations * sum(map(len, texts)) / elapsed / 1e6:.2f}M chars/s")
+
+
+if __name__ == "__main__":
+    main()
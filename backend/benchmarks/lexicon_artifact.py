@@ -0,0 +1,88 @@
+"""
+Startup cost, memory and lookup latency of the translation dictionaries:
+expanded into Python dicts in every worker, or compiled once into the
+memory-mapped lexicon artifact.
+
+Sizes other than "bundled" use the synthetic lexicons of
+benchmarks/pivot_dictionaries.py with that many entries per seed pair.
+
+Usage: python benchmarks/lexicon_artifact.py [--entries bundled 10000 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Importing pivot_dictionaries sets up Django
+from pivot_dictionaries import TOPOLOGIES, synthetic_lexicons
+
+from api.translation_data import dictionary_utils
+from api.translation_data.dictionary_store import DictionaryStore, get_dictionary_store
+from api.translation_data.lexicon_artifact import LexiconArtifact, write_lexicon_artifact
+
+
+def expand(entries):
+    """Expanded dictionaries for every pair"""
+    if entries == 'bundled':
+        store = get_dictionary_store()
+        return {source: {target: dict(store.dictionary(source, target)) for target in store[source]}
+                for source in store}
+    dictionaries = synthetic_lexicons(TOPOLOGIES['bundled'], int(entries))
+    dictionary_utils.generate_complete_dictionaries(dictionaries)
+    dictionary_utils.build_direct_translations(dictionaries)
+    return dictionaries
+
+
+def heap_size(dictionaries):
+    """Bytes of the dicts and (distinct) word strings of the expanded dictionaries"""
+    size = 0
+    strings = {}
+    for targets in dictionaries.values():
+        for words in targets.values():
+            size += sys.getsizeof(words)
+            for word, translation in words.items():
+                strings[id(word)] = word
+                strings[id(translation)] = translation
+    return size + sum(sys.getsizeof(string) for string in strings.values())
+
+
+def lookup_us(store, words, pair):
+    dictionary = store.dictionary(*pair)
+    start = time.perf_counter()
+    for word in words:
+        dictionary.get(word)
+    return (time.perf_counter() - start) / len(words) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", nargs="+", default=["bundled", "10000", "100000"])
+    args = parser.parse_args()
+
+    pair = ("Spanish", "German")
+    print(f"\n{'entries/pair':>12}{'words':>11}{'build s':>9}{'dict MB':>9}{'file MB':>9}"
+          f"{'map ms':>8}{'dict us':>9}{'mmap us':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for entries in args.entries:
+            start = time.perf_counter()
+            dictionaries = expand(entries)
+            build = time.perf_counter() - start
+            store = DictionaryStore(dictionaries)
+
+            path = os.path.join(directory, f"lexicon-{entries}.bin")
+            write_lexicon_artifact(store, path)
+            start = time.perf_counter()
+            artifact = LexiconArtifact(path)
+            load = (time.perf_counter() - start) * 1000
+
+            words = list(store.dictionary(*pair))
+            sample = random.Random(0).choices(words, k=20000) + ["unknownword"] * 2000
+            total = sum(len(words) for targets in dictionaries.values() for words in targets.values())
+            print(f"{entries:>12}{total:>11}{build:>9.2f}{heap_size(dictionaries) / 2**20:>9.1f}"
+                  f"{os.path.getsize(path) / 2**20:>9.1f}{load:>8.2f}{lookup_us(store, sample, pair):>9.2f}{lookup_us(artifact, sample, pair):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Memory and lookup latency of large TSV lexicons: loaded into Python dicts,
+or served from the SQLite lexicon store through its hot-word cache.
+
+Each size writes synthetic English-Spanish and English-French lexicons
+with that many entries, then looks up words with a skewed (Zipf-like)
+distribution, as in running text.
+
+Usage: python benchmarks/lexicon_store.py [--entries 10000 100000 500000] [--lookups 50000]
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+
+from common import setup_django, rss_mb
+
+setup_django()
+
+from api.translation_data.lexicon_store import SQLiteLexiconStore  # noqa: E402
+
+PAIRS = [("English", "Spanish"), ("English", "French")]
+
+
+def write_lexicons(directory, entries):
+    for source, target in PAIRS:
+        with open(os.path.join(directory, f"{source}-{target}.tsv"), "w", encoding="utf-8") as f:
+            for i in range(entries):
+                f.write(f"{source[:3].lower()}word{i}\t{target[:3].lower()}word{i}\n")
+
+
+def load_dicts(directory):
+    dictionaries = {}
+    for source, target in PAIRS:
+        with open(os.path.join(directory, f"{source}-{target}.tsv"), encoding="utf-8") as f:
+            dictionaries[(source, target)] = dict(line.rstrip("\n").split("\t") for line in f)
+    return dictionaries
+
+
+def skewed_words(entries, count, seed=0):
+    rng = random.Random(seed)
+    return [f"engword{min(entries - 1, int(rng.paretovariate(1.2)) - 1)}" for _ in range(count)]
+
+
+def lookup_us(dictionary, words):
+    start = time.perf_counter()
+    for word in words:
+        dictionary.get(word)
+    return (time.perf_counter() - start) / len(words) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--lookups", type=int, default=50000)
+    parser.add_argument("--cache-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"\n{'entries/pair':>12}{'dict +MB':>10}{'dict us':>9}"
+          f"{'import s':>10}{'sqlite +MB':>12}{'sqlite us':>11}{'hit rate':>10}")
+    for entries in args.entries:
+        with tempfile.TemporaryDirectory() as directory:
+            write_lexicons(directory, entries)
+            words = skewed_words(entries, args.lookups)
+
+            gc.collect()
+            before = rss_mb()
+            dictionaries = load_dicts(directory)
+            dict_mb = rss_mb() - before
+            dict_us = lookup_us(dictionaries[PAIRS[0]], words)
+            del dictionaries
+            gc.collect()
+
+            before = rss_mb()
+            store = SQLiteLexiconStore(os.path.join(directory, "lexicons.sqlite3"), directory,
+                                       cache_size=args.cache_size)
+            start = time.perf_counter()
+            store.import_all()
+            import_s = time.perf_counter() - start
+            dictionary = store.dictionary(*PAIRS[0])
+            sqlite_us = lookup_us(dictionary, words)
+            sqlite_mb = rss_mb() - before
+            hit_rate = 1 - len(set(words)) / len(words)
+            print(f"{entries:>12}{dict_mb:>10.1f}{dict_us:>9.2f}"
+                  f"{import_s:>10.2f}{sqlite_mb:>12.1f}{sqlite_us:>11.2f}{hit_rate:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Throughput and dictionary coverage of sentence segmentation on the sample
+texts (api/translation_data/testing_utils.py), translated from each
+language into every other one.
+
+  word by word   the previous lookup: re.findall tokens, re.match per
+                 token, one dictionary lookup per token
+  phrase trie    tokenize once, then PhraseTrie longest-match segmentation
+                 with phrases and CJK maximal matching
+
+Coverage is the share of word characters translated from the lexicon
+rather than by the rule-based fallback. The last column times the whole
+dictionary translation (TranslationView._translate_text) with the
+translation memory switched off.
+
+Usage: python benchmarks/phrase_segmentation.py [--repeat 200]
+"""
+import argparse
+import os
+import re
+import time
+
+os.environ['TRANSLATION_MEMORY'] = 'False'
+
+from common import setup_django  # noqa: E402
+
+setup_django()
+
+from api.translation_data.segmentation import tokenize  # noqa: E402
+from api.translation_data.testing_utils import SAMPLE_TEXTS  # noqa: E402
+from api.views import TranslationView  # noqa: E402
+
+
+def word_by_word(sentence, dictionary):
+    """(word, translated from the lexicon) pairs the way sentences used to be looked up"""
+    return [(word, word.lower() in dictionary)
+            for word in re.findall(r'(\b[\w\']+\b|\S)', sentence) if re.match(r'\w', word)]
+
+
+def phrase_trie(sentence, trie):
+    return [(text, translation is not None)
+            for text, translation, is_word in trie.segment(tokenize(sentence)) if is_word]
+
+
+def coverage(pairs):
+    total = sum(len(word) for word, _ in pairs)
+    return sum(len(word) for word, found in pairs if found) / max(1, total)
+
+
+def throughput(fn, texts, repeat):
+    """Characters per second of fn over texts"""
+    characters = sum(len(text) for text in texts) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return characters / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    view = TranslationView()
+    store = view.dictionaries
+    languages = list(SAMPLE_TEXTS)
+
+    print(f"\n{'source':<12}{'word by word':>14}{'phrase trie':>13}{'coverage':>18}{'translation':>13}")
+    print(f"{'':<12}{'chars/s':>14}{'chars/s':>13}{'before → after':>18}{'chars/s':>13}")
+    for source in languages:
+        texts = SAMPLE_TEXTS[source]
+        targets = [target for target in languages if target != source]
+        old_rate = new_rate = translate_rate = 0.0
+        old_pairs, new_pairs = [], []
+        for target in targets:
+            dictionary = store.dictionary(source, target)
+            trie = store.phrase_trie(source, target)
+            old_rate += throughput(lambda text: word_by_word(text, dictionary), texts, args.repeat)
+            new_rate += throughput(lambda text: phrase_trie(text, trie), texts, args.repeat)
+            translate_rate += throughput(lambda text: view._translate_text(text, source, target), texts,
+                                         max(1, args.repeat // 20))
+            for text in texts:
+                old_pairs += word_by_word(text, dictionary)
+                new_pairs += phrase_trie(text, trie)
+        count = len(targets)
+        print(f"{source:<12}{old_rate / count:>14,.0f}{new_rate / count:>13,.0f}"
+              f"{coverage(old_pairs):>10.1%} → {coverage(new_pairs):.1%}{translate_rate / count:>11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
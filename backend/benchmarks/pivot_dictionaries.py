@@ -0,0 +1,86 @@
+"""
+Cost of expanding the translation lexicons into dictionaries for every
+language pair (reversal, English pivots and two-hop pivots) as the
+lexicons grow.
+
+Synthetic lexicons replace the bundled ones: every language has one word
+per concept and each seed pair covers a random 90% of the concepts. The
+"bundled" topology uses the same seed pairs as language_data.py, which
+English links to every language. The "chain" topology only links
+neighbouring languages, so most pairs need the two-hop pivots.
+
+The digest covers every generated dictionary in order, so runs against
+different implementations can be compared for identical output.
+
+Usage: python benchmarks/pivot_dictionaries.py [--entries 1000 10000 100000] [--topology bundled chain]
+"""
+import argparse
+import hashlib
+import random
+import time
+
+from common import setup_django
+
+setup_django()
+
+from api.translation_data import dictionary_utils  # noqa: E402
+
+LANGUAGES = [
+    "English", "Spanish", "French", "German", "Chinese",
+    "Japanese", "Russian", "Arabic", "Portuguese", "Italian"
+]
+
+TOPOLOGIES = {
+    "bundled": (
+        [("English", target) for target in LANGUAGES[1:]]
+        + [(source, target) for source in ("Spanish", "French", "German")
+           for target in ("English", "Spanish", "French", "German") if source != target]
+        + [(source, "English") for source in LANGUAGES[4:]]
+    ),
+    "chain": list(zip(LANGUAGES, LANGUAGES[1:])),
+}
+
+
+def synthetic_lexicons(pairs, entries, seed=0):
+    rng = random.Random(seed)
+    dictionaries = {}
+    for source, target in pairs:
+        concepts = rng.sample(range(entries), int(entries * 0.9))
+        dictionaries.setdefault(source, {})[target] = {
+            f"{source[:3].lower()}{concept}": f"{target[:3].lower()}{concept}" for concept in concepts
+        }
+    return dictionaries
+
+
+def digest(dictionaries):
+    h = hashlib.sha256()
+    for source in sorted(dictionaries):
+        for target in sorted(dictionaries[source]):
+            h.update(f"{source}>{target}\n".encode())
+            for word, translation in dictionaries[source][target].items():
+                h.update(f"{word}\t{translation}\n".encode())
+    return h.hexdigest()[:16]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--topology", nargs="+", choices=sorted(TOPOLOGIES), default=["bundled", "chain"])
+    args = parser.parse_args()
+
+    print(f"\n{'topology':<10}{'entries/pair':>14}{'pairs':>8}{'words':>12}{'seconds':>10}  digest")
+    for topology in args.topology:
+        for entries in args.entries:
+            dictionaries = synthetic_lexicons(TOPOLOGIES[topology], entries)
+            start = time.perf_counter()
+            dictionary_utils.generate_complete_dictionaries(dictionaries)
+            dictionary_utils.build_direct_translations(dictionaries)
+            elapsed = time.perf_counter() - start
+
+            pairs = sum(len(targets) for targets in dictionaries.values())
+            words = sum(len(words) for targets in dictionaries.values() for words in targets.values())
+            print(f"{topology:<10}{entries:>14}{pairs:>8}{words:>12}{elapsed:>10.3f}  {digest(dictionaries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Local stand-in for the Google Translate ``/translate_a/single`` endpoint,
+with injectable latency and failures, for exercising TranslateClient
+without the network.
+
+Translations prefix each line with the target code ("[es] hello") and
+answer in Google's response layout. Detection recognises a few greetings.
+The latency, jitter, slow_rate, slow_latency, failure_rate,
+failure_status, failures and merge_lines attributes of the server can be
+changed while it runs; slow_rate of the requests take slow_latency
+seconds instead of latency, the next failures requests answer
+failure_status, and with merge_lines a text of several lines is answered
+as one line, as Google sometimes does.
+
+Usage: python benchmarks/translate_stand_in.py [--port 8765] [--latency 0.05]
+       [--jitter 0.02] [--slow-rate 0.05] [--slow-latency 2.0]
+       [--failure-rate 0.2] [--failure-status 503]
+
+then point the backend at it with GOOGLE_TRANSLATE_URL=http://127.0.0.1:8765
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+GREETINGS = {"hola": "es", "bonjour": "fr", "hallo": "de", "ciao": "it", "olá": "pt", "привет": "ru"}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._answer(parse_qs(urlsplit(self.path).query))
+
+    def do_POST(self):
+        params = parse_qs(urlsplit(self.path).query)
+        length = int(self.headers.get('Content-Length', 0))
+        params.update(parse_qs(self.rfile.read(length).decode('utf-8')))
+        self._answer(params)
+
+    def _answer(self, params):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            fail = server.failures > 0
+            server.failures -= fail
+        latency = server.slow_latency if random.random() < server.slow_rate else server.latency
+        delay = latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        if fail or random.random() < server.failure_rate:
+            self._send(server.failure_status, b'{"error": "injected failure"}')
+            return
+
+        text = params.get('q', [''])[0]
+        target = params.get('tl', ['en'])[0]
+        source = params.get('sl', ['auto'])[0]
+        if source == 'auto':
+            words = text.lower().split()
+            source = next((GREETINGS[word] for word in words if word in GREETINGS), 'en')
+        lines = [text.replace('\n', ' ')] if server.merge_lines else text.split('\n')
+        chunks = [[f"[{target}] {line}" + ('\n' if i < len(lines) - 1 else ''), line, None, None, 10]
+                  for i, line in enumerate(lines)]
+        self._send(200, json.dumps([chunks, None, source]).encode('utf-8'))
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out and closed the connection
+            self.close_connection = True
+
+
+def start_stand_in(port=0, latency=0.0, jitter=0.0, failure_rate=0.0, failure_status=503,
+                   slow_rate=0.0, slow_latency=0.0):
+    """Serve the stand-in on a background thread; returns the server, with .url"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandInHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.slow_rate = slow_rate
+    server.slow_latency = slow_latency
+    server.failure_rate = failure_rate
+    server.failure_status = failure_status
+    server.failures = 0
+    server.merge_lines = False
+    server.requests = 0
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-status", type=int, default=503)
+    args = parser.parse_args()
+    server = start_stand_in(args.port, args.latency, args.jitter, args.failure_rate, args.failure_status,
+                            args.slow_rate, args.slow_latency)
+    print(f"Stand-in translation server on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Throughput, latency, cache hit rate, dictionary coverage and output hashes
+of the translation engines over every pair of the sample texts
+(api.translation_data.testing_utils.SAMPLE_TEXTS).
+
+Each text is translated from its language into every other one, --repeat
+times, as TranslationView translates it (transform_text_for_language
+included), by each mode:
+
+  dictionary            the dictionary engine, no translation memory
+  dictionary + memory   the same through a fresh translation memory
+  google                Google Translate, which is the local stand-in
+                        server (benchmarks/translate_stand_in.py) with
+                        --latency seconds per request
+  google + memory       the same through a fresh translation memory
+
+The memory modes start empty, so their first pass misses. Coverage is the
+share of word characters the dictionary engine translates from the lexicon
+rather than by its rule-based fallback. The hash of a mode covers every
+pair's output, and a change means translations changed. With the memory,
+Google Translate gets sentences rather than whole texts, so the stand-in
+answers google + memory differently from google.
+
+--save writes the results as JSON. --baseline compares a run with a saved
+one: throughput, p99 and coverage changes, and the pairs whose output
+changed. The exit status is 1 when any output changed.
+benchmarks/translation_baseline.json holds the results of this tree; save
+it again whenever a change is meant to alter translations.
+
+Usage: python benchmarks/translation_harness.py [--repeat 3] [--latency 0.005]
+       [--save results.json] [--baseline benchmarks/translation_baseline.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ['TRANSLATION_MEMORY'] = 'False'
+
+from common import setup_django, summarize  # noqa: E402
+
+setup_django()
+
+from api.serving.metrics import registry  # noqa: E402
+from api.translation_data.dictionary_utils import transform_text_for_language  # noqa: E402
+from api.translation_data.google_translate import GoogleTranslator  # noqa: E402
+from api.translation_data.segmentation import tokenize  # noqa: E402
+from api.translation_data.testing_utils import SAMPLE_TEXTS  # noqa: E402
+from api.translation_data.translate_client import TranslateClient  # noqa: E402
+from api.translation_data.translation_memory import TranslationMemory  # noqa: E402
+from api.views import TranslationView  # noqa: E402
+from translate_stand_in import start_stand_in  # noqa: E402
+
+MODES = ["dictionary", "dictionary + memory", "google", "google + memory"]
+
+
+def pairs():
+    languages = list(SAMPLE_TEXTS)
+    return [(source, target) for source in languages for target in languages if source != target]
+
+
+def coverage(store, source, target):
+    """Share of the source texts' word characters translated from the pair's lexicon"""
+    trie = store.phrase_trie(source, target)
+    found = total = 0
+    for text in SAMPLE_TEXTS[source]:
+        for word, translation, is_word in trie.segment(tokenize(text)):
+            if is_word:
+                total += len(word)
+                found += len(word) if translation is not None else 0
+    return found / max(1, total)
+
+
+def run_mode(view, mode, repeat, memory_path):
+    """Summary of one mode over every pair, with the per-pair output hashes"""
+    engine = "google_translate" if mode.startswith("google") else "dictionary"
+    translate = view._translate_remote if engine == "google_translate" else view._translate_text
+    view.translation_memory = TranslationMemory(memory_path) if mode.endswith("memory") else None
+    lookups = registry.counter('translation_memory_lookups_total')
+    hits, misses = lookups.value(engine=engine, result='hit'), lookups.value(engine=engine, result='miss')
+
+    samples, outputs = [], {}
+    characters = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for source, target in pairs():
+            translations = []
+            for text in SAMPLE_TEXTS[source]:
+                call_start = time.perf_counter()
+                translations.append(transform_text_for_language(translate(text, source, target), target))
+                samples.append((time.perf_counter() - call_start) * 1000)
+                characters += len(text)
+            outputs[f"{source}>{target}"] = hashlib.sha256('\n'.join(translations).encode()).hexdigest()[:16]
+    elapsed = time.perf_counter() - start
+
+    hits = lookups.value(engine=engine, result='hit') - hits
+    misses = lookups.value(engine=engine, result='miss') - misses
+    summary = summarize(samples)
+    return {
+        "chars_per_s": characters / elapsed,
+        "p50_ms": summary["p50_ms"],
+        "p99_ms": summary["p99_ms"],
+        "hit_rate": hits / (hits + misses) if view.translation_memory else None,
+        "hash": hashlib.sha256(json.dumps(outputs, sort_keys=True).encode()).hexdigest()[:16],
+        "pairs": outputs,
+    }
+
+
+def print_results(results):
+    print(f"\n{'mode':<22}{'chars/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'hit rate':>10}  output hash")
+    for mode, result in results["modes"].items():
+        hit_rate = f"{result['hit_rate']:.1%}" if result["hit_rate"] is not None else "-"
+        print(f"{mode:<22}{result['chars_per_s']:>11,.0f}{result['p50_ms']:>9.3f}{result['p99_ms']:>9.3f}"
+              f"{hit_rate:>10}  {result['hash']}")
+
+    languages = list(SAMPLE_TEXTS)
+    print("\nDictionary coverage, source (rows) into target (columns)")
+    print(f"{'':<12}" + ''.join(f"{target[:7]:>8}" for target in languages))
+    for source in languages:
+        cells = [f"{results['coverage'][f'{source}>{target}']:>8.1%}" if source != target else f"{'-':>8}"
+                 for target in languages]
+        print(f"{source:<12}" + ''.join(cells))
+
+
+def compare(results, baseline):
+    """Print the changes from a saved run; True if every output is unchanged"""
+    print("\nAgainst the baseline")
+    if baseline["repeat"] != results["repeat"]:
+        print(f"(saved with --repeat {baseline['repeat']}, so the memory modes are not comparable)")
+    print(f"{'mode':<22}{'chars/s':>10}{'p99':>10}  output")
+    unchanged = True
+    for mode, result in results["modes"].items():
+        before = baseline["modes"].get(mode)
+        if before is None:
+            print(f"{mode:<22}  not in the baseline")
+            continue
+        changed = [pair for pair, digest in result["pairs"].items() if before["pairs"].get(pair) != digest]
+        unchanged = unchanged and not changed
+        output = "same" if not changed else f"changed in {len(changed)} pairs: {', '.join(changed[:5])}"
+        print(f"{mode:<22}{result['chars_per_s'] / before['chars_per_s'] - 1:>+10.1%}"
+              f"{result['p99_ms'] / before['p99_ms'] - 1:>+10.1%}  {output}")
+
+    moved = {pair: (baseline["coverage"][pair], value) for pair, value in results["coverage"].items()
+             if pair in baseline["coverage"] and abs(baseline["coverage"][pair] - value) > 1e-9}
+    for pair, (before, after) in sorted(moved.items()):
+        print(f"coverage {pair.replace('>', ' → ')}: {before:.1%} → {after:.1%}")
+    if not moved:
+        print("coverage: same in every pair")
+    return unchanged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--mode", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved by --save")
+    args = parser.parse_args()
+
+    server = start_stand_in(latency=args.latency)
+    view = TranslationView()
+    view.google_translator = GoogleTranslator(TranslateClient(server.url))
+
+    results = {
+        "repeat": args.repeat,
+        "modes": {},
+        "coverage": {f"{source}>{target}": coverage(view.dictionaries, source, target)
+                     for source, target in pairs()},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in args.mode:
+            memory_path = os.path.join(directory, f"{mode.replace(' + ', '-')}.sqlite3")
+            results["modes"][mode] = run_mode(view, mode, args.repeat, memory_path)
+    server.shutdown()
+
+    print_results(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"\nSaved to {args.save}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Hedged versus sequential translation against the local stand-in server
+(benchmarks/translate_stand_in.py) in several upstream conditions:
+
+  fast      every remote call answers after --latency seconds
+  tail      --slow-rate of the calls take --slow-latency seconds
+  failing   every remote call fails with 503 after --latency seconds
+
+Sequential calls GoogleTranslator.translate_text, which only runs the
+dictionary engine once the remote call has failed. Hedged races the two
+with the configured hedge delay and latency budget. The circuit breaker
+is disabled so both modes see every failure.
+
+Usage: python benchmarks/translation_hedging.py [--calls 100] [--threads 8]
+       [--latency 0.05] [--slow-rate 0.1] [--slow-latency 2.0]
+       [--hedge-delay 0.3] [--budget 1.0]
+"""
+import argparse
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from common import setup_django, summarize
+
+setup_django()
+
+from api.serving.metrics import registry  # noqa: E402
+from api.translation_data.google_translate import GoogleTranslator  # noqa: E402
+from api.translation_data.hedging import HedgedTranslator  # noqa: E402
+from api.translation_data.translate_client import TranslateClient  # noqa: E402
+from api.views import TranslationView  # noqa: E402
+from translate_stand_in import start_stand_in  # noqa: E402
+
+TEXT = "Hello, how are you? The weather is nice today."
+
+
+def run(translate, calls, threads):
+    """Latencies (ms) and translation_method counts of calls translations"""
+    latencies, methods = [], Counter()
+    lock = threading.Lock()
+
+    def call(_):
+        start = time.perf_counter()
+        _, method = translate()
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            methods[method] += 1
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(calls)))
+    return latencies, methods
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--hedge-delay", type=float, default=0.3)
+    parser.add_argument("--budget", type=float, default=1.0)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    server = start_stand_in(latency=args.latency)
+    client = TranslateClient(server.url, pool_size=args.threads * 2, timeout=args.slow_latency * 2,
+                             retries=0, failure_threshold=10**9)
+    translator = GoogleTranslator(client)
+    local = TranslationView()._translate_text
+    hedged = HedgedTranslator(translator.translate_remote, local, args.hedge_delay, args.budget,
+                              ThreadPoolExecutor(max_workers=args.threads * 2))
+
+    def sequential():
+        failed = []
+
+        def fallback(*arguments):
+            failed.append(True)
+            return local(*arguments)
+        translated = translator.translate_text(TEXT, "English", "Spanish", fallback_fn=fallback)
+        return translated, 'dictionary_fallback' if failed else 'google_translate'
+
+    modes = [("sequential", sequential), ("hedged", lambda: hedged.translate(TEXT, "English", "Spanish"))]
+    scenarios = [("fast", {}), ("tail", {'slow_rate': args.slow_rate, 'slow_latency': args.slow_latency}),
+                 ("failing", {'failure_rate': 1.0})]
+    saved = registry.counter('translation_hedge_latency_saved_seconds_total')
+
+    print(f"\n{'scenario':<10}{'mode':<12}{'mean ms':>9}{'p50 ms':>9}{'p99 ms':>9}  translation_method")
+    for scenario, conditions in scenarios:
+        for name, value in conditions.items():
+            setattr(server, name, value)
+        for mode, translate in modes:
+            latencies, methods = run(translate, args.calls, args.threads)
+            summary = summarize(latencies)
+            counts = ', '.join(f"{method} {count}" for method, count in methods.most_common())
+            print(f"{scenario:<10}{mode:<12}{summary['mean_ms']:>9.1f}{summary['p50_ms']:>9.1f}"
+                  f"{summary['p99_ms']:>9.1f}  {counts}")
+        for name in conditions:
+            setattr(server, name, 0.0)
+
+    # Wait for abandoned remote calls so their saved latency is counted
+    time.sleep(args.slow_latency)
+    print("\nHedge outcomes:")
+    for labels, value in sorted(registry.counter('translation_hedge_total').samples(), key=lambda s: -s[1]):
+        print(f"  {labels['winner']:<7} {labels['outcome']:<15} {value}")
+    print(f"Latency saved: {saved.value():.2f}s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Latency of short translation requests through the Django stack.
+
+Requests use the dictionary engine (use_dictionary_only) so no network
+calls are made. One case passes the source language, the other relies on
+language detection.
+
+Usage: python benchmarks/translation_latency.py [iterations]
+"""
+import io
+import json
+import sys
+from wsgiref.util import setup_testing_defaults
+
+from common import setup_django, time_calls, summarize, print_table
+
+setup_django()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+PATH = "/api/predict/translation/"
+CASES = [
+    ("short, source given", {
+        "text": "Hello, how are you?", "source_language": "English",
+        "target_language": "Spanish", "use_dictionary_only": True,
+    }),
+    ("short, detected source", {
+        "text": "Hello, how are you?", "target_language": "French", "use_dictionary_only": True,
+    }),
+]
+
+
+def call(app, payload):
+    body = json.dumps(payload).encode()
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'PATH_INFO': PATH,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+    content = b''.join(app(environ, lambda status, headers: statuses.append(status)))
+    return statuses[0], content
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    app = get_wsgi_application()
+
+    rows = []
+    for label, payload in CASES:
+        status, content = call(app, payload)
+        if not status.startswith('200'):
+            print(f"WARNING: {label} returned {status}: {content[:200]!r}")
+        rows.append((label, summarize(time_calls(lambda: call(app, payload), iterations))))
+
+    print_table(f"Translation latency in ms over {iterations} requests", rows)
+
+
+if __name__ == "__main__":
+    main()
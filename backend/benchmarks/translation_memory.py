@@ -0,0 +1,103 @@
+"""
+Sentence-level translation memory on documents that share most of their
+sentences, as templates and boilerplate do.
+
+Each synthetic document has --sentences sentences. --shared of them come
+from a small pool of boilerplate sentences, and the rest are unique. The
+documents are translated through TranslationView's Google and dictionary
+paths, with and without the memory. Google Translate is the local
+stand-in server (benchmarks/translate_stand_in.py) with --latency seconds
+per request.
+
+Usage: python benchmarks/translation_memory.py [--documents 50] [--sentences 20]
+       [--shared 0.8] [--latency 0.05]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common import setup_django, summarize, print_table
+
+setup_django()
+
+from api.serving.metrics import registry  # noqa: E402
+from api.translation_data.google_translate import GoogleTranslator  # noqa: E402
+from api.translation_data.translate_client import TranslateClient  # noqa: E402
+from api.translation_data.translation_memory import TranslationMemory  # noqa: E402
+from api.views import TranslationView  # noqa: E402
+from translate_stand_in import start_stand_in  # noqa: E402
+
+WORDS = ("the cat dog house water friend family table book time day people world "
+         "good new big small love eat drink see know think make go come").split()
+
+
+def documents(count, sentences, shared, seed=0):
+    rng = random.Random(seed)
+    pool = [' '.join(rng.choice(WORDS) for _ in range(8)).capitalize() + '.' for _ in range(30)]
+    docs = []
+    for d in range(count):
+        lines = [rng.choice(pool) if rng.random() < shared
+                 else f"{' '.join(rng.choice(WORDS) for _ in range(8)).capitalize()} number {d}-{i}."
+                 for i in range(sentences)]
+        docs.append(' '.join(lines))
+    return docs
+
+
+def translate_all(translate, docs):
+    samples = []
+    for doc in docs:
+        start = time.perf_counter()
+        translate(doc)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--sentences", type=int, default=20)
+    parser.add_argument("--shared", type=float, default=0.8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    docs = documents(args.documents, args.sentences, args.shared)
+    server = start_stand_in(latency=args.latency)
+    view = TranslationView()
+    view.google_translator = GoogleTranslator(TranslateClient(server.url))
+    lookups = registry.counter('translation_memory_lookups_total')
+    segments = registry.counter('google_translate_segments_total')
+
+    rows, requests = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        for memory in (None, TranslationMemory(os.path.join(directory, "memory.sqlite3"))):
+            view.translation_memory = memory
+            label = "memory" if memory else "no memory"
+            for engine, translate in (
+                ("google", lambda doc: view._translate_remote(doc, "English", "Spanish")),
+                ("dictionary", lambda doc: view._translate_text(doc, "English", "Spanish")),
+            ):
+                before, sent = server.requests, segments.value()
+                rows.append((f"{engine}, {label}", summarize(translate_all(translate, docs))))
+                if engine == "google":
+                    requests.append((label, server.requests - before, segments.value() - sent))
+            if memory:
+                rows.append(("google, memory warm", summarize(translate_all(
+                    lambda doc: view._translate_remote(doc, "English", "Spanish"), docs))))
+                stats = memory.stats()
+
+    print_table(f"Per-document latency in ms ({args.documents} documents, "
+                f"{args.sentences} sentences, {args.shared:.0%} shared)", rows)
+    print()
+    for label, count, sent in requests:
+        print(f"Google Translate, {label}: {count} requests, {sent} segments sent")
+    print(f"Memory entries: {stats['entries']}")
+    for engine in ("google_translate", "dictionary"):
+        hits, misses = lookups.value(engine=engine, result='hit'), lookups.value(engine=engine, result='miss')
+        print(f"{engine} hit rate: {hits / max(1, hits + misses):.1%} ({hits} hits, {misses} misses)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compile the translation dictionaries into the memory-mapped lexicon artifact,
+and import the TSV lexicons when the sqlite lexicon store is configured.
+This script should be run from the backend directory with Python, after
+changing the word lists in api/translation_data or the TSV lexicons.
+"""
+
+import os
+import sys
+import time
+import django
+
+# Set up Django environment
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ml_showcase.settings")
+django.setup()
+
+from django.conf import settings
+from api.translation_data.dictionary_store import build_dictionary_store, get_dictionary_store
+from api.translation_data.lexicon_artifact import LexiconArtifact, write_lexicon_artifact
+from api.translation_data.lexicon_store import SQLiteLexiconStore
+
+
+def build_lexicon(path=None):
+    """Expand the dictionaries for every language pair and write the artifact"""
+    path = path or settings.TRANSLATION_LEXICON_ARTIFACT
+    start = time.perf_counter()
+    store = build_dictionary_store()
+    size = write_lexicon_artifact(store, path)
+
+    # Check the artifact reads back the same dictionaries
+    artifact = LexiconArtifact(path)
+    for source, target in store.language_pairs():
+        if dict(artifact.dictionary(source, target)) != dict(store.dictionary(source, target)):
+            raise RuntimeError(f"Artifact mismatch for {source} → {target}")
+
+    pairs = len(store.language_pairs())
+    print(f"Wrote {path}: {pairs} language pairs, {size} bytes in {time.perf_counter() - start:.2f}s")
+
+    # Import the large TSV lexicons now rather than on first use
+    lexicons = get_dictionary_store()
+    if isinstance(lexicons, SQLiteLexiconStore):
+        start = time.perf_counter()
+        lexicons.import_all()
+        print(f"Imported TSV lexicons into {lexicons.database} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    print("Compiling translation lexicon for the ML Showcase Application...")
+    build_lexicon(sys.argv[1] if len(sys.argv) > 1 else None)
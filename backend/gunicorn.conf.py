@@ -0,0 +1,46 @@
+"""
+Gunicorn settings for the backend, run from the backend directory:
+
+    gunicorn -c gunicorn.conf.py ml_showcase.wsgi:application
+
+With GUNICORN_PRELOAD=True (the default) the master loads the application
+and imports the views before forking the workers. The libraries, the
+translation dictionaries, phrase tries and language detector are loaded
+once, and every worker shares their pages instead of loading its own copy.
+
+Sharing only lasts while nothing writes to those pages. The translation
+data is read-only after startup, and the garbage collector is kept away
+from it: collections are disabled while the master loads, and the loaded
+heap is frozen (gc.freeze) before the workers are forked. Collections in
+a worker then skip the master's objects, instead of writing to their
+headers and copying their pages. benchmarks/fork_memory.py measures the
+memory per worker with and without preloading.
+"""
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+if preload_app:
+    # The configuration is read before the application is preloaded
+    gc.disable()
+
+
+def when_ready(server):
+    """Import the views too, then freeze the preloaded heap and collect again in the master"""
+    if preload_app:
+        # Models are still loaded by each worker, on first use
+        from django.urls import get_resolver
+        get_resolver().url_patterns
+        gc.freeze()
+        gc.enable()
+
+
+def pre_fork(server, worker):
+    """Also freeze what the master allocated since, e.g. before replacing a worker"""
+    if preload_app:
+        gc.freeze()
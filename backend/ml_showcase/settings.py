@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -60,6 +61,7 @@ MIDDLEWARE = [
 
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
+CORS_ALLOW_HEADERS = (*default_headers, 'x-priority', 'x-request-timeout')
 
 ROOT_URLCONF = 'ml_showcase.urls'
 
@@ -136,11 +138,151 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Models directory
 MODELS_DIR = os.path.join(BASE_DIR.parent, 'models')
 
+# Compiled translation lexicon, built by build_lexicon.py and memory-mapped by the workers
+TRANSLATION_LEXICON_ARTIFACT = os.environ.get(
+    'TRANSLATION_LEXICON_ARTIFACT', os.path.join(MODELS_DIR, 'translation_lexicon.bin')
+)
+
+# Where translation lexicons are looked up: 'memory' serves the bundled dictionaries,
+# 'sqlite' adds the <Source>-<Target>.tsv lexicons in tsv_dir from an on-disk database
+TRANSLATION_LEXICONS = {
+    'store': os.environ.get('TRANSLATION_LEXICON_STORE', 'memory'),
+    'tsv_dir': os.environ.get('TRANSLATION_LEXICON_DIR', os.path.join(BASE_DIR.parent, 'lexicons')),
+    'database': os.path.join(MODELS_DIR, 'translation_lexicons.sqlite3'),
+    # Recently used words kept in memory by the sqlite store
+    'cache_size': 50000,
+    # In-memory layout of the built dictionaries: 'compact' word-ID arrays or 'dict'
+    'layout': os.environ.get('TRANSLATION_LEXICON_LAYOUT', 'compact'),
+}
+
+# Pooled client for the Google Translate endpoint (api.translation_data.translate_client).
+# timeout is per attempt; failure_threshold consecutive failed calls open the
+# circuit breaker, which sends translations to the dictionaries for reset_timeout seconds
+GOOGLE_TRANSLATE = {
+    'url': os.environ.get('GOOGLE_TRANSLATE_URL', 'https://translate.googleapis.com'),
+    'pool_size': 8,
+    'timeout': float(os.environ.get('GOOGLE_TRANSLATE_TIMEOUT', '3.0')),
+    'retries': 2,
+    'backoff': 0.1,
+    'max_batch_chars': 4500,
+    'failure_threshold': 5,
+    'reset_timeout': 30.0,
+}
+
+# Hedged translation (api.translation_data.hedging), used when a request sends
+# "hedged": true or when 'default' is set. The dictionary translation starts
+# once Google Translate has not answered within hedge_delay seconds, and wins
+# if Google has still not answered within latency_budget seconds
+TRANSLATION_HEDGING = {
+    'default': os.environ.get('TRANSLATION_HEDGING', 'False') == 'True',
+    'hedge_delay': float(os.environ.get('TRANSLATION_HEDGE_DELAY', '0.3')),
+    'latency_budget': float(os.environ.get('TRANSLATION_LATENCY_BUDGET', '1.0')),
+    'max_workers': 16,
+}
+
+# Sentence-level translation memory (api.translation_data.translation_memory),
+# shared by the workers on a host. Bump engine_version to drop every entry
+# after changing how sentences are translated
+TRANSLATION_MEMORY = {
+    'enabled': os.environ.get('TRANSLATION_MEMORY', 'True') == 'True',
+    'database': os.environ.get('TRANSLATION_MEMORY_DB', os.path.join(MODELS_DIR, 'translation_memory.sqlite3')),
+    'max_entries': 1000000,
+    'ttl': 30 * 24 * 3600,
+    # Hits refresh an entry's last use at most this often (seconds)
+    'touch_interval': 60.0,
+    'engine_version': '2',
+}
+
+# Document translation (api.translation_data.documents): segments of up to
+# segment_chars are translated concurrently, at most window per document, on
+# remote_workers threads for Google Translate or dictionary_processes worker
+# processes for the dictionary engine (0 runs them on threads instead)
+TRANSLATION_DOCUMENTS = {
+    'max_bytes': 10 * 1024 * 1024,
+    'segment_chars': 2000,
+    'window': 16,
+    'remote_workers': 8,
+    'dictionary_processes': int(os.environ.get('TRANSLATION_DOCUMENT_PROCESSES', '2')),
+}
+
+# Batch translation (api.translation_data.batch): limits per request, and the
+# threads that run the Google Translate calls of batches, one per source and
+# target language
+TRANSLATION_BATCH = {
+    'max_texts': 1000,
+    'max_chars': 500000,
+    'remote_workers': 8,
+}
+
+# Source language detection runs locally and asks Google Translate only when
+# the local confidence is below escalation_threshold; remote answers are
+# cached per text in each worker
+TRANSLATION_DETECTION = {
+    'escalation_threshold': float(os.environ.get('TRANSLATION_DETECTION_THRESHOLD', '0.4')),
+    'cache_size': 10000,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Serve JSON POSTs to tabular prediction views through the lean WSGI
+# fast path (api.serving.fast_path) instead of DRF and the middleware stack
+PREDICT_FAST_PATH = os.environ.get('PREDICT_FAST_PATH', 'True') == 'True'
+
+# Identical prediction requests that arrive while one is already running
+# share its response instead of recomputing it (api.serving.pipeline)
+PREDICT_COALESCING = os.environ.get('PREDICT_COALESCING', 'True') == 'True'
+
+# Admission control per prediction endpoint (api.serving.admission), keyed
+# by URL name. Limits apply per worker process: at most max_concurrency
+# requests run at once, up to max_queue wait for at most queue_timeout
+# seconds, and anything beyond that is rejected with 429/503 + Retry-After.
+PREDICT_ADMISSION = {
+    'default': {'max_concurrency': 8, 'max_queue': 16, 'queue_timeout': 2.0},
+    # Image and audio models
+    'neural_network': {'max_concurrency': 2, 'max_queue': 4, 'queue_timeout': 5.0},
+    'adaboost': {'max_concurrency': 2, 'max_queue': 4, 'queue_timeout': 5.0},
+    'rnn': {'max_concurrency': 2, 'max_queue': 4, 'queue_timeout': 5.0},
+    # Text generation and translation
+    'lstm': {'max_concurrency': 2, 'max_queue': 4, 'queue_timeout': 5.0},
+    'translation': {'max_concurrency': 4, 'max_queue': 8, 'queue_timeout': 5.0},
+}
+
+# Bulkhead executors per model family (api.serving.bulkheads). Each family
+# has its own pool and queue so a slow family only degrades itself. The
+# tabular models are sub-millisecond and run on the request thread.
+PREDICT_BULKHEADS = {
+    'tabular': {'max_workers': 8, 'max_queue': 32, 'queue_timeout': 1.0, 'dedicated_threads': False},
+    'image': {'max_workers': 2, 'max_queue': 4, 'queue_timeout': 5.0},
+    'audio': {'max_workers': 2, 'max_queue': 4, 'queue_timeout': 5.0},
+    'text': {'max_workers': 4, 'max_queue': 8, 'queue_timeout': 5.0},
+}
+
+# Priority classes (api.serving.priority): requests are interactive unless
+# their route, payload size or X-Priority header says batch or background.
+# Lower classes may always use their share of each endpoint's and family's
+# slots and queue, and borrow idle slots beyond it.
+PREDICT_PRIORITY = {
+    'routes': {},
+    'batch_min_bytes': {'tabular': 64 * 1024, 'text': 256 * 1024},
+    'shares': {'batch': 0.5, 'background': 0.25},
+}
+
+# Request deadlines in seconds (api.serving.deadlines), keyed by URL name.
+# Clients can shorten them with an X-Request-Timeout header; expired work
+# is cancelled at the next checkpoint and answered with 504.
+PREDICT_DEADLINES = {
+    'default': 30.0,
+    'neural_network': 20.0,
+    'adaboost': 20.0,
+    'rnn': 20.0,
+    'translation': 15.0,
+    'translation_document': 120.0,
+    'translation_batch': 60.0,
+}
+
 # DRF settings
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ml_showcase.settings')
 
 application = get_wsgi_application()
+
+# Serve JSON prediction requests without the DRF/middleware stack
+if settings.PREDICT_FAST_PATH:
+    from api.serving import FastPathApplication
+    application = FastPathApplication(application)